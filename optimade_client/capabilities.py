@@ -0,0 +1,289 @@
+"""Capabilities of OPTIMADE databases, for routing queries
+
+Databases differ in which properties can be sorted and queried, which pagination they
+support, and the semantics of `structure_features` (prior to v1.0.0-rc.2, structures with
+unknown positions were flagged with `"unknown_positions"`).
+Instead of finding out by trial and error, the capabilities of each database are
+determined once from `/info`, `/info/structures` and a minimal probe query, and cached.
+Filter conditions and sorts a database cannot serve are then skipped before any request
+is sent.
+If the capabilities cannot be determined, the database is assumed to support everything
+(without caching this), so the query itself reports any problem.
+"""
+import re
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from optimade.models.utils import SemanticVersion
+
+from optimade_client.exceptions import OptimadeClientError, QueryError
+from optimade_client.logger import LOGGER
+from optimade_client.utils import (
+    __optimade_version__,
+    handle_errors,
+    perform_optimade_query,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from optimade_client.executor import QueryToken
+
+
+__all__ = (
+    "CapabilityMatrix",
+    "CAPABILITY_MATRIX",
+    "DatabaseCapabilities",
+    "split_conjunction",
+)
+
+
+class DatabaseCapabilities:
+    """The capabilities of a single database
+
+    :param base_url: Versioned base URL of the database.
+    :param api_version: The OPTIMADE API version implemented by the database.
+    :param properties: Property definitions of the `structures` entry endpoint, as listed
+        under `/info/structures` (empty if unknown).
+    :param pageing: Pagination query parameters used by the database (empty if unknown).
+    """
+
+    PAGEING = ("page_offset", "page_number", "page_above", "page_below", "page_cursor")
+    UNQUERYABLE = ("unsupported", "no")
+    FILTER_KEYWORDS = ("NOT", "AND", "OR", "HAS", "KNOWN", "UNKNOWN", "IS")
+
+    def __init__(
+        self,
+        base_url: str,
+        api_version: str,
+        properties: Dict[str, dict] = None,
+        pageing: Set[str] = None,
+    ):
+        self.base_url = base_url
+        self.api_version = api_version
+        self.properties = properties or {}
+        self.pageing = pageing or set()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(base_url={self.base_url!r}, "
+            f"api_version={self.api_version!r}, properties={len(self.properties)}, "
+            f"pageing={sorted(self.pageing)!r})"
+        )
+
+    @property
+    def sortable(self) -> List[str]:
+        """Sortable properties"""
+        return sorted(
+            field
+            for field, definition in self.properties.items()
+            if definition.get("sortable", False)
+        )
+
+    @property
+    def uses_new_structure_features(self) -> bool:
+        """Whether the API version is >= v1.0.0-rc.2
+
+        Since then, structures with unknown positions are no longer flagged with the
+        `"unknown_positions"` structure feature.
+        """
+        critical_version = SemanticVersion("1.0.0-rc.2")
+        version = SemanticVersion(self.api_version)
+
+        if version.base_version > critical_version.base_version:
+            return True
+
+        if version.base_version == critical_version.base_version:
+            if version.prerelease:
+                return version.prerelease >= critical_version.prerelease
+
+            # Version is bigger than critical version and is not a pre-release
+            return True
+
+        # Major.Minor.Patch is lower than critical version
+        return False
+
+    def can_query(self, field: str) -> bool:
+        """Whether `field` can be used in a filter (assumed, if the properties are unknown)"""
+        if not self.properties:
+            return True
+        if field not in self.properties:
+            return False
+        definition = self.properties[field]
+        queryable = definition.get(
+            "x-optimade-queryable", definition.get("queryable", "")
+        )
+        return str(queryable).lower() not in self.UNQUERYABLE
+
+    def can_sort(self, sort: Optional[str]) -> bool:
+        """Whether the results can be sorted by `sort` (assumed, if the properties are unknown)"""
+        if not sort or not self.properties:
+            return True
+        return all(
+            field.strip().lstrip("-") in self.sortable for field in sort.split(",")
+        )
+
+    def adapt_filter(self, optimade_filter: str) -> Tuple[str, List[str]]:
+        """Skip conditions on properties the database cannot query
+
+        Only conditions of a top-level conjunction (`... AND ... AND ...`) can be skipped.
+        Other filters are returned untouched.
+
+        :return: The adapted filter and the skipped properties.
+        """
+        if not optimade_filter:
+            return optimade_filter, []
+
+        conditions = split_conjunction(optimade_filter)
+        if conditions is None:
+            return optimade_filter, []
+
+        kept, skipped = [], []
+        for condition in conditions:
+            field = _leading_property(condition, self.FILTER_KEYWORDS)
+            if field is not None and not self.can_query(field):
+                skipped.append(field)
+            else:
+                kept.append(condition)
+        if skipped:
+            LOGGER.debug(
+                "Skipping filter conditions on %r for %s", skipped, self.base_url
+            )
+        return " AND ".join(kept), skipped
+
+    def adapt_pageing(self, queries: dict) -> dict:
+        """Only send the (offset- or number-based) pagination the database uses"""
+        queries = queries.copy()
+        if "page_offset" in self.pageing and "page_number" not in self.pageing:
+            queries["page_number"] = None
+        elif "page_number" in self.pageing and "page_offset" not in self.pageing:
+            queries["page_offset"] = None
+        return queries
+
+
+def split_conjunction(optimade_filter: str) -> Optional[List[str]]:
+    """Split a filter on its top-level `AND`s, or return `None` for other top-level logic"""
+    conditions, current, depth, in_string = [], [], 0, False
+    tokens = re.split(r'(\s+|"|\(|\))', optimade_filter)
+    for token in tokens:
+        if token == '"' and (not current or not current[-1].endswith("\\")):
+            in_string = not in_string
+        elif not in_string:
+            if token == "(":
+                depth += 1
+            elif token == ")":
+                depth -= 1
+            elif depth == 0 and token == "OR":
+                return None
+            elif depth == 0 and token == "AND":
+                conditions.append("".join(current).strip())
+                current = []
+                continue
+        current.append(token)
+    conditions.append("".join(current).strip())
+    return [_ for _ in conditions if _]
+
+
+def _leading_property(condition: str, keywords: Tuple[str]) -> Optional[str]:
+    """The property a simple condition is on, e.g., `nsites` for `NOT nsites>=3`"""
+    match = re.match(r"^(?:NOT\s+)*([a-z_][a-z_0-9]*)\b", condition)
+    if match is None or match.group(1) in keywords:
+        return None
+    return match.group(1)
+
+
+class CapabilityMatrix:
+    """Cached capabilities of all databases, determined on first use"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._capabilities: Dict[str, DatabaseCapabilities] = {}
+
+    def cached(self, base_url: str) -> Optional[DatabaseCapabilities]:
+        """The capabilities of a database, if already determined"""
+        with self._lock:
+            return self._capabilities.get(base_url)
+
+    def get(self, base_url: str, token: "QueryToken" = None) -> DatabaseCapabilities:
+        """The capabilities of a database, determining them if necessary
+
+        If they cannot be determined, all capabilities are assumed (for this call only).
+        """
+        capabilities = self.cached(base_url)
+        if capabilities is None:
+            try:
+                capabilities = self._determine(base_url, token=token)
+            except OptimadeClientError as exc:
+                LOGGER.warning(
+                    "Could not determine the capabilities of %s, assuming it supports "
+                    "the query: %s",
+                    base_url,
+                    exc,
+                )
+                return DatabaseCapabilities(
+                    base_url=base_url, api_version=__optimade_version__[0]
+                )
+            with self._lock:
+                capabilities = self._capabilities.setdefault(base_url, capabilities)
+        return capabilities
+
+    def reset(self, base_url: str = None) -> None:
+        """Forget the capabilities of a database, or of all databases"""
+        with self._lock:
+            if base_url is None:
+                self._capabilities.clear()
+            else:
+                self._capabilities.pop(base_url, None)
+
+    @staticmethod
+    def _determine(base_url: str, token: "QueryToken" = None) -> DatabaseCapabilities:
+        """Determine capabilities from `/info`, `/info/structures`, and a probe query"""
+        response = perform_optimade_query(
+            base_url=base_url, endpoint="/info", token=token
+        )
+        msg, _ = handle_errors(response)
+        if msg:
+            raise QueryError(msg)
+        if "meta" not in response:
+            raise QueryError(
+                f"'meta' field not found in /info endpoint for base URL: {base_url}"
+            )
+        if "api_version" not in response["meta"]:
+            raise QueryError(
+                f"'api_version' field not found in 'meta' for base URL: {base_url}"
+            )
+        api_version = response["meta"]["api_version"]
+        if api_version.startswith("v"):
+            api_version = api_version[1:]
+
+        response = perform_optimade_query(
+            base_url=base_url, endpoint="/info/structures", token=token
+        )
+        msg, _ = handle_errors(response)
+        properties = {} if msg else response.get("data", {}).get("properties", {})
+
+        # Probe: The `next` link of a minimal query reveals the pagination in use
+        response = perform_optimade_query(
+            base_url=base_url, response_fields="id", page_limit=1, token=token
+        )
+        msg, _ = handle_errors(response)
+        pageing = set()
+        if not msg:
+            next_link = (response.get("links") or {}).get("next")
+            if isinstance(next_link, dict):
+                next_link = next_link.get("href")
+            if next_link:
+                pageing = set(parse_qs(urlparse(next_link).query)) & set(
+                    DatabaseCapabilities.PAGEING
+                )
+
+        capabilities = DatabaseCapabilities(
+            base_url=base_url,
+            api_version=api_version,
+            properties=properties,
+            pageing=pageing,
+        )
+        LOGGER.debug("Determined capabilities: %r", capabilities)
+        return capabilities
+
+
+CAPABILITY_MATRIX = CapabilityMatrix()
@@ -0,0 +1,57 @@
+import argparse
+import logging
+import sys
+import time
+
+
+LOGGING_LEVELS = [logging.getLevelName(level).lower() for level in range(0, 51, 10)]
+
+
+def main(args: list = None):
+    """Probe the health of the OPTIMADE providers, storing it for the OPTIMADE Client."""
+    parser = argparse.ArgumentParser(
+        description=main.__doc__,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        help="Seconds between the rounds of probes.",
+        default=900.0,
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Probe the providers once and exit, instead of running as a daemon.",
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        help="Set the log-level.",
+        choices=LOGGING_LEVELS,
+        default="warning",
+    )
+
+    args = parser.parse_args(args)
+
+    from optimade_client.health import HEALTH_MONITOR
+    from optimade_client.logger import LOGGER
+
+    LOGGER.setLevel(getattr(logging, args.log_level.upper()))
+
+    try:
+        while True:
+            unhealthy = HEALTH_MONITOR.check()
+            for provider_id, health in sorted(HEALTH_MONITOR.snapshot().items()):
+                latency = (
+                    f"{health.latency:.2f} s" if health.latency is not None else "-"
+                )
+                print(
+                    f"{provider_id:<12} {'UNHEALTHY' if provider_id in unhealthy else 'ok':<9} "
+                    f"latency {latency:<8} error rate {health.error_rate or 0.0:.2f}"
+                )
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        sys.exit("Stopped probing provider health.")
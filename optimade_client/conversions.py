@@ -0,0 +1,124 @@
+"""Cache of structure conversions
+
+Converting a structure to ASE or pymatgen objects, and writing these to files, is repeated
+when switching formats, or going back to an earlier structure.
+The adapter objects (e.g., `ase.Atoms`) and the encoded files are kept in bounded LRU caches,
+keyed by the structure's `id`, a digest of its entry and the format, so all downloads (and
+the viewer) share one conversion per structure.
+"""
+from collections import OrderedDict
+import hashlib
+import threading
+from typing import Any, Callable, Hashable, Optional, Tuple
+import weakref
+
+from optimade.adapters import Structure
+
+from optimade_client.logger import LOGGER
+
+
+__all__ = ("ConversionCache", "CONVERSION_CACHE", "structure_key")
+
+
+_DIGESTS: "weakref.WeakKeyDictionary[Structure, str]" = weakref.WeakKeyDictionary()
+_DIGESTS_LOCK = threading.Lock()
+
+
+def structure_key(structure: Structure, output_format: str) -> Tuple[str, str, str]:
+    """Key identifying a version of a structure converted to `output_format`
+
+    Since `id`s are only unique within a database, a digest of the whole entry is included,
+    so structures from different databases (e.g., in a federated search) are never mixed up.
+    The digest is computed once per `Structure` object.
+    """
+    with _DIGESTS_LOCK:
+        digest = _DIGESTS.get(structure)
+    if digest is None:
+        digest = hashlib.sha1(
+            structure.entry.json(sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        with _DIGESTS_LOCK:
+            _DIGESTS[structure] = digest
+    return structure.id, digest, output_format
+
+
+class ConversionCache:
+    """Bounded LRU caches of converted structures
+
+    :param max_bytes: Maximum total size of the cached files.
+    :param max_adapters: Maximum number of cached adapter objects (e.g., `ase.Atoms`).
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024**2, max_adapters: int = 16):
+        self.max_bytes = max_bytes
+        self.max_adapters = max_adapters
+        self._lock = threading.Lock()
+        self._files: "OrderedDict[Hashable, Tuple[bytes, str]]" = OrderedDict()
+        self._size = 0
+        self._adapters: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    @property
+    def size(self) -> int:
+        """Total size of the cached files"""
+        return self._size
+
+    def clear(self) -> None:
+        """Forget all conversions"""
+        with self._lock:
+            self._files.clear()
+            self._adapters.clear()
+            self._size = 0
+
+    def adapter(self, structure: Structure, adapter_format: str) -> Any:
+        """The structure converted by the `optimade` adapter, e.g., to `ase.Atoms`"""
+        key = structure_key(structure, adapter_format)
+        with self._lock:
+            if key in self._adapters:
+                self._adapters.move_to_end(key)
+                return self._adapters[key]
+
+        converted = getattr(structure, f"as_{adapter_format}")
+
+        with self._lock:
+            self._adapters[key] = converted
+            self._adapters.move_to_end(key)
+            while len(self._adapters) > self.max_adapters:
+                self._adapters.popitem(last=False)
+        return converted
+
+    def file(
+        self,
+        structure: Structure,
+        file_format: str,
+        write: Callable[[], Optional[Tuple[bytes, str]]],
+    ) -> Optional[Tuple[bytes, str]]:
+        """The structure as a file in `file_format`, calling `write()` if not cached
+
+        :param write: Returns the file content and its encoding, or `None` if the file
+            could not be written (which is not cached).
+        """
+        key = structure_key(structure, file_format)
+        with self._lock:
+            if key in self._files:
+                self._files.move_to_end(key)
+                return self._files[key]
+
+        written = write()
+        if written is None:
+            return None
+
+        content, encoding = written
+        if len(content) > self.max_bytes:
+            LOGGER.debug("Not caching %s, too large: %d bytes", key, len(content))
+            return content, encoding
+        with self._lock:
+            if key not in self._files:
+                self._files[key] = (content, encoding)
+                self._size += len(content)
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._files.popitem(last=False)
+                self._size -= len(evicted)
+        return content, encoding
+
+
+CONVERSION_CACHE = ConversionCache()
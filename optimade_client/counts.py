@@ -0,0 +1,182 @@
+"""Number of results of a filter in several databases
+
+To find out where the matches of a filter are, only the `id` of a single entry is requested
+from each database, concurrently, and the `data_returned` of the responses is reported.
+The counts are cached per database and canonical filter, and the requests are rate limited
+per host on top of the per-host concurrency limit of `optimade_client.paging`.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from optimade.models import LinksResourceAttributes
+
+from optimade_client.capabilities import split_conjunction
+from optimade_client.exceptions import OptimadeClientError
+from optimade_client.logger import LOGGER
+from optimade_client.paging import host_semaphore
+from optimade_client.utils import handle_errors, perform_optimade_query
+
+if TYPE_CHECKING:  # pragma: no cover
+    from optimade_client.executor import QueryToken
+
+
+__all__ = ("canonical_filter", "HitCounter", "HIT_COUNTER")
+
+
+def canonical_filter(optimade_filter: Optional[str]) -> str:
+    """Canonical form of a filter, for caching
+
+    Whitespace (outside strings) is normalized and the conditions of a top-level
+    conjunction are sorted, since their order does not matter.
+    """
+    if not optimade_filter:
+        return ""
+    parts = re.split(r'("(?:[^"\\]|\\.)*")', optimade_filter)
+    optimade_filter = "".join(
+        part if index % 2 else re.sub(r"\s+", " ", part)
+        for index, part in enumerate(parts)
+    ).strip()
+    conditions = split_conjunction(optimade_filter)
+    if conditions is None:
+        return optimade_filter
+    return " AND ".join(sorted(conditions))
+
+
+class _RateLimiter:  # pylint: disable=too-few-public-methods
+    """Space out the requests to each host"""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second
+        self._lock = threading.Lock()
+        self._next: Dict[str, float] = {}
+
+    def wait(self, base_url: str) -> None:
+        """Wait until the next request to the host of `base_url` is allowed"""
+        host = urlparse(str(base_url)).netloc
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next.get(host, now))
+            self._next[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class HitCounter:
+    """Count the results of filters in databases, caching the counts
+
+    :param ttl: Seconds a count is cached.
+    :param requests_per_second: Maximum rate of count requests per host.
+    """
+
+    def __init__(self, ttl: float = 600.0, requests_per_second: float = 5.0):
+        self.ttl = ttl
+        self._rate_limiter = _RateLimiter(requests_per_second)
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[str, str], Tuple[float, int]] = {}
+
+    def cached(self, base_url: str, optimade_filter: Optional[str]) -> Optional[int]:
+        """The cached count of a filter in a database (if any, and not expired)"""
+        key = (str(base_url), canonical_filter(optimade_filter))
+        with self._lock:
+            if key not in self._cache:
+                return None
+            timestamp, count = self._cache[key]
+            if time.monotonic() - timestamp > self.ttl:
+                del self._cache[key]
+                return None
+            return count
+
+    def clear(self) -> None:
+        """Forget all cached counts"""
+        with self._lock:
+            self._cache.clear()
+
+    def count(self, queries: dict, token: "QueryToken" = None) -> Tuple[int, bool]:
+        """Count the results of a query
+
+        :param queries: Keyword arguments for `perform_optimade_query()`.
+            Only `base_url` and `filter` are used.
+
+        :return: The count, and whether it was cached.
+        """
+        base_url, optimade_filter = queries["base_url"], queries.get("filter")
+        count = self.cached(base_url, optimade_filter)
+        if count is not None:
+            return count, True
+
+        with host_semaphore(base_url):
+            self._rate_limiter.wait(base_url)
+            if token is not None:
+                token.check()
+            response = perform_optimade_query(
+                base_url=base_url,
+                filter=optimade_filter,
+                response_fields="id",
+                page_limit=1,
+                token=token,
+            )
+        msg, _ = handle_errors(response)
+        if msg:
+            raise OptimadeClientError(msg)
+        count = response.get("meta", {}).get("data_returned")
+        if count is None:
+            raise OptimadeClientError(
+                f"The database does not report the number of results: {base_url}"
+            )
+
+        with self._lock:
+            self._cache[(str(base_url), canonical_filter(optimade_filter))] = (
+                time.monotonic(),
+                count,
+            )
+        return count, False
+
+    def iter_counts(
+        self,
+        databases: List[Tuple[str, LinksResourceAttributes]],
+        queries: Callable[[LinksResourceAttributes], dict],
+        token: "QueryToken" = None,
+        max_workers: int = 8,
+    ) -> Iterator[Tuple[str, Optional[int], Optional[str], bool]]:
+        """Count the results in several databases concurrently, yielding counts as they arrive
+
+        :param databases: The databases to count in as `(name, database)` pairs.
+        :param queries: Called (in a worker thread) with each database, returning the keyword
+            arguments for `perform_optimade_query()`.
+        :param token: Token of the action the counting is part of.
+
+        :return: `(name, count, error, cached)` for each database, in order of arrival.
+        """
+        if not databases:
+            return
+
+        def _count(database: LinksResourceAttributes) -> Tuple[int, bool]:
+            return self.count(queries(database), token=token)
+
+        with ThreadPoolExecutor(
+            max_workers=min(len(databases), max_workers),
+            thread_name_prefix="optimade-client-counts",
+        ) as pool:
+            futures = {
+                pool.submit(_count, database): name for name, database in databases
+            }
+            try:
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        count, cached = future.result()
+                    except OptimadeClientError as exc:
+                        LOGGER.debug("Could not count results in %s: %r", name, exc)
+                        yield name, None, str(exc), False
+                    else:
+                        yield name, count, None, cached
+            finally:
+                for future in futures:
+                    future.cancel()
+
+
+HIT_COUNTER = HitCounter()
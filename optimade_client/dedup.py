@@ -0,0 +1,225 @@
+"""Deduplication of structures across databases and pages
+
+The same material is often found in several databases.
+A fingerprint is computed for each structure entry from its reduced chemical formula, its
+lattice parameters and the sorted fractional positions of its sites, all rounded, so
+entries of the same structure get the same fingerprint.
+The fingerprints of a whole page of entries are computed at once with NumPy, and
+duplicates are found by hashing (O(n)) instead of by comparing entries pairwise.
+
+The fingerprint does not account for different choices of unit cell or origin, i.e., only
+structures reported in the same setting are recognized as duplicates.
+"""
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+__all__ = ("DuplicateGroup", "DuplicateIndex", "fingerprints")
+
+
+def _lattice(entry: dict) -> Optional[List[List[float]]]:
+    """The lattice vectors of a periodic structure entry (if usable)"""
+    attributes = entry.get("attributes", {})
+    lattice = attributes.get("lattice_vectors")
+    if (
+        not lattice
+        or not any(attributes.get("dimension_types") or [])
+        or len(lattice) != 3
+        or any(len(vector) != 3 for vector in lattice)
+        or any(value is None for vector in lattice for value in vector)
+    ):
+        return None
+    return lattice
+
+
+def _sites(entry: dict) -> Optional[Tuple[List[List[float]], List[str]]]:
+    """The positions and species of the sites of a structure entry (if usable)
+
+    Entries with a species for each site, and three known coordinates for each site, are
+    usable.
+    """
+    attributes = entry.get("attributes", {})
+    positions = attributes.get("cartesian_site_positions")
+    species = attributes.get("species_at_sites")
+    if (
+        not positions
+        or species is None
+        or len(species) != len(positions)
+        or any(
+            position is None
+            or len(position) != 3
+            or any(value is None for value in position)
+            for position in positions
+        )
+    ):
+        return None
+    return positions, species
+
+
+def fingerprints(
+    entries: List[dict], length_decimals: int = 2, position_decimals: int = 3
+) -> List[Optional[str]]:
+    """Fingerprints of structure entries (raw OPTIMADE `structures` resources)
+
+    :param length_decimals: Decimals to round lattice parameters (Å and degrees) to.
+    :param position_decimals: Decimals to round fractional positions to.
+
+    :return: A fingerprint per entry, or `None` if an entry lacks the needed properties
+        (or they are inconsistent), i.e., the entry is taken to be unique.
+    """
+    result: List[Optional[str]] = [None] * len(entries)
+
+    usable, lattices, positions, species, formulas = [], [], [], [], []
+    for index, entry in enumerate(entries):
+        attributes = entry.get("attributes", {})
+        formula = attributes.get("chemical_formula_reduced")
+        sites = _sites(entry)
+        lattice = _lattice(entry)
+        if formula is None or lattice is None or sites is None:
+            continue
+        usable.append(index)
+        lattices.append(lattice)
+        positions.append(sites[0])
+        species.append(sites[1])
+        formulas.append(formula)
+    if not usable:
+        return result
+
+    lattices = np.asarray(lattices, dtype=float)  # (n, 3, 3)
+    try:
+        inverse = np.linalg.inv(lattices)
+    except np.linalg.LinAlgError:
+        # Only drop the singular lattices
+        determinants = np.linalg.det(lattices)
+        keep = np.abs(determinants) > 1e-8
+        usable = [_ for _, ok in zip(usable, keep) if ok]
+        positions = [_ for _, ok in zip(positions, keep) if ok]
+        species = [_ for _, ok in zip(species, keep) if ok]
+        formulas = [_ for _, ok in zip(formulas, keep) if ok]
+        lattices = lattices[keep]
+        if not usable:
+            return result
+        inverse = np.linalg.inv(lattices)
+
+    # Lattice parameters: a, b, c, alpha, beta, gamma
+    lengths = np.linalg.norm(lattices, axis=2)  # (n, 3)
+    cosines = np.stack(
+        [
+            np.einsum("ij,ij->i", lattices[:, 1], lattices[:, 2]),
+            np.einsum("ij,ij->i", lattices[:, 0], lattices[:, 2]),
+            np.einsum("ij,ij->i", lattices[:, 0], lattices[:, 1]),
+        ],
+        axis=1,
+    ) / np.stack(
+        [
+            lengths[:, 1] * lengths[:, 2],
+            lengths[:, 0] * lengths[:, 2],
+            lengths[:, 0] * lengths[:, 1],
+        ],
+        axis=1,
+    )
+    angles = np.degrees(np.arccos(np.clip(cosines, -1.0, 1.0)))
+    parameters = np.round(np.hstack([lengths, angles]), length_decimals) + 0.0
+
+    # Fractional positions of all sites of all entries at once
+    counts = np.array([len(_) for _ in positions])
+    owner = np.repeat(np.arange(len(usable)), counts)
+    cartesian = np.asarray(
+        [site for sites in positions for site in sites], dtype=float
+    )  # (N, 3)
+    fractional = np.einsum("ij,ijk->ik", cartesian, inverse[owner])
+    fractional = np.round(np.mod(fractional, 1.0), position_decimals)
+    fractional = np.mod(fractional, 1.0) + 0.0  # 1.0 after rounding is 0.0
+
+    # Sort the sites of each entry by species and position
+    _, species_codes = np.unique(
+        np.asarray([name for names in species for name in names], dtype=str),
+        return_inverse=True,
+    )
+    species_codes = species_codes.reshape(-1)
+    order = np.lexsort(
+        (fractional[:, 2], fractional[:, 1], fractional[:, 0], species_codes, owner)
+    )
+    sorted_species = np.asarray(
+        [name for names in species for name in names], dtype=str
+    )[order]
+    fractional = fractional[order]
+    bounds = np.concatenate([[0], np.cumsum(counts)])
+
+    for number, index in enumerate(usable):
+        start, end = bounds[number], bounds[number + 1]
+        digest = hashlib.sha1(formulas[number].encode())
+        digest.update(parameters[number].tobytes())
+        digest.update("\0".join(sorted_species[start:end]).encode())
+        digest.update(np.ascontiguousarray(fractional[start:end]).tobytes())
+        result[index] = digest.hexdigest()
+    return result
+
+
+class DuplicateGroup:  # pylint: disable=too-few-public-methods
+    """Entries of the same structure
+
+    :param entry: The first entry found, representing the group.
+    :param source: Name of the database `entry` is from.
+    """
+
+    __slots__ = ("entry", "sources")
+
+    def __init__(self, entry: dict, source: str):
+        self.entry = entry
+        # `(source, id)` of all entries in the group
+        self.sources: List[Tuple[str, str]] = [(source, entry.get("id"))]
+
+
+class DuplicateIndex:
+    """Index of the structures found in a stream of results, collapsing duplicates"""
+
+    def __init__(self, **fingerprint_kwargs):
+        self._fingerprint_kwargs = fingerprint_kwargs
+        self._groups: Dict[str, DuplicateGroup] = {}
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    @property
+    def groups(self) -> List[DuplicateGroup]:
+        """All groups, in order of their first entry"""
+        return list(self._groups.values())
+
+    def add_entries(
+        self, entries: List[Tuple[str, dict]]
+    ) -> List[Tuple[str, dict, Optional[DuplicateGroup]]]:
+        """Add `(source, entry)` pairs, in order
+
+        :return: The entries not seen before as `(source, entry, group)`, where `group` is
+            `None` for entries that cannot be fingerprinted.
+            Entries seen before are added to the sources of their group instead.
+        """
+        new = []
+        for (source, entry), fingerprint in zip(
+            entries,
+            fingerprints([entry for _, entry in entries], **self._fingerprint_kwargs),
+        ):
+            if fingerprint is None:
+                new.append((source, entry, None))
+            elif fingerprint in self._groups:
+                self._groups[fingerprint].sources.append((source, entry.get("id")))
+            else:
+                group = DuplicateGroup(entry, source)
+                self._groups[fingerprint] = group
+                new.append((source, entry, group))
+        return new
+
+    def add_page(
+        self, source: str, entries: List[dict]
+    ) -> List[Tuple[dict, Optional[DuplicateGroup]]]:
+        """Add a page of entries from `source` (see `add_entries()`)
+
+        :return: The entries not seen before as `(entry, group)`.
+        """
+        return [
+            (entry, group)
+            for _, entry, group in self.add_entries([(source, _) for _ in entries])
+        ]
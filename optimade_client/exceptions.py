@@ -65,6 +65,10 @@ class WrongPymatgenType(AdaptersError):
     """Wrong `pymatgen` type, either `Structure` or `Molecule` was needed instead"""
 
 
+class ExportError(OptimadeClientError):
+    """Error while exporting a set of results to a file"""
+
+
 class ParserError(OptimadeClientError):
     """Error during FilterInputParser parsing"""
 
@@ -154,3 +158,10 @@ class QueryError(ImplementationError):
   Message: {msg}
   Remove target: {self.remove_target!r}"""
         )
+
+
+class QueryCancelled(Exception):
+    """The action has been superseded by a newer action and should stop
+
+    Not an `OptimadeClientError`, since this is expected and should not be logged as an error.
+    """
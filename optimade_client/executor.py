@@ -0,0 +1,258 @@
+"""Latest-wins execution of (query) actions for a widget
+
+A widget owns a `QueryExecutor` and starts each user action (search, sort, paging, ...)
+under a key.
+Starting a new action for a key cancels the in-flight action for the same key.
+Cancelled actions stop at the next check-point, which are placed before decoding network
+responses and before rendering results, so that only the latest user intent costs network
+and CPU.
+
+Actions started with `QueryExecutor.run()` are split into a `work` part (network requests
+and parsing) and a `done` part (updating the widgets).
+When running in an IPython kernel, `work` is run in a worker thread, keeping the kernel
+free to handle other widget messages (e.g., choosing another database), while `done` and
+any intermediate widget updates are marshalled back onto the kernel's event loop.
+Outside a kernel, both parts are run directly.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from optimade_client.exceptions import QueryCancelled
+from optimade_client.logger import LOGGER
+
+
+__all__ = ("kernel_loop", "QueryExecutor", "QueryToken")
+
+
+class QueryToken:
+    """Cancellation token for a single action"""
+
+    def __init__(self, key: str, generation: int):
+        self.key = key
+        self.generation = generation
+        # Event loop to marshal widget updates onto (background actions)
+        self.loop = None
+        self._cancelled = threading.Event()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(key={self.key!r}, "
+            f"generation={self.generation}, cancelled={self.cancelled})"
+        )
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the action has been superseded or cancelled"""
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Cancel the action"""
+        self._cancelled.set()
+
+    def check(self) -> None:
+        """Check-point: Raise `QueryCancelled` if the action has been cancelled"""
+        if self.cancelled:
+            raise QueryCancelled(f"Action {self.key!r} #{self.generation} is obsolete")
+
+
+def kernel_loop():
+    """The event loop of the running IPython kernel (if any)
+
+    Updates are scheduled with the tornado `IOLoop` API (`add_callback()`, `call_later()`
+    and `remove_timeout()`), as used by ipykernel.
+    For any other kind of event loop `None` is returned, i.e., actions are run directly.
+    """
+    try:
+        from IPython import get_ipython
+    except ImportError:
+        return None
+    kernel = getattr(get_ipython(), "kernel", None)
+    loop = getattr(kernel, "io_loop", None)
+    if loop is None or not all(
+        callable(getattr(loop, _, None))
+        for _ in ("add_callback", "call_later", "remove_timeout")
+    ):
+        return None
+    return loop
+
+
+class _ProgressTicker:
+    """Report the progress of a background action periodically on the event loop
+
+    The delay of each tick compared to its scheduled time is a measure of the kernel's
+    responsiveness while the action is running.
+    """
+
+    def __init__(
+        self,
+        loop,
+        token: QueryToken,
+        progress: Optional[Callable[[float], None]],
+        interval: float,
+    ):
+        self.loop = loop
+        self.token = token
+        self.progress = progress
+        self.interval = interval
+        self.lags: List[float] = []
+        self._start = time.monotonic()
+        self._scheduled = None
+        self._handle = None
+
+    def start(self) -> None:
+        """Schedule the first tick"""
+        self._scheduled = time.monotonic() + self.interval
+        self._handle = self.loop.call_later(self.interval, self._tick)
+
+    def _tick(self) -> None:
+        now = time.monotonic()
+        self.lags.append(max(now - self._scheduled, 0.0))
+        if self.token.cancelled:
+            return
+        if self.progress is not None:
+            self.progress(now - self._start)
+        self.start()
+
+    def stop(self) -> dict:
+        """Stop ticking and return the measured responsiveness"""
+        if self._handle is not None:
+            self.loop.remove_timeout(self._handle)
+        return {
+            "seconds": time.monotonic() - self._start,
+            "ticks": len(self.lags),
+            "max_lag": max(self.lags, default=0.0),
+            "mean_lag": sum(self.lags) / len(self.lags) if self.lags else 0.0,
+        }
+
+
+class QueryExecutor:
+    """Keep track of the latest action per key, cancelling obsolete ones
+
+    :param background: Whether to run the `work` of actions started with `run()` in a
+        worker thread when running in an IPython kernel.
+    """
+
+    PROGRESS_INTERVAL = 0.25  # seconds
+
+    def __init__(self, background: bool = True, max_workers: int = 2):
+        self.background = background
+        self.responsiveness: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._current: Dict[str, QueryToken] = {}
+        self._max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def start(self, key: str) -> QueryToken:
+        """Start a new action for `key`, cancelling the in-flight one (if any)"""
+        with self._lock:
+            self._generation += 1
+            token = QueryToken(key, self._generation)
+            previous = self._current.get(key)
+            self._current[key] = token
+
+        if previous is not None:
+            LOGGER.debug("Cancelling obsolete action: %r", previous)
+            previous.cancel()
+        return token
+
+    def is_current(self, token: QueryToken) -> bool:
+        """Whether `token` belongs to the latest action for its key"""
+        with self._lock:
+            return self._current.get(token.key) is token and not token.cancelled
+
+    def finish(self, token: QueryToken) -> bool:
+        """Mark the action as done
+
+        :return: Whether the action was the latest action for its key, i.e., whether it
+            is allowed to update the widget.
+        """
+        with self._lock:
+            is_current = self._current.get(token.key) is token
+            if is_current:
+                del self._current[token.key]
+        return is_current and not token.cancelled
+
+    def cancel(self, key: str = None) -> None:
+        """Cancel the in-flight action for `key`, or all in-flight actions"""
+        with self._lock:
+            if key is None:
+                tokens = list(self._current.values())
+                self._current.clear()
+            else:
+                tokens = [self._current.pop(key)] if key in self._current else []
+
+        for token in tokens:
+            LOGGER.debug("Cancelling action: %r", token)
+            token.cancel()
+
+    def run(
+        self,
+        key: str,
+        work: Callable[[QueryToken], Any],
+        done: Callable[[QueryToken, Any, Optional[BaseException]], None],
+        progress: Callable[[float], None] = None,
+    ) -> QueryToken:
+        """Start a new action for `key`, running `work` in the background if possible
+
+        :param work: Called with the action's token. Must not update widgets directly,
+            but through `call_soon()`.
+        :param done: Called on the kernel's event loop with the action's token, the result
+            of `work`, and the exception raised by `work` (if any).
+            It is responsible for calling `finish()`.
+        :param progress: Called periodically on the kernel's event loop with the number of
+            seconds elapsed, while `work` is running in the background.
+        """
+        token = self.start(key)
+        loop = kernel_loop() if self.background else None
+
+        if loop is None:
+            result, exception = None, None
+            try:
+                result = work(token)
+            except Exception as exc:  # pylint: disable=broad-except
+                exception = exc
+            done(token, result, exception)
+            return token
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="optimade-client"
+            )
+        token.loop = loop
+        ticker = _ProgressTicker(loop, token, progress, self.PROGRESS_INTERVAL)
+
+        def _done(future: Future) -> None:
+            responsiveness = ticker.stop()
+            self.responsiveness[key] = responsiveness
+            LOGGER.debug(
+                "Kernel responsiveness during %r: max lag %.3f s, mean lag %.3f s (%d ticks)",
+                token,
+                responsiveness["max_lag"],
+                responsiveness["mean_lag"],
+                responsiveness["ticks"],
+            )
+            exception = future.exception()
+            done(token, None if exception else future.result(), exception)
+
+        future = self._pool.submit(work, token)
+        ticker.start()
+        future.add_done_callback(lambda future: loop.add_callback(_done, future))
+        return token
+
+    def call_soon(self, token: QueryToken, func: Callable, *args: Any) -> None:
+        """Call `func(*args)` on the kernel's event loop, if `token` is still current
+
+        Used by the `work` of an action to update widgets with intermediate results.
+        """
+
+        def _call() -> None:
+            if self.is_current(token):
+                func(*args)
+
+        if token is None or token.loop is None:
+            func(*args)
+        else:
+            token.loop.add_callback(_call)
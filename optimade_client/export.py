@@ -0,0 +1,385 @@
+"""Stream a complete set of query results to a file on disk
+
+All pages of a query are retrieved one at a time, following the `next` links of the
+responses, and each page is written to the target file before the next page is requested.
+This keeps the memory footprint constant, no matter the number of results.
+
+The progress is stored next to the target file every `CHECKPOINT_PAGES` pages, when the
+export finishes, and when it is interrupted, making it possible to resume an interrupted
+export from the last completely written page.
+"""
+from enum import Enum
+import hashlib
+import io
+import json
+from json import JSONDecodeError
+import os
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+import warnings
+import zipfile
+
+import appdirs
+
+try:
+    from ase import Atoms as aseAtoms
+except ImportError:
+    aseAtoms = None
+
+from optimade.adapters import Structure
+
+from optimade_client.exceptions import ExportError, QueryError
+from optimade_client.executor import QueryToken
+from optimade_client.logger import LOGGER
+from optimade_client.utils import (
+    check_species_mass,
+    handle_errors,
+    perform_optimade_query,
+    perform_optimade_link_query,
+)
+
+
+__all__ = ("EXPORT_DIR", "ExportFormat", "export_query_results", "query_digest")
+
+
+EXPORT_DIR = Path(appdirs.user_data_dir("optimade-client", "CasperWA")) / "exports"
+
+# Number of pages written between storing the progress of an export
+CHECKPOINT_PAGES = 10
+
+
+class ExportFormat(Enum):
+    """Supported formats for exporting complete sets of results
+
+    The value is the file extension of the exported file.
+    """
+
+    JSONL = ".jsonl"
+    EXTXYZ = ".extxyz"
+    CIF_ZIP = ".cif.zip"
+    POSCAR_ZIP = ".poscar.zip"
+
+    @property
+    def description(self) -> str:
+        """Human-readable description of the format"""
+        return {
+            "JSONL": "JSON Lines, raw OPTIMADE entries (.jsonl)",
+            "EXTXYZ": "Extended XYZ [via ASE] (.extxyz)",
+            "CIF_ZIP": "Zip archive of CIF files [via ASE] (.cif.zip)",
+            "POSCAR_ZIP": "Zip archive of VASP POSCAR files [via ASE] (.poscar.zip)",
+        }[self.name]
+
+    @property
+    def requires_ase(self) -> bool:
+        """Whether the format is converted through ASE"""
+        return self != ExportFormat.JSONL
+
+    @classmethod
+    def available(cls) -> list:
+        """Formats available according to installed packages"""
+        return [_ for _ in cls if aseAtoms is not None or not _.requires_ase]
+
+
+def query_digest(query: dict) -> str:
+    """Short digest of a query, used to name its export file"""
+    return hashlib.sha1(
+        json.dumps(query, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:10]
+
+
+def _state_file(target: Path) -> Path:
+    """Path to the file keeping track of the export progress"""
+    return target.with_name(f"{target.name}.export-state.json")
+
+
+def _load_state(target: Path, query: dict, export_format: ExportFormat) -> dict:
+    """Load the progress of a previous (interrupted) export of the same query"""
+    state_file = _state_file(target)
+    if not state_file.exists() or not target.exists():
+        return {}
+
+    try:
+        with open(state_file, "r") as handle:
+            state = json.load(handle)
+    except (JSONDecodeError, OSError):
+        LOGGER.debug("Could not read export state file %s. Starting over.", state_file)
+        return {}
+
+    if state.get("query") != query or state.get("format") != export_format.name:
+        LOGGER.debug(
+            "Export state for %s does not match the current query/format. Starting over.",
+            target,
+        )
+        return {}
+
+    if state.get("bytes", 0) > target.stat().st_size:
+        LOGGER.debug(
+            "Exported file %s is smaller than expected. Starting over.", target
+        )
+        return {}
+
+    return state
+
+
+def _save_state(target: Path, state: dict) -> None:
+    """Store the progress of the export atomically"""
+    state_file = _state_file(target)
+    temporary_file = state_file.with_name(f"{state_file.name}.tmp")
+    with open(temporary_file, "w") as handle:
+        json.dump(state, handle)
+    os.replace(temporary_file, state_file)
+
+
+def _next_link(response: dict, query: dict, retrieved: int) -> Optional[str]:
+    """Determine the link to the next page of results
+
+    Use the `next` link if it is provided, otherwise fall back to offset-pagination
+    for implementations not providing pagination links.
+    """
+    next_link = response.get("links", {}).get("next")
+    if isinstance(next_link, dict):
+        next_link = next_link.get("href")
+    if next_link:
+        return next_link
+
+    data_returned = response.get("meta", {}).get("data_returned")
+    if not response.get("data") or data_returned is None or retrieved >= data_returned:
+        return None
+
+    self_link = response.get("links", {}).get("self") or response.get("meta", {}).get(
+        "query", {}
+    ).get("representation")
+    if isinstance(self_link, dict):
+        self_link = self_link.get("href")
+    if not self_link or "://" not in self_link:
+        return None
+
+    parsed_url = urlparse(self_link)
+    queries = parse_qs(parsed_url.query)
+    queries["page_offset"] = [str(retrieved)]
+    queries.setdefault(
+        "page_limit", [str(query.get("page_limit", len(response["data"])))]
+    )
+    return urlunparse(parsed_url._replace(query=urlencode(queries, doseq=True)))
+
+
+def _iterate_pages(
+    query: dict,
+    next_link: Optional[str] = None,
+    retrieved: int = 0,
+    token: QueryToken = None,
+) -> Iterator[Tuple[dict, Optional[str]]]:
+    """Yield each page of results together with the link to the following page"""
+    while True:
+        if next_link is None:
+            response = perform_optimade_query(**query, token=token)
+        else:
+            response = perform_optimade_link_query(next_link, token=token)
+
+        msg, _ = handle_errors(response)
+        if msg:
+            raise QueryError(msg)
+
+        retrieved += len(response.get("data", []))
+        next_link = _next_link(response, query, retrieved)
+        yield response, next_link
+
+        if next_link is None or not response.get("data"):
+            break
+
+
+def _as_ase(entry: dict) -> "aseAtoms":
+    """Convert a raw OPTIMADE structure entry to an ASE Atoms object"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        structure = Structure(check_species_mass(entry))
+        return structure.convert("ase")
+
+
+class _StreamWriter:
+    """Append entries as lines of text to a single file"""
+
+    def __init__(self, target: Path, export_format: ExportFormat, offset: int):
+        self.export_format = export_format
+        self._handle = open(target, "r+b" if offset else "wb")
+        self._handle.truncate(offset)
+        self._handle.seek(offset)
+
+    def write(self, entry: dict) -> None:
+        """Write a single entry"""
+        if self.export_format == ExportFormat.JSONL:
+            text = f"{json.dumps(entry)}\n"
+        else:
+            buffer = io.StringIO()
+            _as_ase(entry).write(buffer, format="extxyz")
+            text = buffer.getvalue()
+        self._handle.write(text.encode("utf-8"))
+
+    def flush(self) -> int:
+        """Flush all written entries to the file and return the file size"""
+        self._handle.flush()
+        return self._handle.tell()
+
+    def close(self) -> None:
+        """Write all entries to disk and close the file"""
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.close()
+
+
+class _ZipWriter:
+    """Add each entry as a separate file to a zip archive"""
+
+    def __init__(self, target: Path, export_format: ExportFormat, offset: int):
+        self.export_format = export_format
+        self._target = target
+        if offset:
+            # Remove any partially written page by restoring the archive to its state after
+            # the last completely written page, where the central directory was finalized.
+            with open(target, "r+b") as handle:
+                handle.truncate(offset)
+        self._archive = zipfile.ZipFile(
+            target, mode="a" if offset else "w", compression=zipfile.ZIP_DEFLATED
+        )
+
+    def write(self, entry: dict) -> None:
+        """Write a single entry"""
+        atoms = _as_ase(entry)
+        if self.export_format == ExportFormat.CIF_ZIP:
+            buffer = io.BytesIO()
+            atoms.write(buffer, format="cif")
+            data, extension = buffer.getvalue(), ".cif"
+        else:
+            buffer = io.StringIO()
+            atoms.write(buffer, format="vasp")
+            data, extension = buffer.getvalue(), ".poscar"
+        filename = "".join(c if c.isalnum() or c in "-_." else "_" for c in entry["id"])
+        self._archive.writestr(f"{filename}{extension}", data)
+
+    def flush(self) -> int:
+        """Finalize the archive for all written entries and return the file size"""
+        self._archive.close()
+        size = self._target.stat().st_size
+        self._archive = zipfile.ZipFile(
+            self._target, mode="a", compression=zipfile.ZIP_DEFLATED
+        )
+        return size
+
+    def close(self) -> None:
+        """Close the archive"""
+        self._archive.close()
+
+
+def export_query_results(
+    query: dict,
+    target: Union[str, Path],
+    export_format: Union[ExportFormat, str] = ExportFormat.JSONL,
+    progress: Callable[[int, Optional[int]], None] = None,
+    token: QueryToken = None,
+) -> Path:
+    """Stream all results of a query to `target`, resuming a previous export if possible
+
+    :param query: Keyword arguments for `perform_optimade_query()` retrieving the first page.
+    :param target: File to write to. Relative paths are relative to `EXPORT_DIR`.
+    :param export_format: The format of the exported file.
+    :param progress: Called after each page with the number of handled entries and the
+        total number of entries (if known).
+    :param token: Cancellation token. A cancelled export stops before requesting the next
+        page, and can be resumed later.
+
+    :return: The path to the exported file.
+    """
+    if isinstance(export_format, str):
+        export_format = ExportFormat[export_format.upper()]
+    if export_format not in ExportFormat.available():
+        raise ExportError(
+            f"Cannot export to {export_format.description}, since ASE is not installed."
+        )
+
+    target = Path(target)
+    if not target.is_absolute():
+        target = EXPORT_DIR / target
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    state = _load_state(target, query, export_format)
+    if state.get("done", False):
+        LOGGER.debug("Export to %s has already been completed.", target)
+        if progress is not None:
+            progress(state["handled"], state["total"])
+        return target
+    if state:
+        LOGGER.info(
+            "Resuming export to %s after %d entries.", target.name, state["handled"]
+        )
+    else:
+        state = {
+            "query": query,
+            "format": export_format.name,
+            "next": None,
+            "handled": 0,
+            "skipped": 0,
+            "total": None,
+            "bytes": 0,
+            "done": False,
+        }
+
+    writer_cls = (
+        _ZipWriter
+        if export_format in (ExportFormat.CIF_ZIP, ExportFormat.POSCAR_ZIP)
+        else _StreamWriter
+    )
+    writer = writer_cls(target, export_format, state["bytes"])
+    unsaved_pages = 0
+    page_written = True
+    try:
+        for response, next_link in _iterate_pages(
+            query, next_link=state["next"], retrieved=state["handled"], token=token
+        ):
+            page_written = False
+            for entry in response.get("data", []):
+                try:
+                    writer.write(entry)
+                except OSError:
+                    raise
+                except Exception as exc:  # pylint: disable=broad-except
+                    LOGGER.warning(
+                        "Could not export entry %r: %r", entry.get("id", "N/A"), exc
+                    )
+                    state["skipped"] += 1
+            state["handled"] += len(response.get("data", []))
+            if state["total"] is None:
+                state["total"] = response.get("meta", {}).get("data_returned")
+            state["next"] = next_link
+            state["done"] = next_link is None
+            page_written = True
+            unsaved_pages += 1
+            if state["done"] or unsaved_pages >= CHECKPOINT_PAGES:
+                state["bytes"] = writer.flush()
+                _save_state(target, state)
+                unsaved_pages = 0
+
+            LOGGER.debug(
+                "Exported %d/%s entries to %s.",
+                state["handled"],
+                state["total"],
+                target,
+            )
+            if progress is not None:
+                progress(state["handled"], state["total"])
+    except Exception:
+        if unsaved_pages and page_written:
+            # Interrupted between pages, keep the pages written since the last checkpoint
+            state["bytes"] = writer.flush()
+            _save_state(target, state)
+        raise
+    finally:
+        writer.close()
+
+    if state["skipped"]:
+        LOGGER.warning(
+            "%d entries could not be converted and were not exported to %s.",
+            state["skipped"],
+            target.name,
+        )
+    return target
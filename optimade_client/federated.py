@@ -0,0 +1,222 @@
+"""Federated search: the same query over several databases at once
+
+The query is sent concurrently to all databases, within the per-host concurrency limit of
+`optimade_client.paging`, and the responses are handed over in the order they arrive,
+so results from fast databases can be shown while slow databases are still responding.
+
+When the databases have sorted the results, `merge_sorted_entries()` merges the sorted
+pages of all databases into a single, globally sorted stream (a k-way heap merge),
+retrieving further pages from a database only once its current page has been consumed.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import heapq
+import math
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Tuple
+
+from optimade.models import LinksResourceAttributes
+
+from optimade_client.exceptions import OptimadeClientError
+from optimade_client.logger import LOGGER
+from optimade_client.paging import host_semaphore, iter_pages
+from optimade_client.utils import handle_errors, perform_optimade_query
+
+if TYPE_CHECKING:  # pragma: no cover
+    from optimade_client.executor import QueryToken
+
+
+__all__ = (
+    "iter_federated_search",
+    "federated_search",
+    "merge_sorted_entries",
+    "sort_key",
+)
+
+
+def _search_database(
+    database: LinksResourceAttributes,
+    queries: Callable[[LinksResourceAttributes], dict],
+    token: "QueryToken" = None,
+) -> dict:
+    """Query a single database, turning client errors into an error response"""
+    with host_semaphore(database.base_url):
+        if token is not None:
+            token.check()
+        try:
+            return perform_optimade_query(**queries(database), token=token)
+        except OptimadeClientError as exc:
+            return {"errors": [{"detail": f"CLIENT: {exc}"}]}
+
+
+def iter_federated_search(
+    databases: List[Tuple[str, LinksResourceAttributes]],
+    queries: Callable[[LinksResourceAttributes], dict],
+    token: "QueryToken" = None,
+    max_workers: int = 8,
+) -> Iterator[Tuple[str, LinksResourceAttributes, dict]]:
+    """Query several databases concurrently, yielding responses as they arrive
+
+    :param databases: The databases to query as `(name, database)` pairs.
+    :param queries: Called (in a worker thread) with each database, returning the keyword
+        arguments for `perform_optimade_query()`. It may perform requests itself, e.g., to
+        adapt the filter to the database's API version.
+    :param token: Token of the action the search is part of.
+        Pending database queries are dropped if the action is cancelled.
+
+    :return: `(name, database, response)` for each database, in order of arrival.
+    """
+    if not databases:
+        return
+
+    with ThreadPoolExecutor(
+        max_workers=min(len(databases), max_workers),
+        thread_name_prefix="optimade-client-federated",
+    ) as pool:
+        futures = {
+            pool.submit(_search_database, database, queries, token): (name, database)
+            for name, database in databases
+        }
+        try:
+            for future in as_completed(futures):
+                name, database = futures[future]
+                response = future.result()
+                LOGGER.debug(
+                    "Federated search: response from %s (%s) with %d entries.",
+                    name,
+                    database.base_url,
+                    len(response.get("data", [])),
+                )
+                yield name, database, response
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def federated_search(
+    databases: List[Tuple[str, LinksResourceAttributes]],
+    queries: Callable[[LinksResourceAttributes], dict],
+    token: "QueryToken" = None,
+    max_workers: int = 8,
+) -> Dict[str, dict]:
+    """Query several databases concurrently
+
+    See `iter_federated_search()` for the parameters.
+
+    :return: The response of each database by name.
+    """
+    return {
+        name: response
+        for name, _, response in iter_federated_search(
+            databases, queries, token=token, max_workers=max_workers
+        )
+    }
+
+
+def sort_key(sort: str) -> Callable[[Tuple[str, dict]], Tuple[bool, Any]]:
+    """Key of `(name, entry)` pairs for the sort field, placing entries without value last"""
+    field = sort.lstrip("-")
+    descending = sort.startswith("-")
+
+    def _key(item: Tuple[str, dict]) -> Tuple[bool, Any]:
+        _, entry = item
+        value = (
+            entry.get("id") if field == "id" else entry.get("attributes", {}).get(field)
+        )
+        # With reverse=True, heapq.merge() yields the largest keys first
+        missing = value is None if not descending else value is not None
+        return missing, value if value is not None else 0
+
+    return _key
+
+
+def _iter_source_entries(
+    name: str,
+    queries: dict,
+    first_response: dict,
+    page_limit: int,
+    token: "QueryToken" = None,
+    pages: Dict[str, int] = None,
+    errors: Dict[str, str] = None,
+) -> Iterator[Tuple[str, dict]]:
+    """Entries of a single database, retrieving the next page once a page is consumed
+
+    A page may hold fewer than `page_limit` entries, since servers may cap the page size.
+    Further pages are then requested with the served page size, keeping the offset a
+    multiple of the page limit, so databases only supporting `page_number` are paged
+    correctly as well.
+    The entries are exhausted once `data_returned` entries have been retrieved, or, if this
+    is unknown, once a page has neither a `next` link nor more data available.
+    """
+    response = first_response
+    offset = 0
+    if pages is not None:
+        pages[name] = 1
+    while True:
+        msg, _ = handle_errors(response)
+        if msg:
+            if errors is not None:
+                errors[name] = msg
+            return
+        data = response.get("data", [])
+        for entry in data:
+            yield name, entry
+
+        offset += len(data)
+        meta = response.get("meta", {})
+        data_returned = meta.get("data_returned")
+        if not data:
+            return
+        if data_returned is not None:
+            if offset >= data_returned:
+                return
+        elif not (response.get("links") or {}).get("next") and not meta.get(
+            "more_data_available"
+        ):
+            return
+
+        # Continue with pages of the served size, aligned with the offset
+        page_limit = math.gcd(offset, min(page_limit, len(data)))
+        response = next(iter_pages(queries, offset, 1, page_limit, token=token))
+        if pages is not None:
+            pages[name] += 1
+
+
+def merge_sorted_entries(
+    sources: Dict[str, Tuple[dict, dict]],
+    sort: str,
+    page_limit: int,
+    token: "QueryToken" = None,
+    pages: Dict[str, int] = None,
+    errors: Dict[str, str] = None,
+) -> Iterator[Tuple[str, dict]]:
+    """Merge the sorted results of several databases into one globally sorted stream
+
+    Only the first page of each database is needed to start the merge. Further pages are
+    retrieved (one at a time) only when the stream is consumed beyond the current page of
+    a database, so taking the first N entries retrieves as few pages as possible.
+
+    :param sources: The `perform_optimade_query()` keyword arguments and the response of
+        the first page for each database by name.
+    :param sort: The sort the databases have applied, e.g., `"nsites"` or `"-nelements"`.
+    :param page_limit: Number of entries per page.
+    :param token: Token of the action the merge is part of.
+    :param pages: Updated with the number of pages retrieved per database.
+    :param errors: Updated with the error message for databases whose pages errored.
+
+    :return: `(name, entry)` pairs in global sort order.
+    """
+    return heapq.merge(
+        *[
+            _iter_source_entries(
+                name,
+                queries,
+                response,
+                page_limit,
+                token=token,
+                pages=pages,
+                errors=errors,
+            )
+            for name, (queries, response) in sources.items()
+        ],
+        key=sort_key(sort),
+        reverse=sort.startswith("-"),
+    )
@@ -0,0 +1,309 @@
+"""Health of OPTIMADE providers
+
+The versioned `/info` endpoint of each provider is probed periodically, keeping an
+exponentially weighted moving average (EWMA) of the latency and of the error rate.
+Providers that are failing or too slow are disabled in the provider dropdown, instead of
+costing users a timeout, and are enabled again once they recover.
+
+The health data is stored in `CACHE_DIR`, so it is shared between sessions, and between
+the in-kernel monitor and the `optimade-client-health` command.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import json
+from json import JSONDecodeError
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from optimade.models import LinksResource
+from optimade.models.links import LinkType
+import requests
+
+from optimade_client.default_parameters import SKIP_PROVIDERS
+from optimade_client.logger import LOGGER
+from optimade_client.utils import (
+    CACHE_DIR,
+    TIMEOUT_SECONDS,
+    fetch_providers,
+    get_versioned_base_url,
+)
+
+
+__all__ = ("HealthMonitor", "HEALTH_MONITOR", "ProviderHealth")
+
+
+class ProviderHealth:  # pylint: disable=too-few-public-methods
+    """Health of a single provider"""
+
+    __slots__ = ("name", "base_url", "latency", "error_rate", "checks", "last_checked")
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str = None,
+        latency: float = None,
+        error_rate: float = None,
+        checks: int = 0,
+        last_checked: float = None,
+    ):
+        self.name = name
+        self.base_url = base_url  # Versioned base URL
+        self.latency = latency  # Seconds, EWMA of successful probes
+        self.error_rate = error_rate  # EWMA of failed (1) and successful (0) probes
+        self.checks = checks
+        self.last_checked = last_checked  # Seconds since the epoch
+
+    def as_dict(self) -> dict:
+        """Serializable representation"""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+class HealthMonitor:
+    """Probe providers periodically and keep track of their health
+
+    :param path: JSON file to store the health data in.
+    :param interval: Seconds between the rounds of probes when running in the background.
+    :param max_error_rate: Providers with a higher error rate are unhealthy.
+    :param max_latency: Providers with a higher latency (in seconds) are unhealthy.
+    """
+
+    SMOOTHING = 0.3
+
+    def __init__(
+        self,
+        path: os.PathLike = CACHE_DIR / "provider_health.json",
+        interval: float = 900.0,
+        max_error_rate: float = 0.5,
+        max_latency: float = TIMEOUT_SECONDS / 2,
+    ):
+        self.path = path
+        self.interval = interval
+        self.max_error_rate = max_error_rate
+        self.max_latency = max_latency
+        self._lock = threading.Lock()
+        self._health: Dict[str, ProviderHealth] = {}
+        self._callbacks: List[Callable[[List[str]], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.load()
+
+    def load(self) -> None:
+        """Load the stored health data"""
+        try:
+            with open(self.path, "r") as handle:
+                data = json.load(handle)
+        except (OSError, JSONDecodeError):
+            return
+        with self._lock:
+            self._health = {
+                provider_id: ProviderHealth(**health)
+                for provider_id, health in data.items()
+            }
+
+    def save(self) -> None:
+        """Store the health data (atomically, as other processes may be reading it)"""
+        with self._lock:
+            data = {
+                provider_id: health.as_dict()
+                for provider_id, health in self._health.items()
+            }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as handle:
+            json.dump(data, handle, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def health(self, provider_id: str) -> Optional[ProviderHealth]:
+        """The health of a provider (if it has been probed)"""
+        with self._lock:
+            return self._health.get(provider_id)
+
+    def snapshot(self) -> Dict[str, ProviderHealth]:
+        """The health of all probed providers by ID"""
+        with self._lock:
+            return dict(self._health)
+
+    def is_healthy(self, provider_id: str) -> bool:
+        """Whether the provider is healthy (providers that have not been probed are)"""
+        health = self.health(provider_id)
+        if health is None or not health.checks:
+            return True
+        if health.error_rate is not None and health.error_rate > self.max_error_rate:
+            return False
+        return health.latency is None or health.latency <= self.max_latency
+
+    def unhealthy(self) -> List[str]:
+        """IDs of the unhealthy providers"""
+        with self._lock:
+            provider_ids = list(self._health)
+        return sorted(_ for _ in provider_ids if not self.is_healthy(_))
+
+    def record(
+        self, provider_id: str, name: str, ok: bool, seconds: float = None
+    ) -> None:
+        """Update the health of a provider with the outcome of a probe"""
+        with self._lock:
+            health = self._health.setdefault(provider_id, ProviderHealth(name))
+            health.name = name
+            error = 0.0 if ok else 1.0
+            health.error_rate = (
+                error
+                if health.error_rate is None
+                else self.SMOOTHING * error + (1 - self.SMOOTHING) * health.error_rate
+            )
+            if ok and seconds is not None:
+                health.latency = (
+                    seconds
+                    if health.latency is None
+                    else self.SMOOTHING * seconds
+                    + (1 - self.SMOOTHING) * health.latency
+                )
+            health.checks += 1
+            health.last_checked = time.time()
+
+    def probe(self, provider: LinksResource) -> bool:
+        """Probe the versioned `/info` endpoint of a provider
+
+        :return: Whether the probe succeeded.
+        """
+        attributes = provider.attributes
+        health = self.health(provider.id)
+        base_url = health.base_url if health is not None else None
+        if not base_url:
+            base_url = get_versioned_base_url(attributes.base_url)
+            if base_url:
+                with self._lock:
+                    self._health.setdefault(
+                        provider.id, ProviderHealth(attributes.name)
+                    ).base_url = base_url
+
+        ok, seconds = False, None
+        if base_url:
+            # Bypass the request cache, measuring the provider, not the cache
+            start = time.monotonic()
+            try:
+                response = requests.get(f"{base_url}/info", timeout=TIMEOUT_SECONDS)
+                ok = response.status_code == 200 and "meta" in response.json()
+            except (requests.exceptions.RequestException, ValueError) as exc:
+                LOGGER.debug("Health probe of %s failed: %r", base_url, exc)
+            seconds = time.monotonic() - start
+
+        self.record(provider.id, attributes.name, ok, seconds)
+        LOGGER.debug(
+            "Health probe of %s (%s): ok=%s, seconds=%s",
+            provider.id,
+            base_url,
+            ok,
+            seconds,
+        )
+        return ok
+
+    @staticmethod
+    def providers() -> List[LinksResource]:
+        """The providers to probe"""
+        providers = []
+        for entry in fetch_providers():
+            provider = LinksResource(**entry)
+            if (
+                provider.id not in SKIP_PROVIDERS
+                and provider.attributes.link_type == LinkType.EXTERNAL
+                and provider.attributes.base_url is not None
+            ):
+                providers.append(provider)
+        return providers
+
+    def check(
+        self, providers: List[LinksResource] = None, max_workers: int = 8
+    ) -> List[str]:
+        """Probe all providers concurrently, store the results and notify subscribers
+
+        :return: IDs of the unhealthy providers.
+        """
+        providers = providers if providers is not None else self.providers()
+        if providers:
+            with ThreadPoolExecutor(
+                max_workers=min(len(providers), max_workers),
+                thread_name_prefix="optimade-client-health",
+            ) as pool:
+                list(pool.map(self.probe, providers))
+            try:
+                self.save()
+            except OSError as exc:
+                LOGGER.warning("Could not store provider health: %r", exc)
+
+        unhealthy = self.unhealthy()
+        LOGGER.debug("Unhealthy providers: %s", unhealthy)
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback(unhealthy)
+            except Exception as exc:  # pylint: disable=broad-except
+                LOGGER.error("Provider health callback %r failed: %r", callback, exc)
+        return unhealthy
+
+    def on_update(
+        self, callback: Callable[[List[str]], None], remove: bool = False
+    ) -> int:
+        """(Un)Register a callback, called (in the monitor's thread) after each round
+
+        :return: The number of registered callbacks.
+        """
+        with self._lock:
+            if remove:
+                self._callbacks.remove(callback)
+            elif callback not in self._callbacks:
+                self._callbacks.append(callback)
+            return len(self._callbacks)
+
+    def subscribe(self, callback: Callable[[List[str]], None]) -> None:
+        """Register a callback and probe in the background while there are subscribers"""
+        self.on_update(callback)
+        self.start()
+
+    def unsubscribe(self, callback: Callable[[List[str]], None]) -> None:
+        """Unregister a callback, stopping to probe once the last subscriber is gone"""
+        if not self.on_update(callback, remove=True):
+            LOGGER.debug("No more provider health subscribers, stopping the monitor.")
+            self.stop()
+
+    @property
+    def running(self) -> bool:
+        """Whether the monitor is probing in the background"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start probing in the background (if not already)"""
+        if self.running and not self._stop.is_set():
+            return
+        # A stopping thread keeps its own event, so it cannot be revived by this one
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(self._stop,),
+            name="optimade-client-health-monitor",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop probing in the background"""
+        self._stop.set()
+
+    def _run(self, stop: threading.Event) -> None:
+        # Stored health data that is recent enough need not be renewed straight away
+        with self._lock:
+            last_checked = max(
+                (_.last_checked or 0.0 for _ in self._health.values()), default=0.0
+            )
+        if stop.wait(max(last_checked + self.interval - time.time(), 0.0)):
+            return
+        while not stop.is_set():
+            try:
+                self.check()
+            except Exception as exc:  # pylint: disable=broad-except
+                LOGGER.error("Provider health check failed: %r", exc)
+            stop.wait(self.interval)
+
+
+HEALTH_MONITOR = HealthMonitor()
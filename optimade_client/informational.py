@@ -1,3 +1,4 @@
+import html
 import logging
 import os
 from pathlib import Path
@@ -23,7 +24,8 @@ class HeaderDescription(ipw.VBox):
     HTML-encoded or not.
     The bug report button utilizes the special REPORT_LOGGER, which stays below a certain maximum
     number of bytes-length (of logs), in order to not surpass the allowed URL length for GitHub and
-    get an errornous 414 response.
+    get an errornous 414 response. The log dump is only built when the button is clicked, after
+    which a plain link opens the issue (a new tab opened from a kernel callback may be blocked).
     After some testing I am estimating the limit to be at 8 kB.
     The suggestion report button utilizes instead the HTML Form element to "submit" the GitHub issue
     template. While an actual markdown template could be used, it seems GitHub is coercing its users
@@ -69,6 +71,11 @@ Follow <a href="{SOURCE_URL}issues/12" target="_blank">the issue on GitHub</a> t
         ),
     }
 
+    _report_link_format = (
+        '<a href="{href}" target="_blank" title="Open the bug report on GitHub">'
+        '<i class="fa fa-external-link"></i> Open bug report</a>'
+    )
+
     def __init__(
         self, logo: str = None, button_style: Union[ButtonStyle, str] = None, **kwargs
     ):
@@ -91,24 +98,19 @@ Follow <a href="{SOURCE_URL}issues/12" target="_blank">the issue on GitHub</a> t
 
         header = ipw.HTML(self.HEADER)
 
-        # Hidden input HTML element, storing the log
+        # The log is added to the bug report on click
         self._debug_log = REPORT_HANDLER.get_widget()
-        self.report_bug = ipw.HTML(
-            f"""
-<button type="button" class="p-Widget jupyter-widgets jupyter-button widget-button mod-{button_style.value}"
-title="Create a bug issue on GitHub that includes a log file" style="width:auto;"
-onclick="
-var log = document.getElementById('{self._debug_log.element_id}');
-
-var link = document.createElement('a');
-link.target = '_blank';
-link.href = '{SOURCE_URL}issues/new?{urlencode(self.BUG_TEMPLATE, encoding="utf-8")}' + log.getAttribute('value');
-
-document.body.appendChild(link);
-link.click();
-document.body.removeChild(link);">
-<i class="fa fa-bug"></i>Report a bug</button>"""
+        self.report_bug = ipw.Button(
+            description="Report a bug",
+            icon="bug",
+            tooltip="Create a bug issue on GitHub that includes a log file",
+            button_style=""
+            if button_style == ButtonStyle.DEFAULT
+            else button_style.value,
+            layout={"width": "auto"},
         )
+        self.report_bug.on_click(self._report_bug)
+        self.report_bug_link = ipw.HTML()
         self.report_suggestion = ipw.HTML(
             f"""
 <form target="_blank" style="width:auto;height:auto;" action="{SOURCE_URL}issues/new">
@@ -125,6 +127,7 @@ title="Create an enhancement issue on GitHub" style="width:auto;">
                     "<b>Help improve the application:</b></p>"
                 ),
                 self.report_bug,
+                self.report_bug_link,
                 self.report_suggestion,
             ),
         )
@@ -137,6 +140,16 @@ title="Create an enhancement issue on GitHub" style="width:auto;">
             **kwargs,
         )
 
+    def _report_bug(self, _: ipw.Button) -> None:
+        """Offer a link to a new bug issue on GitHub, including the latest log messages"""
+        url = (
+            f"{SOURCE_URL}issues/new?{urlencode(self.BUG_TEMPLATE, encoding='utf-8')}"
+            f"{self._debug_log.report()}"
+        )
+        self.report_bug_link.value = self._report_link_format.format(
+            href=html.escape(url)
+        )
+
     def freeze(self):
         """Disable widget"""
         self.report_suggestion.disabled = True
@@ -150,6 +163,7 @@ title="Create an enhancement issue on GitHub" style="width:auto;">
     def reset(self):
         """Reset widget"""
         self.report_suggestion.disabled = False
+        self.report_bug_link.value = ""
         self._debug_log.reset()
 
     @staticmethod
@@ -1,9 +1,11 @@
 """Logging to both file and widget"""
+from collections import deque
 import logging
 from logging.handlers import RotatingFileHandler
 import os
 from pathlib import Path
-from typing import List
+import time
+from typing import Deque, List
 import urllib.parse
 import warnings
 
@@ -79,9 +81,13 @@ class ColoredFormatter(logging.Formatter):
 
 
 class OutputLogger(ipw.Output):
-    """The widget to go with the handler"""
+    """The widget to go with the handler
 
-    def __init__(self, **kwargs):
+    Only the latest `max_lines` log lines are kept, and shown as a single stream output,
+    newest first.
+    """
+
+    def __init__(self, max_lines: int = 500, **kwargs):
         layout = {
             "width": "auto",
             "min_height": "160px",
@@ -89,8 +95,16 @@ class OutputLogger(ipw.Output):
             "border": "1px solid black",
             "overflow": "hidden auto",  # "Internal" scrolling
         }
+        self.lines: Deque[str] = deque(maxlen=max_lines)
         super().__init__(layout=layout)
 
+    def show(self):
+        """Show the current log lines"""
+        text = "".join(reversed(self.lines))
+        self.outputs = (
+            ({"name": "log", "output_type": "stream", "text": text},) if text else ()
+        )
+
     def freeze(self):
         """Disable widget"""
 
@@ -99,28 +113,53 @@ class OutputLogger(ipw.Output):
 
     def reset(self):
         """Reset widget"""
-        self.clear_output()
+        self.lines.clear()
+        self.outputs = ()
 
 
 class OutputLoggerHandler(logging.Handler):
     """Custom logging handler sending logs to an output widget
     Inspired by:
     https://ipywidgets.readthedocs.io/en/latest/examples/Output%20Widget.html#Integrating-output-widgets-with-the-logging-module
+
+    When running in an IPython kernel, records are collected and the widget is updated on the
+    kernel's event loop at most every `flush_interval` seconds.
     """
 
-    def __init__(self):
+    def __init__(self, max_lines: int = 500, flush_interval: float = 0.25):
         super().__init__()
-        self.out = OutputLogger()
+        self.out = OutputLogger(max_lines=max_lines)
+        self.flush_interval = flush_interval
+        self._pending = False
+        self._flushed = 0.0
 
     def emit(self, record: logging.LogRecord):
         """Overrule the same logging.Handler method"""
         formatted_record = self.format(record)
-        new_output = {
-            "name": "log",
-            "output_type": "stream",
-            "text": f"{formatted_record}\n",
-        }
-        self.out.outputs = (new_output,) + self.out.outputs
+        self.out.lines.append(f"{formatted_record}\n")
+        if not self._pending:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        """Update the widget on the kernel's event loop, or right away if there is none"""
+        # Imported here, since the executor logs through this module
+        from optimade_client.executor import kernel_loop
+
+        loop = kernel_loop()
+        if loop is None:
+            self.flush()
+            return
+
+        self._pending = True
+        delay = max(self._flushed + self.flush_interval - time.monotonic(), 0.0)
+        loop.add_callback(lambda: loop.call_later(delay, self.flush))
+
+    def flush(self):
+        """Overrule the same logging.Handler method, showing the collected records"""
+        with self.lock:
+            self._pending = False
+            self._flushed = time.monotonic()
+            self.out.show()
 
     def get_widget(self):
         """Return the IPyWidget"""
@@ -128,9 +167,13 @@ class OutputLoggerHandler(logging.Handler):
 
 
 class ReportLogger(ipw.HTML):
-    """The widget to go with the handler"""
+    """The widget to go with the handler
+
+    The URL-encoded log messages are kept in a ring buffer of at most `MAX_BYTES`, dropping
+    the oldest messages first.
+    The log dump for a bug report is built from the buffer on request, see `report()`.
+    """
 
-    WRAPPED_LOGS = """<input type='hidden' id='{element_id}' value='{value}'></input>"""
     WRAPPED_VALUE = (  # Post-urlencoded
         "%3Cdetails%3E%0A++%3Csummary%3ELog+dump%3C%2Fsummary%3E%0A%0A++%60%60%60%0A{logs}++"
         "%60%60%60%0A%3C%2Fdetails%3E%0A%0A"
@@ -138,10 +181,10 @@ class ReportLogger(ipw.HTML):
     MAX_BYTES = 7400
 
     def __init__(self, value: str = None, **kwargs):
-        self._element_id = "report_log"
-        self._logs = []
+        self._logs: Deque[str] = deque()
+        self._size = 0
         self._truncated = False
-        super().__init__(self.clear_logs(), **kwargs)
+        super().__init__(**kwargs)
 
     @staticmethod
     def freeze():
@@ -158,17 +201,15 @@ class ReportLogger(ipw.HTML):
         """Reset widget"""
         LOGGER.debug("Reset 'ReportLogger'.")
 
-    def clear_logs(self) -> str:
-        """Clear logs, i.e., input element's value attribute"""
-        self._logs = []
-        return self._update_logs()
+    def clear_logs(self):
+        """Clear logs, i.e., empty the ring buffer of log messages"""
+        self._logs.clear()
+        self._size = 0
+        self._truncated = False
 
-    def _update_logs(self) -> str:
-        """Wrap log messages, i.e., use self.wrapped_log to set self.value"""
-        return self.WRAPPED_LOGS.format(
-            value=self.WRAPPED_VALUE.format(logs="".join(self.logs)),
-            element_id=self.element_id,
-        )
+    def report(self) -> str:
+        """The URL-encoded log dump to add to the body of a bug report"""
+        return self.WRAPPED_VALUE.format(logs="".join(self._logs))
 
     @staticmethod
     def _urlencode_string(string: str) -> str:
@@ -182,12 +223,9 @@ class ReportLogger(ipw.HTML):
         return res[len("value=") :]
 
     def log(self, message: str):
-        """Log a message, i.e., add it to the input element's value attribute"""
+        """Log a message, i.e., add it to the ring buffer of log messages"""
         # Remove any surrounding new-line invocations (so we can implement our own)
-        while message.endswith("\n"):
-            message = message[:-2]
-        while message.startswith("\n"):
-            message = message[2:]
+        message = message.strip("\n")
 
         # Put all messages within the GitHub Markdown accordion
         message = self._urlencode_string(f"  {message}\n")
@@ -195,36 +233,37 @@ class ReportLogger(ipw.HTML):
         # Truncate logs to not send a too long URI and receive a 414 response from GitHub
         note_truncation = self._urlencode_string("...")
         message_truncation = self._urlencode_string(f"  {note_truncation}\n")
-        suggested_log = "".join(self.logs) + message
-        while len(suggested_log) > self.MAX_BYTES:
-            # NOTE: It is expected that the first log message will never be longer than MAX_BYTES
-            if len(self.logs) == 1:
-                # The single latest message is too large, cut it down
-                new_line = "%0A"
-                truncation_length = (
-                    len(message_truncation) + len(note_truncation) + len(new_line)
-                )
-                message = (
-                    f"{message[:self.MAX_BYTES - truncation_length]}{note_truncation}"
-                    f"{new_line}"
-                )
-                break
-
+        if len(message) > self.MAX_BYTES - len(message_truncation):
+            # The single message is too large, cut it down (not within an encoded character)
+            new_line = "%0A"
+            message = message[
+                : self.MAX_BYTES
+                - len(message_truncation)
+                - len(note_truncation)
+                - len(new_line)
+            ]
+            if "%" in message[-2:]:
+                message = message[: message.rindex("%")]
+            message = f"{message}{note_truncation}{new_line}"
+
+        self._logs.append(message)
+        self._size += len(message)
+        while self._size > self.MAX_BYTES and len(self._logs) > 1 + self._truncated:
             if not self._truncated:
                 # Add a permanent "log" message to show the list of logs is incomplete
                 self._truncated = True
-                self.logs.insert(0, message_truncation)
+                self._logs.appendleft(message_truncation)
+                self._size += len(message_truncation)
 
-            self.logs.pop(1)
-            suggested_log = f"{''.join(self.logs)}{message}"
-
-        self.logs.append(message)
-        self.value = self._update_logs()
+            # Drop the oldest message, keeping the truncation note first
+            self._logs.popleft()
+            self._size -= len(self._logs.popleft())
+            self._logs.appendleft(message_truncation)
 
     @property
     def logs(self) -> List[str]:
         """Return list of currently saved log messages"""
-        return self._logs
+        return list(self._logs)
 
     @logs.setter
     def logs(self, _):  # pylint: disable=no-self-use
@@ -236,22 +275,6 @@ class ReportLogger(ipw.HTML):
         LOGGER.warning("Message: %r", msg)
         warnings.warn(msg)
 
-    @property
-    def element_id(self) -> str:
-        """Return the input element's id"""
-        return self._element_id
-
-    @element_id.setter
-    def element_id(self, _):
-        """Do not allow changing the input element's id"""
-        if self._element_id:
-            msg = (
-                "Can not set 'element_id', since it is already set <element_id="
-                f"{self._element_id}>"
-            )
-            LOGGER.warning("Message: %r", msg)
-            warnings.warn(msg)
-
 
 class ReportLoggerHandler(logging.Handler):
     """Custom logging handler sending logs to an output widget
@@ -0,0 +1,221 @@
+"""Compact storage of retrieved pages of structure entries
+
+Raw OPTIMADE entries hold their sites as nested lists of Python floats and strings, which
+take up several times the memory of the numbers themselves.
+A `PageStore` keeps the `cartesian_site_positions` and `lattice_vectors` of all entries of a
+page in float arrays, `species_at_sites` as integer indices into a table of species names,
+and the remaining properties of each entry in a `__slots__` record, where identical `species`
+definitions are shared between entries.
+Entries are turned back into raw OPTIMADE entries when they are accessed.
+"""
+import json
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+
+__all__ = ("EntryRecord", "PageStore")
+
+
+def _float_array(value: list, shape: tuple) -> np.ndarray:
+    """Nested lists of numbers as a float array of the given shape (-1 for any length)
+
+    Unknown (null) values become NaN.
+    """
+    rows, columns = shape
+    if (
+        not isinstance(value, list)
+        or rows not in (-1, len(value))
+        or not all(isinstance(row, list) and len(row) == columns for row in value)
+        or not all(
+            _ is None or (isinstance(_, (int, float)) and not isinstance(_, bool))
+            for row in value
+            for _ in row
+        )
+    ):
+        raise ValueError(f"Expected a list of lists of numbers of shape {shape}")
+    return np.asarray(
+        [[np.nan if _ is None else _ for _ in row] for row in value], dtype=float
+    ).reshape(-1, columns)
+
+
+def _names(value: list) -> List[str]:
+    """A list of strings"""
+    if not isinstance(value, list) or not all(isinstance(_, str) for _ in value):
+        raise TypeError("Expected a list of strings")
+    return value
+
+
+class EntryRecord:  # pylint: disable=too-few-public-methods
+    """The properties of an entry, except those stored in the arrays of a `PageStore`
+
+    Array properties that cannot be stored in the arrays are kept as given.
+    """
+
+    __slots__ = ("id", "type", "attributes", "other")
+
+    def __init__(self, entry: dict):
+        self.id = entry.get("id")  # pylint: disable=invalid-name
+        self.type = entry.get("type")
+        self.attributes = dict(entry.get("attributes") or {})
+        other = {
+            key: value
+            for key, value in entry.items()
+            if key not in ("id", "type", "attributes")
+        }
+        self.other = other or None
+
+
+class PageStore:
+    """Compact, read-only sequence of structure entries
+
+    Indexing and slicing return raw OPTIMADE entries (new `dict`s on every access).
+    """
+
+    ARRAYS = ("cartesian_site_positions", "lattice_vectors", "species_at_sites")
+
+    def __init__(self, entries: List[dict]):
+        self._records = [EntryRecord(entry) for entry in entries]
+        count = len(entries)
+
+        # Entries of a database mostly share a few `species` definitions
+        definitions: Dict[str, list] = {}
+        for record in self._records:
+            species = record.attributes.get("species")
+            if species:
+                record.attributes["species"] = definitions.setdefault(
+                    json.dumps(species, sort_keys=True), species
+                )
+
+        # Values that are not (null or) well-formed arrays stay in the record as given
+        lattices: List[Optional[np.ndarray]] = []
+        positions: List[Optional[np.ndarray]] = []
+        species: List[Optional[List[str]]] = []
+        for record in self._records:
+            lattices.append(
+                self._take(record, "lattice_vectors", _float_array, shape=(3, 3))
+            )
+            positions.append(
+                self._take(
+                    record, "cartesian_site_positions", _float_array, shape=(-1, 3)
+                )
+            )
+            species.append(self._take(record, "species_at_sites", _names))
+
+        # Lattice vectors, with NaN for unknown (null) values
+        self._has_lattice = np.asarray([_ is not None for _ in lattices], dtype=bool)
+        self._lattices = np.full((count, 3, 3), np.nan)
+        for index, lattice in enumerate(lattices):
+            if lattice is not None:
+                self._lattices[index] = lattice
+
+        # Sites of all entries, concatenated, with NaN for unknown (null) values
+        self._has_positions = np.asarray([_ is not None for _ in positions], dtype=bool)
+        self._position_offsets = np.concatenate(
+            [[0], np.cumsum([0 if _ is None else len(_) for _ in positions])]
+        ).astype(np.int64)
+        self._positions = np.concatenate(
+            [np.empty((0, 3))] + [_ for _ in positions if _ is not None]
+        )
+
+        self._has_species = np.asarray([_ is not None for _ in species], dtype=bool)
+        self._species_offsets = np.concatenate(
+            [[0], np.cumsum([len(_ or []) for _ in species])]
+        ).astype(np.int64)
+        names, indices = np.unique(
+            np.asarray(
+                [name for names in species if names for name in names], dtype=str
+            ),
+            return_inverse=True,
+        )
+        self.species_names: List[str] = names.tolist()
+        self._species = indices.reshape(-1).astype(
+            np.int16 if len(names) < 2**15 else np.int32
+        )
+
+    @staticmethod
+    def _take(record: EntryRecord, key: str, convert, **kwargs):
+        """Move a value from the record's attributes, converted for an array
+
+        The value is left in the record if it is null, missing or cannot be converted.
+        """
+        value = record.attributes.get(key)
+        if value is None:
+            return None
+        try:
+            converted = convert(value, **kwargs)
+        except (TypeError, ValueError):
+            return None
+        del record.attributes[key]
+        return converted
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[dict, List[dict]]:
+        if isinstance(index, slice):
+            return [self._entry(_) for _ in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PageStore index out of range")
+        return self._entry(index)
+
+    def __iter__(self):
+        return (self._entry(_) for _ in range(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the arrays"""
+        return sum(
+            array.nbytes
+            for array in (
+                self._has_lattice,
+                self._lattices,
+                self._has_positions,
+                self._position_offsets,
+                self._positions,
+                self._has_species,
+                self._species_offsets,
+                self._species,
+            )
+        )
+
+    def record(self, index: int) -> EntryRecord:
+        """The record of the properties of an entry not stored in arrays"""
+        return self._records[index]
+
+    def positions(self, index: int) -> Optional[np.ndarray]:
+        """The `cartesian_site_positions` of an entry as an array (a view, not a copy)"""
+        if not self._has_positions[index]:
+            return None
+        start, end = self._position_offsets[index : index + 2]
+        return self._positions[start:end]
+
+    def _entry(self, index: int) -> dict:
+        """Rebuild the raw entry"""
+        record = self._records[index]
+        attributes: Dict[str, object] = dict(record.attributes)
+        if attributes.get("species"):
+            attributes["species"] = [dict(_) for _ in attributes["species"]]
+
+        if self._has_lattice[index]:
+            attributes["lattice_vectors"] = [
+                [None if np.isnan(_) else _ for _ in vector]
+                for vector in self._lattices[index].tolist()
+            ]
+        if self._has_positions[index]:
+            attributes["cartesian_site_positions"] = [
+                [None if np.isnan(_) else _ for _ in site]
+                for site in self.positions(index).tolist()
+            ]
+        if self._has_species[index]:
+            start, end = self._species_offsets[index : index + 2]
+            attributes["species_at_sites"] = [
+                self.species_names[_] for _ in self._species[start:end].tolist()
+            ]
+
+        entry = {"id": record.id, "type": record.type, "attributes": attributes}
+        if record.other:
+            entry.update(record.other)
+        return entry
@@ -0,0 +1,561 @@
+"""Pagination helpers
+
+Adaptive `page_limit`:
+The number of entries requested per page is tuned per database from the page-limit bounds
+reported by the server and the measured latency and size of the responses.
+Large pages are requested from fast databases with small entries to cut round-trips, while
+slow databases or databases with large entries get smaller pages.
+The maximum is lowered when a database rejects a `page_limit`, or silently serves fewer
+entries than requested.
+
+Cursor pagination:
+Deep `page_offset` values are costly for many database back-ends.
+When sorting by `id`, pages next to already retrieved pages are instead requested using
+`page_above`/`page_below` with the `id` of the neighbouring entry, if the database
+supports it, while the last page is requested as the first page of the reversed order.
+
+Concurrent retrieval:
+Several consecutive pages of an offset- or number-paginated query are requested
+concurrently, limited to `MAX_REQUESTS_PER_HOST` simultaneous requests per host across
+the whole client, and reassembled in order.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import json
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from optimade_client.logger import LOGGER
+from optimade_client.utils import handle_errors, perform_optimade_query
+
+if TYPE_CHECKING:  # pragma: no cover
+    from optimade_client.executor import QueryToken
+
+
+__all__ = (
+    "fetch_pages",
+    "host_semaphore",
+    "iter_pages",
+    "MAX_REQUESTS_PER_HOST",
+    "PageCursors",
+    "PageLimitTuner",
+    "PAGE_LIMIT_TUNER",
+)
+
+
+MAX_REQUESTS_PER_HOST = 4
+
+
+class _DatabaseStatistics:  # pylint: disable=too-few-public-methods
+    """Measured statistics for a single database"""
+
+    __slots__ = (
+        "minimum",
+        "maximum",
+        "latency",
+        "seconds_per_entry",
+        "bytes_per_entry",
+    )
+
+    def __init__(self, minimum: int, maximum: int):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency: float = None  # Seconds per round-trip, independent of page size
+        self.seconds_per_entry: float = None
+        self.bytes_per_entry: float = None
+
+
+class PageLimitTuner:
+    """Choose a `page_limit` per database
+
+    The time of a single request is modelled as `latency + page_limit * seconds_per_entry`,
+    where both parameters are exponentially weighted moving averages of measured requests.
+    The chosen `page_limit` is the largest one that keeps a request within `target_seconds`
+    and the response within `target_bytes`, bounded by the page-limit bounds of the database.
+    """
+
+    DEFAULT_MAXIMUM = 100
+    SMOOTHING = 0.3
+    PAGE_LIMIT_KEYS = ("page_limit_max", "max_page_limit")
+
+    def __init__(self, target_seconds: float = 2.0, target_bytes: int = 2_000_000):
+        self.target_seconds = target_seconds
+        self.target_bytes = target_bytes
+        self._lock = threading.Lock()
+        self._databases: Dict[str, _DatabaseStatistics] = {}
+
+    def _statistics(
+        self, base_url: str, token: "QueryToken" = None
+    ) -> _DatabaseStatistics:
+        """Get statistics for the database, retrieving its page-limit bounds if needed"""
+        with self._lock:
+            if base_url in self._databases:
+                return self._databases[base_url]
+
+        minimum, maximum = self._retrieve_bounds(base_url, token=token)
+        with self._lock:
+            return self._databases.setdefault(
+                base_url, _DatabaseStatistics(minimum, maximum)
+            )
+
+    @classmethod
+    def _retrieve_bounds(
+        cls, base_url: str, token: "QueryToken" = None
+    ) -> Tuple[int, int]:
+        """Retrieve page-limit bounds from the database's `/info` endpoint
+
+        The OPTIMADE specification has no dedicated field for this, but several
+        implementations expose the maximum in `meta` or the `/info` attributes, e.g.,
+        `page_limit_max` or a database-specific prefixed variant hereof.
+        """
+        start = time.monotonic()
+        response = perform_optimade_query(
+            base_url=base_url, endpoint="/info", token=token
+        )
+        elapsed = time.monotonic() - start
+
+        msg, _ = handle_errors(response)
+        maximum = None
+        if not msg:
+            data = response.get("data", {})
+            for source in (response.get("meta", {}), data.get("attributes", {})):
+                for key, value in source.items():
+                    if key.endswith(cls.PAGE_LIMIT_KEYS):
+                        try:
+                            maximum = int(value)
+                        except (TypeError, ValueError):
+                            continue
+        LOGGER.debug(
+            "Page-limit bounds for %s: max=%r (from /info in %.2f s)",
+            base_url,
+            maximum,
+            elapsed,
+        )
+        return 1, maximum if maximum and maximum > 0 else cls.DEFAULT_MAXIMUM
+
+    def bounds(self, base_url: str, token: "QueryToken" = None) -> Tuple[int, int]:
+        """Minimum and maximum `page_limit` for the database"""
+        statistics = self._statistics(base_url, token=token)
+        return statistics.minimum, statistics.maximum
+
+    def page_limit(
+        self, base_url: str, multiple_of: int = 1, token: "QueryToken" = None
+    ) -> int:
+        """The `page_limit` to use for the next request to the database
+
+        :param multiple_of: The page limit will be a multiple hereof (if the maximum allows),
+            e.g., the number of rows shown per view.
+        :param token: Token of the action the request is part of, used when retrieving the
+            page-limit bounds of the database.
+        """
+        statistics = self._statistics(base_url, token=token)
+        with self._lock:
+            limit = statistics.maximum
+            if statistics.bytes_per_entry:
+                limit = min(limit, self.target_bytes / statistics.bytes_per_entry)
+            if statistics.seconds_per_entry:
+                time_budget = self.target_seconds - (statistics.latency or 0.0)
+                limit = min(limit, max(time_budget, 0.0) / statistics.seconds_per_entry)
+            limit = max(int(limit), statistics.minimum)
+
+        if multiple_of > 1 and limit >= multiple_of:
+            limit -= limit % multiple_of
+        return max(min(limit, statistics.maximum), statistics.minimum)
+
+    def _average(self, old: float, new: float) -> float:
+        """Exponentially weighted moving average"""
+        return new if old is None else (1 - self.SMOOTHING) * old + self.SMOOTHING * new
+
+    def record(self, base_url: str, entries: list, seconds: float) -> None:
+        """Record a measured request returning `entries` in `seconds`"""
+        statistics = self._statistics(base_url)
+        sample = entries[:3]
+        sample_bytes = (
+            sum(len(json.dumps(entry)) for entry in sample) / len(sample)
+            if sample
+            else None
+        )
+        with self._lock:
+            if len(entries) <= 1 or statistics.latency is None:
+                # Small requests are dominated by the round-trip latency.
+                # Without any small request yet, assume half of the time is latency.
+                statistics.latency = self._average(
+                    statistics.latency, seconds if len(entries) <= 1 else seconds / 2
+                )
+            if len(entries) > 1:
+                statistics.seconds_per_entry = self._average(
+                    statistics.seconds_per_entry,
+                    max(seconds - statistics.latency, 0.0) / len(entries),
+                )
+            if sample_bytes:
+                statistics.bytes_per_entry = self._average(
+                    statistics.bytes_per_entry, sample_bytes
+                )
+
+        LOGGER.debug(
+            "Page-limit statistics for %s: latency=%r s, per entry=%r s/%r B",
+            base_url,
+            statistics.latency,
+            statistics.seconds_per_entry,
+            statistics.bytes_per_entry,
+        )
+
+    def record_rejection(self, base_url: str, page_limit: int, response: dict) -> bool:
+        """Lower the maximum if the database rejected `page_limit`
+
+        :return: Whether the maximum was lowered, i.e., whether it makes sense to retry.
+        """
+        details = " ".join(
+            str(error.get("detail", ""))
+            for error in response.get("errors", [])
+            if isinstance(error, dict)
+        )
+        if "page_limit" not in details or page_limit <= 1:
+            return False
+
+        statistics = self._statistics(base_url)
+        match = re.search(r"page_limit\D+(\d+)", details)
+        maximum = int(match.group(1)) if match else page_limit // 2
+        with self._lock:
+            if maximum >= statistics.maximum:
+                maximum = page_limit // 2
+            statistics.maximum = max(min(maximum, page_limit - 1), statistics.minimum)
+        LOGGER.debug(
+            "%s rejected page_limit=%d. New maximum: %d",
+            base_url,
+            page_limit,
+            statistics.maximum,
+        )
+        return True
+
+    def perform_query(
+        self, offset: int = 0, multiple_of: int = 1, **queries
+    ) -> Tuple[dict, int, int]:
+        """Perform query with an adaptive `page_limit`, measuring the request
+
+        :param offset: Index of an entry that must be part of the returned page.
+            The requested page starts at the closest multiple of the used `page_limit`
+            at or below `offset`, setting both `page_offset` and `page_number` accordingly.
+        :param multiple_of: See `page_limit()`.
+        :param queries: Keyword arguments for `perform_optimade_query()`.
+
+        :return: The response, the used `page_limit`, and the used `page_offset`.
+        """
+        base_url = queries["base_url"]
+        while True:
+            page_limit = self.page_limit(
+                base_url, multiple_of=multiple_of, token=queries.get("token")
+            )
+            page_offset = offset - offset % page_limit
+            queries.update(
+                {
+                    "page_limit": page_limit,
+                    "page_offset": page_offset,
+                    "page_number": page_offset // page_limit + 1,
+                }
+            )
+
+            start = time.monotonic()
+            response = perform_optimade_query(**queries)
+            elapsed = time.monotonic() - start
+
+            if "errors" in response and "data" not in response:
+                if self.record_rejection(base_url, page_limit, response):
+                    continue
+                return response, page_limit, page_offset
+
+            self.record(base_url, response.get("data", []), elapsed)
+            self._record_cap(base_url, page_limit, page_offset, response)
+            return response, page_limit, page_offset
+
+    def _record_cap(
+        self, base_url: str, page_limit: int, page_offset: int, response: dict
+    ) -> None:
+        """Lower the maximum if the database silently served fewer entries than requested"""
+        served = len(response.get("data", []))
+        data_returned = response.get("meta", {}).get("data_returned")
+        if (
+            not 0 < served < page_limit
+            or data_returned is None
+            or page_offset + served >= data_returned
+        ):
+            return
+
+        statistics = self._statistics(base_url)
+        with self._lock:
+            statistics.maximum = max(
+                min(served, statistics.maximum), statistics.minimum
+            )
+        LOGGER.debug(
+            "%s served %d of page_limit=%d entries. New maximum: %d",
+            base_url,
+            served,
+            page_limit,
+            statistics.maximum,
+        )
+
+
+PAGE_LIMIT_TUNER = PageLimitTuner()
+
+
+_CURSOR_SUPPORT: Dict[str, bool] = {}
+_CURSOR_SUPPORT_LOCK = threading.Lock()
+
+
+class PageCursors:
+    """Cursors for the pages of a single query
+
+    A cursor for a page starting at `page_offset` is the `id` of the entry just before
+    it, recorded when retrieving the preceding page, or the `id` of the entry just after
+    it for descending order.
+    Support for `page_above`/`page_below` is determined from the first response using a
+    cursor and remembered per database (shared by all instances):
+    The `next` link of a database supporting it continues using the cursor.
+    Without a `next` link, a database ignoring the cursor is recognized by it returning
+    the first page again.
+    """
+
+    CURSOR_PAGEING = {"id": "page_above", "-id": "page_below"}
+    REVERSED_SORT = {"id": "-id", "-id": "id"}
+
+    def __init__(self):
+        self._query = None
+        self._cursors: Dict[int, str] = {}
+        self._first_id: Optional[str] = None
+
+    @staticmethod
+    def _support(base_url: str) -> Optional[bool]:
+        """Whether the database supports cursor pagination (`None` if not known yet)"""
+        with _CURSOR_SUPPORT_LOCK:
+            return _CURSOR_SUPPORT.get(base_url, None)
+
+    @staticmethod
+    def _query_key(queries: dict) -> tuple:
+        return tuple(
+            (key, str(value))
+            for key, value in sorted(queries.items())
+            if key not in ("page_limit", "page_offset", "page_number", "token")
+        )
+
+    def _check_query(self, queries: dict) -> None:
+        """Forget cursors of another query"""
+        key = self._query_key(queries)
+        if key != self._query:
+            self._query = key
+            self._cursors = {}
+            self._first_id = None
+
+    def reset(self) -> None:
+        """Forget all cursors"""
+        self._query = None
+        self._cursors = {}
+        self._first_id = None
+
+    def get(self, queries: dict, page_offset: int) -> Optional[dict]:
+        """Cursor query parameters for the page at `page_offset` (if known and supported)"""
+        self._check_query(queries)
+        pageing = self.CURSOR_PAGEING.get(queries.get("sort"))
+        if (
+            pageing is None
+            or page_offset not in self._cursors
+            or self._support(str(queries["base_url"])) is False
+        ):
+            return None
+        return {pageing: self._cursors[page_offset]}
+
+    def last_page(
+        self, queries: dict, page_offset: int, data_returned: Optional[int]
+    ) -> Optional[dict]:
+        """Query parameters retrieving the last page from the start of the reversed order
+
+        This avoids a deep `page_offset` for the last page, which is otherwise out of reach
+        of the cursors. The entries of the response are in reversed order.
+
+        :return: The query parameters, or `None` if not sorting by `id` or if the page at
+            `page_offset` is not the last page.
+        """
+        reversed_sort = self.REVERSED_SORT.get(queries.get("sort"))
+        page_limit = int(queries.get("page_limit") or 0)
+        if (
+            reversed_sort is None
+            or not data_returned
+            or page_offset <= 0
+            or not 0 < data_returned - page_offset <= page_limit
+        ):
+            return None
+        return {
+            "sort": reversed_sort,
+            "page_limit": data_returned - page_offset,
+            "page_offset": 0,
+            "page_number": 1,
+        }
+
+    def record(
+        self, queries: dict, page_offset: int, response: dict, cursor: dict = None
+    ) -> bool:
+        """Record cursors from a retrieved page
+
+        :param cursor: The cursor query parameters used to retrieve the page (if any).
+        :return: Whether the response is valid, i.e., `False` if a used cursor turned out
+            not to be supported by the database.
+        """
+        self._check_query(queries)
+        data = response.get("data", None)
+        if cursor:
+            ((pageing, value),) = cursor.items()
+            if "errors" in response:
+                if any(
+                    str(error.get("detail", "")).startswith("CLIENT:")
+                    for error in response["errors"]
+                    if isinstance(error, dict)
+                ):
+                    # Connection error or similar, unrelated to the cursor
+                    return False
+                supported = False
+            else:
+                next_link = (response.get("links") or {}).get("next", None)
+                if isinstance(next_link, dict):
+                    next_link = next_link.get("href", None)
+                if next_link:
+                    supported = pageing in parse_qs(urlparse(str(next_link)).query)
+                elif data:
+                    supported = data[0].get("id", "") not in (value, self._first_id)
+                else:
+                    supported = isinstance(data, list)
+            base_url = str(queries["base_url"])
+            with _CURSOR_SUPPORT_LOCK:
+                if _CURSOR_SUPPORT.get(base_url, None) is None:
+                    LOGGER.debug(
+                        "%s %s cursor pagination (%s).",
+                        base_url,
+                        "supports" if supported else "does not support",
+                        pageing,
+                    )
+                _CURSOR_SUPPORT[base_url] = supported
+            if not supported:
+                return False
+
+        if data:
+            if page_offset == 0:
+                self._first_id = data[0].get("id", "")
+            self._cursors[page_offset + len(data)] = data[-1].get("id", "")
+        return True
+
+
+_HOST_SEMAPHORES: Dict[str, threading.BoundedSemaphore] = {}
+_HOST_SEMAPHORES_LOCK = threading.Lock()
+
+
+def host_semaphore(base_url: str) -> threading.BoundedSemaphore:
+    """Semaphore limiting the number of simultaneous requests to the host of `base_url`"""
+    host = urlparse(str(base_url)).netloc
+    with _HOST_SEMAPHORES_LOCK:
+        if host not in _HOST_SEMAPHORES:
+            _HOST_SEMAPHORES[host] = threading.BoundedSemaphore(MAX_REQUESTS_PER_HOST)
+        return _HOST_SEMAPHORES[host]
+
+
+def iter_pages(
+    queries: dict,
+    offset: int,
+    number_of_pages: int,
+    page_limit: int,
+    token: "QueryToken" = None,
+) -> Iterator[dict]:
+    """Retrieve consecutive pages concurrently, yielding the responses in order
+
+    Pages are requested using both `page_offset` and `page_number` (if `offset` is a
+    multiple of `page_limit`), supporting both offset- and number-paginated databases.
+    Retrieval stops after an erroneous or empty page, which is still yielded.
+
+    :param queries: Keyword arguments for `perform_optimade_query()`, excluding pageing.
+    :param offset: Index of the first entry of the first page.
+    :param number_of_pages: Number of pages to retrieve.
+    :param page_limit: Number of entries per page.
+    :param token: Token of the action the retrieval is part of.
+        Pending page requests are dropped if the action is cancelled.
+    """
+    semaphore = host_semaphore(queries["base_url"])
+    queries = {
+        key: value
+        for key, value in queries.items()
+        if key not in ("page_limit", "page_offset", "page_number")
+    }
+
+    def _retrieve_page(index: int) -> dict:
+        page_offset = offset + index * page_limit
+        with semaphore:
+            if token is not None:
+                token.check()
+            return perform_optimade_query(
+                page_limit=page_limit,
+                page_offset=page_offset,
+                page_number=page_offset // page_limit + 1
+                if page_offset % page_limit == 0
+                else None,
+                token=token,
+                **queries,
+            )
+
+    with ThreadPoolExecutor(
+        max_workers=min(number_of_pages, MAX_REQUESTS_PER_HOST),
+        thread_name_prefix="optimade-client-pages",
+    ) as pool:
+        futures = [
+            pool.submit(_retrieve_page, index) for index in range(number_of_pages)
+        ]
+        try:
+            # Futures are awaited in submission order, reassembling the pages in order,
+            # no matter the order in which they are retrieved.
+            for future in futures:
+                response = future.result()
+                yield response
+                msg, _ = handle_errors(response)
+                if msg or len(response.get("data", [])) < page_limit:
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def fetch_pages(
+    queries: dict,
+    offset: int,
+    number_of_pages: int,
+    page_limit: int,
+    token: "QueryToken" = None,
+) -> dict:
+    """Retrieve consecutive pages concurrently, merging them into a single response
+
+    See `iter_pages()` for the parameters.
+
+    :return: A response with the entries of all pages in order, the `meta` of the first
+        page, and the `errors` of the first erroneous page (if any).
+    """
+    response = {"data": [], "meta": {}, "links": {}}
+    for page in iter_pages(
+        queries,
+        offset=offset,
+        number_of_pages=number_of_pages,
+        page_limit=page_limit,
+        token=token,
+    ):
+        if not response["meta"]:
+            response["meta"] = page.get("meta", {})
+        msg, _ = handle_errors(page)
+        if msg:
+            response["errors"] = page.get("errors", [{"detail": msg}])
+            break
+        response["data"].extend(page.get("data", []))
+
+    LOGGER.debug(
+        "Retrieved %d entries from %s, starting at %d (%d pages of %d).",
+        len(response["data"]),
+        queries["base_url"],
+        offset,
+        number_of_pages,
+        page_limit,
+    )
+    return response
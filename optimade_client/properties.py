@@ -0,0 +1,166 @@
+"""Properties derived from structure entries, computed for a whole page at once
+
+The cell volume, density, lattice parameters and the atoms per formula unit are computed for
+all entries of a page of results (raw OPTIMADE `structures` resources) in a few NumPy
+operations, so they can be shown and sorted by without further queries.
+Properties that cannot be derived for an entry are `NaN`.
+"""
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    from ase.data import atomic_masses, atomic_numbers
+except ImportError:
+    atomic_masses = None
+    atomic_numbers = None
+
+
+__all__ = ("cell_volumes", "derived_properties", "DERIVED_PROPERTIES")
+
+
+# {column: description}
+DERIVED_PROPERTIES = {
+    "volume": "Unit cell volume (Å<sup>3</sup>)",
+    "density": "Density (g/cm<sup>3</sup>)",
+    "a": "a (Å)",
+    "b": "b (Å)",
+    "c": "c (Å)",
+    "alpha": "α (°)",
+    "beta": "β (°)",
+    "gamma": "γ (°)",
+    "atoms_per_formula_unit": "Atoms per formula unit",
+    "formula_units": "Formula units per cell",
+}
+
+# Atomic mass unit per Å^3 in g/cm^3
+_AMU_PER_CUBIC_ANGSTROM = 1.66053906660
+
+
+def cell_volumes(cells: np.ndarray) -> np.ndarray:
+    """Volumes of cells (an array of shape `(n, 3, 3)`): |a_1 . (a_2 x a_3)|"""
+    cells = np.asarray(cells, dtype=float).reshape(-1, 3, 3)
+    return np.abs(
+        np.einsum("ij,ij->i", cells[:, 0], np.cross(cells[:, 1], cells[:, 2]))
+    )
+
+
+def _lattice_vectors(entry: dict) -> Optional[list]:
+    lattice = entry.get("attributes", {}).get("lattice_vectors")
+    if not lattice or any(value is None for vector in lattice for value in vector):
+        return None
+    return lattice
+
+
+def _formula_atoms(formula: Optional[str]) -> float:
+    """Number of atoms in a (reduced) chemical formula"""
+    if not formula:
+        return np.nan
+    return float(
+        sum(
+            int(count) if count else 1
+            for _, count in re.findall(r"([A-Z][a-z]?)(\d*)", formula)
+        )
+    )
+
+
+def _species_mass(species: dict) -> float:
+    """Average mass of a species, using reported masses if available"""
+    masses = species.get("mass")
+    symbols = species.get("chemical_symbols") or []
+    concentrations = species.get("concentration") or [1.0] * len(symbols)
+    if not isinstance(masses, list) or len(masses) != len(symbols):
+        if atomic_masses is None:
+            return np.nan
+        masses = [
+            0.0
+            if symbol == "vacancy"
+            else atomic_masses[atomic_numbers[symbol]]
+            if symbol in atomic_numbers
+            else np.nan
+            for symbol in symbols
+        ]
+    return float(
+        sum(mass * concentration for mass, concentration in zip(masses, concentrations))
+    )
+
+
+def derived_properties(entries: List[dict]) -> Dict[str, np.ndarray]:
+    """Derived properties of a page of structure entries
+
+    :return: An array per property (see `DERIVED_PROPERTIES`), in the order of `entries`.
+    """
+    count = len(entries)
+    properties = {name: np.full(count, np.nan) for name in DERIVED_PROPERTIES}
+    if not count:
+        return properties
+
+    # Lattice parameters and volumes
+    periodic = [index for index, _ in enumerate(entries) if _lattice_vectors(_)]
+    if periodic:
+        cells = np.asarray(
+            [_lattice_vectors(entries[_]) for _ in periodic], dtype=float
+        )
+        lengths = np.linalg.norm(cells, axis=2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for name, (first, second) in zip(
+                ("alpha", "beta", "gamma"), ((1, 2), (0, 2), (0, 1))
+            ):
+                cosines = np.einsum("ij,ij->i", cells[:, first], cells[:, second]) / (
+                    lengths[:, first] * lengths[:, second]
+                )
+                properties[name][periodic] = np.degrees(
+                    np.arccos(np.clip(cosines, -1.0, 1.0))
+                )
+        for axis, name in enumerate(("a", "b", "c")):
+            properties[name][periodic] = lengths[:, axis]
+        properties["volume"][periodic] = cell_volumes(cells)
+
+    # Atoms per formula unit, and the number of formula units in the cell
+    nsites = np.asarray(
+        [
+            _.get("attributes", {}).get("nsites")
+            or len(_.get("attributes", {}).get("species_at_sites") or [])
+            or np.nan
+            for _ in entries
+        ],
+        dtype=float,
+    )
+    properties["atoms_per_formula_unit"] = np.asarray(
+        [
+            _formula_atoms(_.get("attributes", {}).get("chemical_formula_reduced"))
+            for _ in entries
+        ]
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        properties["formula_units"] = nsites / properties["atoms_per_formula_unit"]
+
+    # Density: The masses of all sites on the page are summed per entry at once
+    species_masses: Dict[str, float] = {}
+    site_species, owners = [], []
+    for index, entry in enumerate(entries):
+        attributes = entry.get("attributes", {})
+        sites = attributes.get("species_at_sites")
+        if not sites or not attributes.get("species"):
+            continue
+        for species in attributes["species"]:
+            key = f"{index}:{species.get('name')}"
+            species_masses[key] = _species_mass(species)
+        site_species.extend(f"{index}:{name}" for name in sites)
+        owners.extend([index] * len(sites))
+    if site_species:
+        names, codes = np.unique(np.asarray(site_species), return_inverse=True)
+        masses = np.asarray([species_masses.get(_, np.nan) for _ in names])
+        cell_masses = np.bincount(
+            np.asarray(owners), weights=masses[codes.reshape(-1)], minlength=count
+        )
+        with_sites = np.zeros(count, dtype=bool)
+        with_sites[owners] = True
+        cell_masses[~with_sites] = np.nan
+        with np.errstate(invalid="ignore", divide="ignore"):
+            properties["density"] = (
+                cell_masses / properties["volume"] * _AMU_PER_CUBIC_ANGSTROM
+            )
+
+    return properties
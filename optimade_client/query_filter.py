@@ -1,20 +1,34 @@
 from enum import Enum, auto
-from typing import List, Union
+import functools
+import itertools
+import math
+from typing import Dict, List, Optional, Tuple, Union
 import traceback
 import traitlets
 import ipywidgets as ipw
-import requests
-from json import JSONDecodeError
 
 from optimade.adapters import Structure
-from optimade.adapters.structures.utils import species_from_species_at_sites
 from optimade.models import LinksResourceAttributes
-from optimade.models.utils import CHEMICAL_SYMBOLS, SemanticVersion
-
-from optimade_client.exceptions import BadResource, QueryError
+from optimade.models.utils import CHEMICAL_SYMBOLS
+
+from optimade_client.capabilities import CAPABILITY_MATRIX
+from optimade_client.counts import HIT_COUNTER
+from optimade_client.dedup import DuplicateGroup, DuplicateIndex
+from optimade_client.exceptions import BadResource, QueryCancelled, QueryError
+from optimade_client.executor import QueryExecutor, QueryToken
+from optimade_client.federated import (
+    iter_federated_search,
+    merge_sorted_entries,
+    sort_key,
+)
 from optimade_client.logger import LOGGER
+from optimade_client.page_store import PageStore
+from optimade_client.paging import PAGE_LIMIT_TUNER, PageCursors, fetch_pages
+from optimade_client.properties import derived_properties
 from optimade_client.subwidgets import (
     FilterTabs,
+    ResultsExporter,
+    ResultsGrid,
     ResultsPageChooser,
     SortSelector,
     StructureDropdown,
@@ -22,12 +36,11 @@ from optimade_client.subwidgets import (
 from optimade_client.utils import (
     ButtonStyle,
     check_entry_properties,
+    check_species_mass,
     handle_errors,
-    ordered_query_url,
+    perform_optimade_link_query,
     perform_optimade_query,
     get_sortable_fields,
-    SESSION,
-    TIMEOUT_SECONDS,
 )
 
 
@@ -37,11 +50,14 @@ class QueryFilterWidgetOrder(Enum):
     filter_header = auto()
     filters = auto()
     query_button = auto()
+    hit_counts = auto()
     structures_header = auto()
     structure_drop = auto()
+    results_grid = auto()
     sort_selector = auto()
     error_or_status_messages = auto()
     structure_page_chooser = auto()
+    export_results = auto()
 
     @classmethod
     def default_order(
@@ -52,11 +68,14 @@ class QueryFilterWidgetOrder(Enum):
             cls.filter_header,
             cls.filters,
             cls.query_button,
+            cls.hit_counts,
             cls.structures_header,
             cls.sort_selector,
             cls.structure_page_chooser,
             cls.structure_drop,
+            cls.results_grid,
             cls.error_or_status_messages,
+            cls.export_results,
         ]
         return [_.name for _ in default_order] if as_str else default_order
 
@@ -66,7 +85,24 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
 ):
     """Structure search and import widget for OPTIMADE
 
-    NOTE: Only supports offset- and number-pagination at the moment.
+    Pagination links are followed if provided. Otherwise, offset- and number-pagination is
+    used, or cursor-pagination when sorting by `id` and the database supports it
+    (see `optimade_client.paging.PageCursors`).
+
+    If `adaptive_page_limit` is `True`, the number of entries requested per query is tuned
+    for each database (see `optimade_client.paging.PageLimitTuner`), while `result_limit`
+    entries are still shown per view. Views within an already retrieved page are served
+    without querying the database again.
+
+    If `load_more_pages` is given, the next `load_more_pages` pages of results can be loaded
+    into the current view at once, retrieving the pages concurrently
+    (see `optimade_client.paging.fetch_pages`).
+    These pages are always requested using offset-pagination with `result_limit` entries per
+    page, i.e., neither the adaptive page limit nor cursor-pagination is used.
+
+    If `databases` is set, the search is performed over all of these databases at once
+    (see `optimade_client.federated`), showing the first page of results from each database
+    tagged by its name, and the status of each database.
     """
 
     structure = traitlets.Instance(Structure, allow_none=True)
@@ -74,6 +110,18 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
         traitlets.Unicode(),
         traitlets.Instance(LinksResourceAttributes, allow_none=True),
     )
+    databases = traitlets.List(
+        traitlets.Tuple(
+            traitlets.Unicode(), traitlets.Instance(LinksResourceAttributes)
+        ),
+        default_value=[],
+    )
+    child_databases = traitlets.List(
+        traitlets.Tuple(
+            traitlets.Unicode(), traitlets.Instance(LinksResourceAttributes)
+        ),
+        default_value=[],
+    )
 
     def __init__(
         self,
@@ -81,9 +129,12 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
         button_style: Union[ButtonStyle, str] = None,
         embedded: bool = False,
         subparts_order: List[str] = None,
+        adaptive_page_limit: bool = False,
+        load_more_pages: int = 0,
         **kwargs,
     ):
         self.page_limit = result_limit if result_limit else 25
+        self._page_limit_tuner = PAGE_LIMIT_TUNER if adaptive_page_limit else None
         if button_style:
             if isinstance(button_style, str):
                 button_style = ButtonStyle[button_style.upper()]
@@ -104,9 +155,14 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
         self.offset = 0
         self.number = 1
         self._data_available = None
+        self._latest_query = None
+        self._view_offset = 0
+        self._page_buffer = None
+        self._page_cursors = PageCursors()
+        self._federated_count = 0
+        self._executor = QueryExecutor()
         self.__perform_query = True
         self.__cached_ranges = {}
-        self.__cached_versions = {}
         self.database_version = ""
 
         self.filter_header = ipw.HTML(
@@ -125,6 +181,19 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
         )
         self.query_button.on_click(self.retrieve_data)
 
+        self.count_button = ipw.Button(
+            description="Count everywhere",
+            icon="bar-chart",
+            disabled=True,
+            tooltip="Count the results of the filter in all available databases",
+        )
+        self.count_button.on_click(self.count_everywhere)
+        self.hit_counts_table = ipw.HTML("")
+        self.hit_counts = ipw.VBox(
+            children=(self.count_button, self.hit_counts_table),
+            layout=ipw.Layout(width="auto"),
+        )
+
         self.structures_header = ipw.HTML(
             '<h4 style="margin-bottom:0px;padding:0px;">Results</h4>'
         )
@@ -135,12 +204,26 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
 
         self.structure_drop = StructureDropdown(disabled=True)
         self.structure_drop.observe(self._on_structure_select, names="value")
+        self.structure_drop.observe(self._on_structure_options, names="options")
+        self.results_grid = ResultsGrid()
+        self.results_grid.observe(self._on_grid_select, names="index")
+        self.results_grid.freeze()
         self.error_or_status_messages = ipw.HTML("")
 
-        self.structure_page_chooser = ResultsPageChooser(self.page_limit)
+        self.structure_page_chooser = ResultsPageChooser(
+            self.page_limit, load_more_pages=load_more_pages
+        )
         self.structure_page_chooser.observe(
             self._get_more_results, names=["page_link", "page_offset", "page_number"]
         )
+        self.load_more_pages = load_more_pages
+        self.structure_page_chooser.observe(
+            self._load_more_results, names="load_more_offset"
+        )
+
+        self.export_results = ResultsExporter(
+            get_query=lambda: self._latest_query, filename=self._export_filename
+        )
 
         for subpart in subparts_order:
             if not hasattr(self, subpart):
@@ -158,50 +241,137 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
     @traitlets.observe("database")
     def _on_database_select(self, _):
         """Load chosen database"""
+        # Any in-flight results are for the previously chosen database
+        self._executor.cancel("results")
+
         self.structure_drop.reset()
+        self._latest_query = None
+        self._page_buffer = None
+        self.export_results.reset()
 
         if (
             self.database[1] is None
             or getattr(self.database[1], "base_url", None) is None
         ):
+            self._executor.cancel("database")
             self.query_button.tooltip = "Search - No database chosen"
             self.freeze()
         else:
             self.offset = 0
             self.number = 1
             self.structure_page_chooser.silent_reset()
-            try:
-                self.freeze()
-
-                self.query_button.description = "Updating ..."
-                self.query_button.icon = "cog"
-                self.query_button.tooltip = "Updating filters ..."
-
-                self._set_intslider_ranges()
-                self._set_version()
-            except Exception as exc:  # pylint: disable=broad-except
-                LOGGER.error(
-                    "Exception raised during setting IntSliderRanges: %s",
-                    exc.with_traceback(),
-                )
-            finally:
+            self.freeze()
+
+            self.query_button.description = "Updating ..."
+            self.query_button.icon = "cog"
+            self.query_button.tooltip = "Updating filters ..."
+
+            database = self.database[1]
+            self._executor.run(
+                "database",
+                lambda token: self._retrieve_database_info(database, token),
+                functools.partial(self._on_database_info_retrieved, database),
+            )
+
+    def _retrieve_database_info(
+        self, database: LinksResourceAttributes, token: QueryToken
+    ) -> Tuple[dict, List[str], str]:
+        """Retrieve info needed for querying the chosen database
+
+        The `work` of `_on_database_select()`.
+
+        :return: The ranges for the range filters, the sortable fields, and the API version.
+        """
+        ranges = self._retrieve_intslider_ranges(database, token)
+        capabilities = CAPABILITY_MATRIX.get(database.base_url, token=token)
+        return ranges, capabilities.sortable, capabilities.api_version
+
+    def _on_database_info_retrieved(
+        self,
+        database: LinksResourceAttributes,
+        token: QueryToken,
+        result: Optional[Tuple[dict, List[str], str]],
+        exception: Optional[Exception],
+    ) -> None:
+        """Update filters for the chosen database (`done` of `_on_database_select()`)"""
+        try:
+            if exception is not None:
+                raise exception
+            token.check()
+
+            ranges, _, self.database_version = result
+            self.__cached_ranges[database.base_url] = ranges
+            LOGGER.debug(
+                "Updating range extrema for %s\nValues: %r",
+                database.base_url,
+                ranges,
+            )
+            self.filters.update_range_filters(ranges)
+        except QueryCancelled:
+            LOGGER.debug("Obsolete database selection: %r", token)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.error(
+                "Exception raised during setting IntSliderRanges:\n%s",
+                traceback.format_exc(),
+            )
+        finally:
+            if self._executor.finish(token):
+                # Otherwise a newer database selection is handling the widget
                 self.query_button.description = "Search"
                 self.query_button.icon = "search"
                 self.query_button.tooltip = "Search"
-                self.sort_selector.valid_fields = sorted(
-                    get_sortable_fields(self.database[1].base_url)
+                self.sort_selector.valid_fields = (
+                    result[1]
+                    if result is not None
+                    else sorted(get_sortable_fields(database.base_url))
                 )
                 self.unfreeze()
 
+    @traitlets.observe("databases", "child_databases")
+    def _on_count_databases_change(self, _):
+        """Only allow counting results if there are databases to count in"""
+        self.count_button.disabled = (
+            self.query_button.disabled or not self._count_databases()
+        )
+
+    @traitlets.observe("databases")
+    def _on_databases_select(self, change):
+        """Update search button for (not) searching multiple databases"""
+        if change["new"]:
+            self.query_button.tooltip = f"Search {len(change['new'])} databases"
+        elif self.database[1] is not None:
+            self.query_button.tooltip = "Search"
+        else:
+            self.query_button.tooltip = "Search - No database chosen"
+
     def _on_structure_select(self, change):
         """Update structure trait with chosen structure dropdown value"""
         chosen_structure = change["new"]
+        self.results_grid.select(self.structure_drop.index)
         if chosen_structure is None:
             self.structure = None
             with self.hold_trait_notifications():
                 self.structure_drop.index = 0
         else:
+            # The structure is only validated and built when first chosen
+            if "structure" not in chosen_structure:
+                try:
+                    chosen_structure["structure"] = Structure(
+                        check_species_mass(chosen_structure["entry"])
+                    )
+                except Exception as exc:  # pylint: disable=broad-except
+                    LOGGER.error(
+                        "Could not parse structure %s: %r", chosen_structure["id"], exc
+                    )
+                    chosen_structure["structure"] = None
+                    chosen_structure[
+                        "error"
+                    ] = f"Could not parse structure {chosen_structure['id']}: {exc}"
             self.structure = chosen_structure["structure"]
+            if self.structure is None:
+                self.error_or_status_messages.value = (
+                    f'<span style="color:red;">{chosen_structure["error"]}</span>'
+                )
 
     def _get_more_results(self, change):
         """Query for more results according to pageing"""
@@ -222,68 +392,239 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
         )
         if change["name"] == "page_offset":
             self.offset = pageing
+            self._view_offset = pageing
             pageing = None
         elif change["name"] == "page_number":
             self.number = pageing
+            self._view_offset = (pageing - 1) * self.page_limit
             pageing = None
         else:
             # It is needed to update page_offset, but we do not wish to query again
             with self.hold_trait_notifications():
                 self.__perform_query = False
-                self.structure_page_chooser.update_offset()
+                self.offset = self.structure_page_chooser.update_offset()
+            # The position of the linked page, for the adaptive page and counts
+            self._view_offset = self.offset
+            self.number = self.offset // self.page_limit + 1
+
+        # Freeze and disable list of structures in dropdown widget
+        # We don't want changes leading to weird things happening prior to the query ending
+        self.freeze()
+
+        # Update button text and icon
+        self.query_button.description = "Updating ... "
+        self.query_button.icon = "cog"
+        self.query_button.tooltip = "Please wait ..."
+
+        query = self._query_snapshot()
+        self._executor.run(
+            "results",
+            lambda token: self._retrieve_more_results(query, pageing, token),
+            functools.partial(self._on_more_results_retrieved, query),
+            progress=self._show_progress,
+        )
 
-        try:
-            # Freeze and disable list of structures in dropdown widget
-            # We don't want changes leading to weird things happening prior to the query ending
-            self.freeze()
+    def _retrieve_more_results(
+        self, query: dict, pageing: Optional[str], token: QueryToken
+    ) -> Tuple[dict, Optional[list]]:
+        """Query database for a new page of results (`work` of `_get_more_results()`)"""
+        response = self._query(query, link=pageing, token=token)
+        msg, _ = handle_errors(response)
+        token.check()
+        if msg:
+            return response, None
 
-            # Update button text and icon
-            self.query_button.description = "Updating ... "
-            self.query_button.icon = "cog"
-            self.query_button.tooltip = "Please wait ..."
+        return response, self._parse_structures(response["data"])
 
-            # Query database
-            response = self._query(pageing)
+    def _on_more_results_retrieved(
+        self,
+        query: dict,
+        token: QueryToken,
+        result: Optional[Tuple[dict, Optional[list]]],
+        exception: Optional[Exception],
+    ) -> None:
+        """Update widget with a new page of results (`done` of `_get_more_results()`)"""
+        self._clear_progress(token)
+        try:
+            if exception is not None:
+                raise exception
+            token.check()
+
+            self._page_buffer = query["page_buffer"]
+            response, structures = result
             msg, _ = handle_errors(response)
             if msg:
                 self.error_or_status_messages.value = msg
                 return
+            self._show_skipped(query)
 
             # Update list of structures in dropdown widget
-            self._update_structures(response["data"])
+            self.structure_drop.set_options(structures)
 
             # Update pageing
             self.structure_page_chooser.set_pagination_data(
                 links_to_page=response.get("links", {}),
             )
 
+        except QueryCancelled:
+            LOGGER.debug("Obsolete pageing query: %r", token)
+
         finally:
-            self.query_button.description = "Search"
-            self.query_button.icon = "search"
-            self.query_button.tooltip = "Search"
-            self.unfreeze()
+            if self._executor.finish(token):
+                # Otherwise a newer action is handling the widget
+                self.query_button.description = "Search"
+                self.query_button.icon = "search"
+                self.query_button.tooltip = "Search"
+                self.unfreeze()
+
+    def _load_more_results(self, change):
+        """Load the next pages of results into the current view"""
+        offset: Optional[int] = change["new"]
+        if offset is None:
+            return
+
+        LOGGER.debug(
+            "Loading %d pages of results from offset %d", self.load_more_pages, offset
+        )
+
+        # Freeze and disable list of structures in dropdown widget
+        # We don't want changes leading to weird things happening prior to the query ending
+        self.freeze()
+
+        # Update button text and icon
+        self.query_button.description = "Updating ... "
+        self.query_button.icon = "cog"
+        self.query_button.tooltip = "Please wait ..."
+
+        query = self._query_snapshot()
+        self._executor.run(
+            "results",
+            lambda token: self._retrieve_pages(query, offset, token),
+            functools.partial(self._on_pages_retrieved, query),
+            progress=self._show_progress,
+        )
+
+    def _retrieve_pages(
+        self, query: dict, offset: int, token: QueryToken
+    ) -> Tuple[dict, list]:
+        """Retrieve several pages concurrently (`work` of `_load_more_results()`)"""
+        response = fetch_pages(
+            self._query_parameters(query, skipped=query["skipped"], token=token),
+            offset=offset,
+            number_of_pages=self.load_more_pages,
+            page_limit=self.page_limit,
+            token=token,
+        )
+        token.check()
+        return response, self._parse_structures(response["data"])
+
+    def _on_pages_retrieved(
+        self,
+        query: dict,
+        token: QueryToken,
+        result: Optional[Tuple[dict, list]],
+        exception: Optional[Exception],
+    ) -> None:
+        """Add the loaded results to the current view (`done` of `_load_more_results()`)"""
+        self._clear_progress(token)
+        try:
+            if exception is not None:
+                raise exception
+            token.check()
+
+            response, structures = result
+            msg, _ = handle_errors(response)
+            if msg:
+                self.error_or_status_messages.value = msg
+            else:
+                self._show_skipped(query)
+
+            # Add successfully retrieved pages, even if a later page failed
+            self.structure_drop.add_options(structures)
+            self.structure_page_chooser.extend_view(
+                math.ceil(len(structures) / self.page_limit)
+            )
+
+        except QueryCancelled:
+            LOGGER.debug("Obsolete loading of more results: %r", token)
+
+        finally:
+            if self._executor.finish(token):
+                # Otherwise a newer action is handling the widget
+                self.structure_page_chooser.load_more_offset = None
+                self.query_button.description = "Search"
+                self.query_button.icon = "search"
+                self.query_button.tooltip = "Search"
+                self.unfreeze()
 
     def _sort(self, change: dict) -> None:
         """Perform new query with new sorting"""
         sort = change["new"]
         self.sorting = sort
-        self.retrieve_data({})
+        if not self._sort_locally(sort):
+            self.retrieve_data({})
+
+    def _sort_locally(self, sort: Optional[str]) -> bool:
+        """Sort the results without querying, if all of them are already loaded
+
+        :return: Whether the results were sorted.
+        """
+        options = [_ for _ in self.structure_drop.options if _[1] is not None]
+        if (
+            not sort
+            or self.databases
+            or self._latest_query is None
+            or not options
+            or len(options) != self.structure_page_chooser.data_returned
+        ):
+            return False
+
+        key = sort_key(sort)
+        options.sort(
+            key=lambda option: key((None, option[1]["entry"])),
+            reverse=sort.startswith("-"),
+        )
+        chosen = self.structure_drop.value
+        self.structure_drop.set_options(options)
+        if chosen is not None:
+            self.structure_drop.value = chosen
+        self._latest_query["sort"] = sort
+        self._page_buffer = None
+        LOGGER.debug("Sorted %d loaded results locally by %r", len(options), sort)
+        return True
+
+    def _on_structure_options(self, change: dict) -> None:
+        """Show the results in the results grid"""
+        self.results_grid.set_options(change["new"])
+        self.results_grid.select(self.structure_drop.index)
+
+    def _on_grid_select(self, change: dict) -> None:
+        """Choose the structure chosen in the results grid"""
+        if change["new"] is not None and change["new"] != self.structure_drop.index:
+            self.structure_drop.index = change["new"]
 
     def freeze(self):
         """Disable widget"""
         self.query_button.disabled = True
+        self.count_button.disabled = True
         self.filters.freeze()
         self.structure_drop.freeze()
+        self.results_grid.freeze()
         self.structure_page_chooser.freeze()
         self.sort_selector.freeze()
+        self.export_results.freeze()
 
     def unfreeze(self):
         """Activate widget (in its current state)"""
         self.query_button.disabled = False
+        self.count_button.disabled = not self._count_databases()
         self.filters.unfreeze()
         self.structure_drop.unfreeze()
+        self.results_grid.unfreeze()
         self.structure_page_chooser.unfreeze()
         self.sort_selector.unfreeze()
+        if self._latest_query is not None:
+            self.export_results.unfreeze()
 
     def reset(self):
         """Reset widget"""
@@ -292,78 +633,38 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
         with self.hold_trait_notifications():
             self.query_button.disabled = False
             self.query_button.tooltip = "Search - No database chosen"
+            self.count_button.disabled = True
+            self.hit_counts_table.value = ""
             self.filters.reset()
             self.structure_drop.reset()
+            self.results_grid.reset()
             self.structure_page_chooser.reset()
             self.sort_selector.reset()
-
-    def _uses_new_structure_features(self) -> bool:
-        """Check whether self.database_version is >= v1.0.0-rc.2"""
-        critical_version = SemanticVersion("1.0.0-rc.2")
-        version = SemanticVersion(self.database_version)
-
-        LOGGER.debug("Semantic version: %r", version)
-
-        if version.base_version > critical_version.base_version:
-            return True
-
-        if version.base_version == critical_version.base_version:
-            if version.prerelease:
-                return version.prerelease >= critical_version.prerelease
-
-            # Version is bigger than critical version and is not a pre-release
-            return True
-
-        # Major.Minor.Patch is lower than critical version
-        return False
-
-    def _set_version(self):
-        """Set self.database_version from an /info query"""
-        base_url = self.database[1].base_url
-        if base_url not in self.__cached_versions:
-            # Retrieve and cache version
-            response = perform_optimade_query(
-                base_url=self.database[1].base_url, endpoint="/info"
-            )
-            msg, _ = handle_errors(response)
-            if msg:
-                raise QueryError(msg)
-
-            if "meta" not in response:
-                raise QueryError(
-                    f"'meta' field not found in /info endpoint for base URL: {base_url}"
-                )
-            if "api_version" not in response["meta"]:
-                raise QueryError(
-                    f"'api_version' field not found in 'meta' for base URL: {base_url}"
-                )
-
-            version = response["meta"]["api_version"]
-            if version.startswith("v"):
-                version = version[1:]
-            self.__cached_versions[base_url] = version
-            LOGGER.debug(
-                "Cached version %r for base URL: %r",
-                self.__cached_versions[base_url],
-                base_url,
-            )
-
-        self.database_version = self.__cached_versions[base_url]
-
-    def _set_intslider_ranges(self):
-        """Update IntRangeSlider ranges according to chosen database
-
-        Query database to retrieve ranges.
-        Cache ranges in self.__cached_ranges.
+            self.export_results.reset()
+        self._latest_query = None
+
+    def _export_filename(self, _) -> str:
+        """Base filename for exporting all results of the latest query"""
+        name = "".join(
+            char if char.isalnum() else "_" for char in self.database[0].lower()
+        ).strip("_")
+        return f"optimade_export_{name or 'results'}"
+
+    def _retrieve_intslider_ranges(
+        self, database: LinksResourceAttributes, token: QueryToken = None
+    ) -> dict:
+        """Retrieve IntRangeSlider ranges according to chosen database
+
+        Query database to retrieve ranges not already cached in self.__cached_ranges.
+        The cache is updated by `_on_database_info_retrieved()`.
         """
         defaults = {
             "nsites": {"min": 0, "max": 10000},
             "nelements": {"min": 0, "max": len(CHEMICAL_SYMBOLS)},
         }
 
-        db_base_url = self.database[1].base_url
-        if db_base_url not in self.__cached_ranges:
-            self.__cached_ranges[db_base_url] = {}
+        db_base_url = database.base_url
+        ranges = dict(self.__cached_ranges.get(db_base_url, {}))
 
         sortable_fields = check_entry_properties(
             base_url=db_base_url,
@@ -373,7 +674,7 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
         )
 
         for response_field in sortable_fields:
-            if response_field in self.__cached_ranges[db_base_url]:
+            if response_field in ranges:
                 # Use cached value(s)
                 continue
 
@@ -389,10 +690,11 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
                     "page_limit": page_limit,
                     "response_fields": response_field,
                     "sort": sort,
+                    "token": token,
                 }
                 LOGGER.debug(
                     "Querying %s to get %s of %s.\nParameters: %r",
-                    self.database[0],
+                    database.name,
                     extremum,
                     response_field,
                     query_params,
@@ -412,69 +714,267 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
                         .get(response_field, None)
                     )
 
-            # Cache new values
             LOGGER.debug(
-                "Caching newly found range values for %s\nValue: %r",
+                "Found new range values for %s\nValue: %r",
                 db_base_url,
                 {response_field: new_range},
             )
-            self.__cached_ranges[db_base_url].update({response_field: new_range})
+            ranges[response_field] = new_range
 
-        if not self.__cached_ranges[db_base_url]:
-            LOGGER.debug("No values found for %s, storing default values.", db_base_url)
-            self.__cached_ranges[db_base_url].update(
-                {
-                    "nsites": {"min": 0, "max": 10000},
-                    "nelements": {"min": 0, "max": len(CHEMICAL_SYMBOLS)},
-                }
+        if not ranges:
+            LOGGER.debug("No values found for %s, using default values.", db_base_url)
+            ranges.update(defaults)
+
+        return ranges
+
+    def _query(self, query: dict, link: str = None, token: QueryToken = None) -> dict:
+        """Query helper function
+
+        :param query: Snapshot of the query (see `_query_snapshot()`).
+            The keyword arguments sent to `perform_optimade_query()` are stored as
+            `"queries"`, unless already given.
+        """
+        if query.get("queries") is None:
+            query["queries"] = self._query_parameters(
+                query, skipped=query["skipped"], token=token
             )
+        queries = query["queries"]
+        if self._page_limit_tuner is not None and link is None:
+            return self._query_adaptive(query, token=token)
 
-        # Set widget's new extrema
-        LOGGER.debug(
-            "Updating range extrema for %s\nValues: %r",
-            db_base_url,
-            self.__cached_ranges[db_base_url],
+        offset = query["view_offset"]
+        last_page = self._page_cursors.last_page(
+            queries, offset, query["data_returned"]
         )
-        self.filters.update_range_filters(self.__cached_ranges[db_base_url])
+        if last_page and self._page_limit_tuner is None:
+            response = perform_optimade_query(**dict(queries, **last_page), token=token)
+            if (
+                "errors" not in response
+                and len(response.get("data", [])) == last_page["page_limit"]
+            ):
+                response["data"].reverse()
+                # The links refer to the reversed order
+                response["links"] = {}
+                return response
+            LOGGER.debug("Reversed retrieval of the last page failed, using pageing.")
 
-    def _query(self, link: str = None) -> dict:
-        """Query helper function"""
         # If a complete link is provided, use it straight up
         if link is not None:
-            try:
-                link = ordered_query_url(link)
-                response = SESSION.get(link, timeout=TIMEOUT_SECONDS)
-                if response.from_cache:
-                    LOGGER.debug("Request to %s was taken from cache !", link)
-                response = response.json()
-            except (
-                requests.exceptions.ConnectTimeout,
-                requests.exceptions.ConnectionError,
-                requests.exceptions.ReadTimeout,
-            ) as exc:
-                response = {
-                    "errors": {
-                        "msg": "CLIENT: Connection error or timeout.",
-                        "url": link,
-                        "Exception": repr(exc),
-                    }
-                }
-            except JSONDecodeError as exc:
-                response = {
-                    "errors": {
-                        "msg": "CLIENT: Could not decode response to JSON.",
-                        "url": link,
-                        "Exception": repr(exc),
-                    }
-                }
-            return response
+            return perform_optimade_link_query(link, token=token)
+
+        cursor = self._page_cursors.get(queries, offset)
+        if cursor:
+            cursor_queries = {
+                key: value
+                for key, value in queries.items()
+                if key not in ("page_offset", "page_number")
+            }
+            cursor_queries.update(cursor)
+            LOGGER.debug(
+                "Parameters (excluding filter) sent to query util func: %s",
+                {
+                    key: value
+                    for key, value in cursor_queries.items()
+                    if key != "filter"
+                },
+            )
+            response = perform_optimade_query(**cursor_queries, token=token)
+            if self._page_cursors.record(queries, offset, response, cursor=cursor):
+                return response
+            LOGGER.debug("Cursor pagination failed, using offset-pagination instead.")
+
+        LOGGER.debug(
+            "Parameters (excluding filter) sent to query util func: %s",
+            {key: value for key, value in queries.items() if key != "filter"},
+        )
+
+        response = perform_optimade_query(**queries, token=token)
+        self._page_cursors.record(queries, offset, response)
+        return response
+
+    def _query_adaptive(self, query: dict, token: QueryToken = None) -> dict:
+        """Query helper function using an adaptive page limit
+
+        The current view of `self.page_limit` entries is served from the latest retrieved
+        page if it contains it, otherwise the page containing it is queried.
+        If the database serves fewer entries per page than shown in the view, the following
+        pages are retrieved as well, until the view is covered.
+        The retrieved page is kept in a compact `PageStore`, stored as the `"page_buffer"`
+        of the snapshot `query`.
+        Pagination links are removed, since they refer to pages of the adaptive size.
+        """
+        queries = {
+            key: value
+            for key, value in query["queries"].items()
+            if key not in ("page_limit", "page_offset", "page_number")
+        }
+        offset = query["view_offset"]
+
+        buffer = query["page_buffer"]
+        if buffer is not None and buffer["query"] == queries:
+            buffer_end = buffer["start"] + len(buffer["data"])
+            data_returned = buffer["meta"].get("data_returned", buffer_end)
+            if not (
+                buffer["start"] <= offset < buffer_end
+                and (
+                    offset + self.page_limit <= buffer_end
+                    or buffer_end >= data_returned
+                )
+            ):
+                buffer = None
+        else:
+            buffer = None
+
+        if buffer is None:
+            LOGGER.debug(
+                "Parameters (excluding filter) sent to adaptive query: %s",
+                {key: value for key, value in queries.items() if key != "filter"},
+            )
+            response, _, page_offset = self._page_limit_tuner.perform_query(
+                offset=offset, multiple_of=self.page_limit, token=token, **queries
+            )
+            if "data" not in response:
+                return response
+
+            data = response["data"]
+            view_end = offset + self.page_limit
+            data_returned = response.get("meta", {}).get("data_returned")
+            if data_returned is not None:
+                view_end = min(view_end, data_returned)
+            if 0 < len(data) < view_end - page_offset:
+                # The database serves fewer entries per page than shown in the view (e.g.,
+                # its maximum page limit is lower), retrieve the following pages as well
+                following = fetch_pages(
+                    queries,
+                    offset=page_offset + len(data),
+                    number_of_pages=math.ceil(
+                        (view_end - page_offset - len(data)) / len(data)
+                    ),
+                    page_limit=len(data),
+                    token=token,
+                )
+                if "errors" in following:
+                    return following
+                data = data + following["data"]
+
+            buffer = {
+                "query": queries,
+                "start": page_offset,
+                "data": PageStore(data),
+                "meta": response.get("meta", {}),
+            }
+            query["page_buffer"] = buffer
+        else:
+            LOGGER.debug("Serving results %d+ from the latest retrieved page.", offset)
+
+        start = offset - buffer["start"]
+        return {
+            "data": buffer["data"][start : start + self.page_limit],
+            "meta": buffer["meta"],
+            "links": {},
+        }
+
+    def _count_results(self, queries: dict, token: QueryToken = None) -> Optional[dict]:
+        """Retrieve and show the number of results prior to retrieving the full page
+
+        Only the `id` of a single entry is requested, making it a single fast round-trip.
+        Errors are ignored here, since they will be reported by the full query.
+
+        :param queries: Keyword arguments for `perform_optimade_query()` of the full query.
+        :return: The count response, or `None` if the number of results is unknown.
+        """
+        queries = dict(queries)
+        queries.update(
+            {
+                "response_fields": "id",
+                "page_limit": 1,
+                "page_offset": None,
+                "page_number": None,
+                "sort": None,
+            }
+        )
+        response = perform_optimade_query(**queries, token=token)
+        msg, _ = handle_errors(response)
+        if token is not None:
+            token.check()
+
+        data_returned = response.get("meta", {}).get("data_returned", None)
+        if msg or data_returned is None:
+            LOGGER.debug("Could not count results prior to the full query: %s", msg)
+            return None
+
+        self._executor.call_soon(token, self._show_count, response["meta"])
+        return response
+
+    def _show_count(self, meta: dict) -> None:
+        """Show the number of results from the `meta` of the count query"""
+        if self._data_available is None:
+            self._data_available = meta.get("data_available", None)
+        self.structure_page_chooser.set_pagination_data(
+            data_returned=meta["data_returned"],
+            data_available=self._data_available,
+            reset_cache=True,
+        )
+        # The page chooser must stay frozen until the full page has been retrieved
+        self.structure_page_chooser.freeze()
+        if meta["data_returned"]:
+            self.structure_drop.set_loading(meta["data_returned"])
+
+    def _query_snapshot(self) -> dict:
+        """Snapshot of the widget state defining the current query
+
+        It is taken on the kernel's event loop when starting an action, since the `work` of
+        the action runs in a thread and must not read the widgets.
+        Likewise, the `work` only updates the snapshot (e.g., its `"page_buffer"`), which is
+        applied to the widget by the `done` of the action.
+        """
+        return {
+            "database": self.database[1],
+            "databases": list(self.databases),
+            "filter": self.filters.collect_value(),
+            "sort": self.sorting,
+            "page_offset": self.offset,
+            "page_number": self.number,
+            "view_offset": self._view_offset,
+            "data_returned": self.structure_page_chooser.data_returned,
+            "page_buffer": self._page_buffer,
+            "queries": None,
+            "skipped": [],
+        }
+
+    def _query_parameters(
+        self,
+        query: dict,
+        database: LinksResourceAttributes = None,
+        skipped: List[str] = None,
+        token: QueryToken = None,
+    ) -> dict:
+        """Keyword arguments for `perform_optimade_query()` for the query
+
+        The query is adapted to the capabilities of the database
+        (see `optimade_client.capabilities`), skipping filter conditions and sorts it
+        cannot serve.
+        The caller must let the user know about these, since the results of the adapted
+        query may be a superset of the requested results.
+
+        :param query: Snapshot of the query (see `_query_snapshot()`).
+        :param database: Database to query (default: the chosen database).
+        :param skipped: Extended with the filtered properties and sort that were skipped.
+        """
+        base_url = (database or query["database"]).base_url
+        capabilities = CAPABILITY_MATRIX.get(base_url, token=token)
+        skipped = skipped if skipped is not None else []
 
         # Avoid structures with null positions and with assemblies.
         add_to_filter = 'NOT structure_features HAS ANY "assemblies"'
-        if not self._uses_new_structure_features():
+        if not capabilities.uses_new_structure_features:
             add_to_filter += ',"unknown_positions"'
+        if not capabilities.can_query("structure_features"):
+            skipped.append("structure_features")
+            add_to_filter = ""
 
-        optimade_filter = self.filters.collect_value()
+        optimade_filter, skipped_fields = capabilities.adapt_filter(query["filter"])
+        skipped.extend(skipped_fields)
         optimade_filter = (
             "( {} ) AND ( {} )".format(optimade_filter, add_to_filter)
             if optimade_filter and add_to_filter
@@ -482,55 +982,53 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
         )
         LOGGER.debug("Querying with filter: %s", optimade_filter)
 
+        sort = query["sort"]
+        if not capabilities.can_sort(sort):
+            skipped.append(f"sort={sort}")
+            sort = None
+
         # OPTIMADE queries
-        queries = {
-            "base_url": self.database[1].base_url,
-            "filter": optimade_filter,
-            "page_limit": self.page_limit,
-            "page_offset": self.offset,
-            "page_number": self.number,
-            "sort": self.sorting,
-        }
-        LOGGER.debug(
-            "Parameters (excluding filter) sent to query util func: %s",
-            {key: value for key, value in queries.items() if key != "filter"},
+        return capabilities.adapt_pageing(
+            {
+                "base_url": base_url,
+                "filter": optimade_filter,
+                "page_limit": self.page_limit,
+                "page_offset": query["page_offset"],
+                "page_number": query["page_number"],
+                "sort": sort,
+            }
         )
 
-        return perform_optimade_query(**queries)
+    def _parse_structures(self, data: list, source: str = None) -> list:
+        """Create structures dropdown options from response data
 
-    @staticmethod
-    def _check_species_mass(structure: dict) -> dict:
-        """Ensure species.mass is using OPTIMADE API v1.0.1 type"""
-        if structure.get("attributes", {}).get("species", False):
-            for species in structure["attributes"][
-                "species"
-            ] or species_from_species_at_sites(
-                structure["attributes"]["species_at_sites"]
-            ):
-                if not isinstance(species.get("mass", None), (list, type(None))):
-                    species.pop("mass", None)
-        return structure
+        The options hold the `id`, formula, derived `properties` (computed for the whole page
+        at once, see `optimade_client.properties`) and raw `entry` of each structure.
+        The `Structure` is only built once an option is chosen, and is then kept in the option
+        as `structure` (`None` if it could not be built, with the reason as `error`).
 
-    def _update_structures(self, data: list):
-        """Update structures dropdown from response data"""
+        :param source: Name of the database the data is from, tagging each option.
+        """
         structures = []
+        properties = derived_properties(data)
 
-        for entry in data:
+        for index, entry in enumerate(data):
             # XXX: THIS IS TEMPORARY AND SHOULD BE REMOVED ASAP
             entry["attributes"]["chemical_formula_anonymous"] = None
 
-            structure = Structure(self._check_species_mass(entry))
-
-            formula = structure.attributes.chemical_formula_descriptive
-            if formula is None:
-                formula = structure.attributes.chemical_formula_reduced
-            if formula is None:
-                formula = structure.attributes.chemical_formula_anonymous
-            if formula is None:
-                formula = structure.attributes.chemical_formula_hill
-            if formula is None:
+            attributes = entry["attributes"]
+            for field in (
+                "chemical_formula_descriptive",
+                "chemical_formula_reduced",
+                "chemical_formula_anonymous",
+                "chemical_formula_hill",
+            ):
+                formula = attributes.get(field)
+                if formula is not None:
+                    break
+            else:
                 raise BadResource(
-                    resource=structure,
+                    resource=Structure(check_species_mass(entry)),
                     fields=[
                         "chemical_formula_descriptive",
                         "chemical_formula_reduced",
@@ -541,39 +1039,151 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
                     "should have a valid value",
                 )
 
-            entry_name = f"{formula} (id={structure.id})"
-            structures.append((entry_name, {"structure": structure}))
+            entry_name = f"{formula} (id={entry['id']})"
+            if source:
+                entry_name = f"[{source}] {entry_name}"
+            structures.append(
+                (
+                    entry_name,
+                    {
+                        "id": entry["id"],
+                        "formula": formula,
+                        "properties": {
+                            name: float(values[index])
+                            for name, values in properties.items()
+                        },
+                        "entry": entry,
+                    },
+                )
+            )
 
-        # Update list of structures in dropdown widget
-        self.structure_drop.set_options(structures)
+        return structures
+
+    def _show_progress(self, seconds: float) -> None:
+        """Show the progress of a query running in the background"""
+        self.error_or_status_messages.value = (
+            '<i class="fa fa-spinner fa-pulse"></i> '
+            f"Querying {self.database[0]} ... ({seconds:.1f} s)"
+        )
+
+    def _clear_progress(self, token: QueryToken) -> None:
+        """Remove the progress shown by `_show_progress()`"""
+        if self._executor.is_current(token) and self.error_or_status_messages.value:
+            self.error_or_status_messages.value = ""
+
+    def _show_skipped(self, query: dict) -> None:
+        """Show the filter conditions and sort the database could not serve, if any"""
+        if query["skipped"]:
+            self.error_or_status_messages.value = (
+                f'<font color="orange">{query["database"].name} cannot serve the query '
+                "fully, the results are not restricted by the unsupported: "
+                f"{', '.join(query['skipped'])}</font>"
+            )
 
     def retrieve_data(self, _):
         """Perform query and retrieve data"""
         self.offset = 0
         self.number = 1
-        try:
-            # Freeze and disable list of structures in dropdown widget
-            # We don't want changes leading to weird things happening prior to the query ending
-            self.freeze()
+        self._view_offset = 0
+        self._page_buffer = None
+
+        # Freeze and disable list of structures in dropdown widget
+        # We don't want changes leading to weird things happening prior to the query ending
+        self.freeze()
+
+        # Reset the error or status message
+        if self.error_or_status_messages.value:
+            self.error_or_status_messages.value = ""
+
+        # Update button text and icon
+        self.query_button.description = "Querying ... "
+        self.query_button.icon = "cog"
+        self.query_button.tooltip = "Please wait ..."
+
+        if self.databases:
+            # Paging and exporting are only supported for a single database
+            self._latest_query = None
+            self._federated_count = 0
+            self.structure_page_chooser.reset()
+            query = self._query_snapshot()
+            self._executor.run(
+                "results",
+                lambda token: self._retrieve_federated(query, token),
+                self._on_federated_retrieved,
+            )
+            return
 
-            # Reset the error or status message
-            if self.error_or_status_messages.value:
-                self.error_or_status_messages.value = ""
+        query = self._query_snapshot()
+        self._executor.run(
+            "results",
+            lambda token: self._retrieve_data(query, token),
+            functools.partial(self._on_data_retrieved, query),
+            progress=self._show_progress,
+        )
 
-            # Update button text and icon
-            self.query_button.description = "Querying ... "
-            self.query_button.icon = "cog"
-            self.query_button.tooltip = "Please wait ..."
+    def _retrieve_data(
+        self, query: dict, token: QueryToken
+    ) -> Tuple[dict, Optional[list]]:
+        """Query database for the first page of results (`work` of `retrieve_data()`)"""
+        query["queries"] = self._query_parameters(
+            query, skipped=query["skipped"], token=token
+        )
 
-            # Query database
-            response = self._query()
+        # Show the number of results as early as possible.
+        # If there are none, there is no need to query for the full page.
+        count = self._count_results(query["queries"], token=token)
+        if count is not None and count["meta"]["data_returned"] == 0:
+            response = {"data": [], "meta": count["meta"], "links": {}}
+        else:
+            response = self._query(query, token=token)
+        msg, _ = handle_errors(response)
+        token.check()
+        if msg:
+            return response, None
+
+        if self._page_limit_tuner is not None:
+            # Export using the largest pages the database serves
+            query["queries"] = dict(
+                query["queries"],
+                page_limit=self._page_limit_tuner.bounds(
+                    query["queries"]["base_url"], token=token
+                )[1],
+            )
+        return response, self._parse_structures(response["data"])
+
+    def _on_data_retrieved(
+        self,
+        query: dict,
+        token: QueryToken,
+        result: Optional[Tuple[dict, Optional[list]]],
+        exception: Optional[Exception],
+    ) -> None:
+        """Update widget with the first page of results (`done` of `retrieve_data()`)"""
+        self._clear_progress(token)
+        try:
+            if exception is not None:
+                raise exception
+            token.check()
+
+            response, structures = result
             msg, _ = handle_errors(response)
             if msg:
                 self.error_or_status_messages.value = msg
                 raise QueryError(msg)
 
             # Update list of structures in dropdown widget
-            self._update_structures(response["data"])
+            self._page_buffer = query["page_buffer"]
+            self.structure_drop.set_options(structures)
+
+            # Store the query sent (first page) to be able to export all results
+            self._latest_query = query["queries"]
+            if query["skipped"]:
+                LOGGER.warning(
+                    "%s cannot serve the query fully. Skipped: %s",
+                    query["database"].base_url,
+                    ", ".join(query["skipped"]),
+                )
+                self._show_skipped(query)
 
             # Update pageing
             if self._data_available is None:
@@ -590,18 +1200,352 @@ class OptimadeQueryFilterWidget(  # pylint: disable=too-many-instance-attributes
                 reset_cache=True,
             )
 
+        except QueryCancelled:
+            LOGGER.debug("Obsolete query: %r", token)
+
         except QueryError:
             self.structure_drop.reset()
             self.structure_page_chooser.reset()
+            self._latest_query = None
             raise
 
         except Exception as exc:
             self.structure_drop.reset()
             self.structure_page_chooser.reset()
+            self._latest_query = None
             raise QueryError(f"Bad stuff happened: {traceback.format_exc()}") from exc
 
         finally:
-            self.query_button.description = "Search"
-            self.query_button.icon = "search"
-            self.query_button.tooltip = "Search"
-            self.unfreeze()
+            if self._executor.finish(token):
+                # Otherwise a newer action is handling the widget
+                self.query_button.description = "Search"
+                self.query_button.icon = "search"
+                self.query_button.tooltip = "Search"
+                self.unfreeze()
+
+    def _show_federated_status(self, status: Dict[str, str], running: bool = True):
+        """Show the status of each database in a federated search"""
+        spinner = '<i class="fa fa-spinner fa-pulse"></i> ' if running else ""
+        databases = "".join(
+            f"<li><strong>{name}</strong>: {text}</li>" for name, text in status.items()
+        )
+        self.error_or_status_messages.value = (
+            f"{spinner}Searching {len(status)} databases"
+            f'<ul style="margin-top:0px;">{databases}</ul>'
+        )
+
+    def _add_federated_results(self, structures: list) -> None:
+        """Add results from a database in a federated search to the dropdown"""
+        if not structures:
+            return
+        self._federated_count += len(structures)
+        if self._federated_count > len(structures):
+            self.structure_drop.add_options(structures)
+        else:
+            self.structure_drop.set_options(structures)
+        self.structure_page_chooser.text.value = (
+            f"Showing {self._federated_count} results"
+        )
+
+    def _retrieve_federated(self, query: dict, token: QueryToken) -> Dict[str, str]:
+        """Query all chosen databases concurrently (`work` of `retrieve_data()`)
+
+        Without sorting, results and status are shown per database as they arrive.
+        With sorting, the sorted results of all databases are merged into a single, globally
+        sorted list of `page_limit` results, retrieving only as many pages per database as
+        needed (see `optimade_client.federated.merge_sorted_entries`).
+        In both cases, structures already found in another database (or on the same page)
+        are only shown once (see `optimade_client.dedup`).
+
+        :return: The final status of each database.
+        """
+        databases = query["databases"]
+        status = {name: "Querying ..." for name, _ in databases}
+        self._executor.call_soon(token, self._show_federated_status, dict(status))
+
+        # When merging, each database initially contributes an equal share of the results
+        sort = query["sort"]
+        page_limit = (
+            math.ceil(self.page_limit / len(databases)) if sort else self.page_limit
+        )
+        queries_by_url = {}
+        skipped_by_url = {}
+
+        def _queries(database: LinksResourceAttributes) -> dict:
+            skipped = skipped_by_url.setdefault(database.base_url, [])
+            queries = self._query_parameters(
+                query, database=database, skipped=skipped, token=token
+            )
+            if sort and queries["sort"] is None:
+                # The results of this database cannot be merged
+                raise QueryError(f"The database cannot sort by {sort.lstrip('-')!r}")
+            queries["page_limit"] = page_limit
+            queries_by_url[database.base_url] = queries
+            return queries
+
+        duplicates = DuplicateIndex()
+        sources = {}
+        for name, database, response in iter_federated_search(
+            databases, _queries, token=token
+        ):
+            msg, _ = handle_errors(response)
+            if msg:
+                status[name] = f'<span style="color:red;">{msg}</span>'
+            elif sort:
+                sources[name] = (queries_by_url[database.base_url], response)
+                status[name] = "Sorting ..."
+            else:
+                new = duplicates.add_page(name, response["data"])
+                structures = self._parse_federated(name, new, status)
+                if structures is not None:
+                    data_returned = response.get("meta", {}).get(
+                        "data_returned", len(response["data"])
+                    )
+                    status[
+                        name
+                    ] = f"Showing {len(structures)} of {data_returned} results"
+                    if len(new) < len(response["data"]):
+                        status[name] += (
+                            f" ({len(response['data']) - len(new)} already found in "
+                            "other databases)"
+                        )
+                    self._executor.call_soon(
+                        token, self._add_federated_results, structures
+                    )
+            if skipped_by_url.get(database.base_url):
+                status[name] += (
+                    " (skipped unsupported: "
+                    f"{', '.join(skipped_by_url[database.base_url])})"
+                )
+            self._executor.call_soon(token, self._show_federated_status, dict(status))
+
+        if sources:
+            pages = {}
+            errors = {}
+            entries = list(
+                itertools.islice(
+                    merge_sorted_entries(
+                        sources,
+                        sort,
+                        page_limit,
+                        token=token,
+                        pages=pages,
+                        errors=errors,
+                    ),
+                    self.page_limit,
+                )
+            )
+            token.check()
+
+            merged = {name: [] for name in sources}
+            for name, entry in entries:
+                merged[name].append(entry)
+            new = {name: [] for name in sources}
+            order = []
+            for name, entry, group in duplicates.add_entries(entries):
+                new[name].append((entry, group))
+                order.append((name, entry["id"]))
+
+            structures = {}
+            for name, data in merged.items():
+                for option in self._parse_federated(name, new[name], status) or []:
+                    structures[(name, option[1]["id"])] = option
+                if name in errors:
+                    status[name] = f'<span style="color:red;">{errors[name]}</span>'
+                elif status[name].startswith("Sorting ..."):
+                    data_returned = (
+                        sources[name][1].get("meta", {}).get("data_returned", len(data))
+                    )
+                    status[name] = status[name].replace(
+                        "Sorting ...",
+                        f"Showing {len(data)} of {data_returned} results "
+                        f"({pages[name]} page{'s' if pages[name] > 1 else ''} retrieved)",
+                        1,
+                    )
+            self._executor.call_soon(
+                token,
+                self._add_federated_results,
+                [structures[_] for _ in order if _ in structures],
+            )
+
+        return status
+
+    def _parse_federated(
+        self,
+        name: str,
+        data: List[Tuple[dict, Optional[DuplicateGroup]]],
+        status: Dict[str, str],
+    ) -> Optional[list]:
+        """Parse the results of a database in a federated search, updating its status
+
+        :param data: Entries with their group of duplicates (see `optimade_client.dedup`).
+            The `(source, id)` of all duplicates of an entry are stored in its option as
+            `"sources"`, and may still grow while the search goes on.
+        """
+        try:
+            structures = self._parse_structures(
+                [entry for entry, _ in data], source=name
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            LOGGER.error("Could not parse results from %s: %r", name, exc)
+            status[
+                name
+            ] = f'<span style="color:red;">Could not parse results: {exc}</span>'
+            return None
+        for (label, value), (entry, group) in zip(structures, data):
+            value["sources"] = (
+                group.sources if group is not None else [(name, entry.get("id"))]
+            )
+        return structures
+
+    def _label_duplicates(self) -> None:
+        """Name all databases an option of a federated search was found in"""
+        labels = {}
+        for label, value in self.structure_drop.options:
+            if value is None or len(value.get("sources", [])) < 2:
+                continue
+            first = value["sources"][0][0]
+            names = ", ".join(dict.fromkeys(source for source, _ in value["sources"]))
+            labels[label] = f"[{names}]{label[len(first) + 2:]}"
+        if labels:
+            self.structure_drop.relabel_options(labels)
+
+    def _on_federated_retrieved(
+        self,
+        token: QueryToken,
+        result: Optional[Dict[str, str]],
+        exception: Optional[Exception],
+    ) -> None:
+        """Finalize a federated search (`done` of `retrieve_data()`)"""
+        try:
+            if exception is not None:
+                raise exception
+            token.check()
+
+            self._show_federated_status(result, running=False)
+            if not self._federated_count:
+                self.structure_drop.set_options([])
+            self._label_duplicates()
+
+        except QueryCancelled:
+            LOGGER.debug("Obsolete federated query: %r", token)
+
+        except Exception as exc:
+            self.structure_drop.reset()
+            self.structure_page_chooser.reset()
+            raise QueryError(f"Bad stuff happened: {traceback.format_exc()}") from exc
+
+        finally:
+            if self._executor.finish(token):
+                # Otherwise a newer action is handling the widget
+                self.query_button.description = "Search"
+                self.query_button.icon = "search"
+                self.query_button.tooltip = f"Search {len(self.databases)} databases"
+                self.unfreeze()
+
+    def _count_databases(self) -> List[Tuple[str, LinksResourceAttributes]]:
+        """The databases to count results in
+
+        These are the databases chosen for a federated search and the databases of the chosen
+        provider, or else the chosen database.
+        """
+        databases, base_urls = [], set()
+        for name, database in self.databases + self.child_databases:
+            if database.base_url not in base_urls:
+                databases.append((name, database))
+                base_urls.add(database.base_url)
+        if not databases and self.database[1] is not None:
+            databases.append(self.database)
+        return databases
+
+    def count_everywhere(self, _=None) -> None:
+        """Count the results of the current filter in all available databases"""
+        databases = self._count_databases()
+        if not databases:
+            return
+
+        self.count_button.description = "Counting ... "
+        self.count_button.icon = "cog"
+        query = self._query_snapshot()
+        self._executor.run(
+            "counts",
+            lambda token: self._retrieve_counts(query, databases, token),
+            self._on_counts_retrieved,
+        )
+
+    def _show_counts(self, counts: Dict[str, str]) -> None:
+        """Show the number of results per database, the most results first"""
+
+        def _order(name: str) -> Tuple[int, str]:
+            count = counts[name].split(" ", 1)[0]
+            return (-int(count) if count.isdigit() else 1, name)
+
+        rows = "".join(
+            f'<tr><td style="padding-right:1em;">{name}</td><td>{counts[name]}</td></tr>'
+            for name in sorted(counts, key=_order)
+        )
+        self.hit_counts_table.value = f"<table>{rows}</table>"
+
+    def _retrieve_counts(
+        self,
+        query: dict,
+        databases: List[Tuple[str, LinksResourceAttributes]],
+        token: QueryToken,
+    ) -> Dict[str, str]:
+        """Count results in all databases concurrently (`work` of `count_everywhere()`)
+
+        :return: The count (or error) of each database.
+        """
+        counts = {name: "Counting ..." for name, _ in databases}
+        self._executor.call_soon(token, self._show_counts, dict(counts))
+        base_urls = {name: database.base_url for name, database in databases}
+        skipped_by_url = {}
+
+        def _queries(database: LinksResourceAttributes) -> dict:
+            skipped = skipped_by_url.setdefault(database.base_url, [])
+            return self._query_parameters(
+                query, database=database, skipped=skipped, token=token
+            )
+
+        for name, count, error, cached in HIT_COUNTER.iter_counts(
+            databases, _queries, token=token
+        ):
+            if error is not None:
+                counts[name] = (
+                    error
+                    if error.startswith("<font")
+                    else f'<font color="red">{error}</font>'
+                )
+            else:
+                counts[name] = f"{count} results{' (cached)' if cached else ''}"
+                if skipped_by_url.get(base_urls[name]):
+                    counts[name] += (
+                        " (skipped unsupported: "
+                        f"{', '.join(skipped_by_url[base_urls[name]])})"
+                    )
+            self._executor.call_soon(token, self._show_counts, dict(counts))
+        return counts
+
+    def _on_counts_retrieved(
+        self,
+        token: QueryToken,
+        result: Optional[Dict[str, str]],
+        exception: Optional[Exception],
+    ) -> None:
+        """Show the final counts (`done` of `count_everywhere()`)"""
+        try:
+            if exception is not None:
+                raise exception
+            token.check()
+            self._show_counts(result)
+        except QueryCancelled:
+            LOGGER.debug("Obsolete counting: %r", token)
+        except Exception as exc:  # pylint: disable=broad-except
+            LOGGER.error("Could not count results: %r", exc)
+            self.hit_counts_table.value = (
+                f'<font color="red">Could not count results: {exc}</font>'
+            )
+        finally:
+            if self._executor.finish(token):
+                self.count_button.description = "Count everywhere"
+                self.count_button.icon = "bar-chart"
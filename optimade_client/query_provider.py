@@ -23,6 +23,12 @@ class OptimadeQueryProviderWidget(ipw.GridspecLayout):
     """Database/Implementation search and chooser widget for OPTIMADE
 
     NOTE: Only supports offset-pagination at the moment.
+
+    If `multiple_databases` is `True`, several databases can be chosen for a federated
+    search, and are available in `databases`.
+
+    If `monitor_health` is `True`, providers are disabled and enabled as their health changes
+    (see `optimade_client.subwidgets.ProviderImplementationChooser`).
     """
 
     database = traitlets.Tuple(
@@ -30,6 +36,18 @@ class OptimadeQueryProviderWidget(ipw.GridspecLayout):
         traitlets.Instance(LinksResourceAttributes, allow_none=True),
         default_value=("", None),
     )
+    databases = traitlets.List(
+        traitlets.Tuple(
+            traitlets.Unicode(), traitlets.Instance(LinksResourceAttributes)
+        ),
+        default_value=[],
+    )
+    child_databases = traitlets.List(
+        traitlets.Tuple(
+            traitlets.Unicode(), traitlets.Instance(LinksResourceAttributes)
+        ),
+        default_value=[],
+    )
 
     def __init__(
         self,
@@ -41,6 +59,9 @@ class OptimadeQueryProviderWidget(ipw.GridspecLayout):
         skip_providers: Optional[List[str]] = None,
         skip_databases: Optional[List[str]] = None,
         provider_database_groupings: Optional[Dict[str, Dict[str, List[str]]]] = None,
+        adaptive_page_limit: bool = False,
+        multiple_databases: bool = False,
+        monitor_health: bool = False,
         **kwargs,
     ):
         # At the moment, the pagination does not work properly as each database is not tested for
@@ -64,6 +85,9 @@ class OptimadeQueryProviderWidget(ipw.GridspecLayout):
             skip_providers=skip_providers,
             skip_databases=skip_databases,
             provider_database_groupings=provider_database_groupings,
+            adaptive_page_limit=adaptive_page_limit,
+            multiple_databases=multiple_databases,
+            monitor_health=monitor_health,
             **kwargs,
         )
 
@@ -100,6 +124,8 @@ class OptimadeQueryProviderWidget(ipw.GridspecLayout):
             )
 
         ipw.dlink((self.chooser, "database"), (self, "database"))
+        ipw.dlink((self.chooser, "databases"), (self, "databases"))
+        ipw.dlink((self.chooser, "child_databases"), (self, "child_databases"))
 
     def freeze(self):
         """Disable widget"""
@@ -115,3 +141,8 @@ class OptimadeQueryProviderWidget(ipw.GridspecLayout):
         """Reset widget"""
         for widget in self.children:
             widget.reset()
+
+    def close(self):
+        """Close widget, including the provider chooser"""
+        self.chooser.close()
+        super().close()
@@ -5,6 +5,8 @@ from .output_summary import *  # noqa: F403
 from .periodic_table import *  # noqa: F403
 from .provider_database import *  # noqa: F403
 from .results import *  # noqa: F403
+from .results_export import *  # noqa: F403
+from .results_grid import *  # noqa: F403
 from .sort_selector import *  # noqa: F403
 
 
@@ -15,5 +17,7 @@ __all__ = (
     + periodic_table.__all__  # noqa: F405
     + provider_database.__all__  # noqa: F405
     + results.__all__  # noqa: F405
+    + results_export.__all__  # noqa: F405
+    + results_grid.__all__  # noqa: F405
     + sort_selector.__all__  # noqa: F405
 )
@@ -1,14 +1,18 @@
+import html
 import re
-from typing import Match, List, Dict, Optional
+from typing import Match, List, Dict, Optional, Tuple
 import ipywidgets as ipw
 import traitlets
 
+import numpy as np
 import pandas as pd
 
 from optimade.adapters import Structure
 from optimade.models import Species
 from optimade.models.structures import Vector3D
 
+from optimade_client.properties import cell_volumes
+
 
 __all__ = ("StructureSummary", "StructureSites")
 
@@ -29,16 +33,12 @@ def calc_cell_volume(cell: List[Vector3D]) -> float:
             no other checks are done.
 
     :returns: the cell volume.
+
+    See `optimade_client.properties` for computing the volumes of many cells at once.
     """
     if cell:
         # returns the volume of the primitive cell: |a_1 . (a_2 x a_3)|
-        a_1 = cell[0]
-        a_2 = cell[1]
-        a_3 = cell[2]
-        a_mid_0 = a_2[1] * a_3[2] - a_2[2] * a_3[1]
-        a_mid_1 = a_2[2] * a_3[0] - a_2[0] * a_3[2]
-        a_mid_2 = a_2[0] * a_3[1] - a_2[1] * a_3[0]
-        return abs(a_1[0] * a_mid_0 + a_1[1] * a_mid_1 + a_1[2] * a_mid_2)
+        return float(cell_volumes([cell])[0])
     return 0.0
 
 
@@ -212,70 +212,21 @@ class StructureSummary(ipw.VBox):
         return out
 
 
-class StructureSites(ipw.HTML):
+class StructureSites(ipw.VBox):  # pylint: disable=too-many-instance-attributes
     """Structure Sites Output
     Reimplements the viewer for AiiDA Dicts (from AiiDAlab)
+
+    Only a window of `window_size` sites is rendered and sent to the browser at a time.
+    The sites are prepared once per structure, and the rows of a window are formatted when
+    the window is shown.
     """
 
     structure = traitlets.Instance(Structure, allow_none=True)
+    window_offset = traitlets.Int(0)
 
-    def __init__(self, structure: Structure = None, **kwargs):
+    def __init__(self, structure: Structure = None, window_size: int = 100, **kwargs):
         # For more information on how to control the table appearance please visit:
         # https://css-tricks.com/complete-guide-table-element/
-        #
-        # Voila doesn't run the scripts, which should set a color upon choosing a row.
-        # Furthermore, if it will ever work, one can remove the hover definition in the css styling.
-        self._script = """
-var row_color;
-
-function index(el) {
-  if (!el) return -1;
-  var i = 0;
-  do {
-    i++;
-  } while (el = el.previousElementSibling);
-  return i;
-}
-
-function updateRowBackground(row) {
-    if (row_color != 'rgb(244, 151, 184)') {
-        row.style.backgroundColor = '#f497b8';
-    } else {
-        if ( index(row) % 2 == 0) {
-            // even
-            row.style.backgroundColor = 'white';
-        } else {
-            // odd
-            row.style.backgroundColor = '#e5e7e9';
-        }
-    }
-    row_color = getComputedStyle(row)['backgroundColor'];
-}
-
-function doYourStuff() {
-    [].forEach.call( document.querySelectorAll('tbody > tr'), function(el) {
-        el.addEventListener('click', function() {
-            updateRowBackground(el);
-        }, false);
-    });
-    [].forEach.call( document.querySelectorAll('tbody > tr'), function(el) {
-        el.addEventListener('mouseover', function() {
-            row_color = getComputedStyle(el)['backgroundColor'];
-            this.style.backgroundColor = '#f5b7b1';
-        }, false);
-    });
-    [].forEach.call( document.querySelectorAll('tbody > tr'), function(el) {
-        el.addEventListener('mouseout', function() {
-            el.style.backgroundColor = row_color;
-        }, false);
-    });
-};
-
-document.addEventListener('DOMContentLoaded', function() {
-    doYourStuff();
-});
-// doYourStuff()
-"""
         self._style = """
 <style>
     .df { border: none; width: 100%; }
@@ -292,36 +243,109 @@ document.addEventListener('DOMContentLoaded', function() {
     .df th { text-align: center; border: none;  border-bottom: 1px solid black; }
 </style>
 """
-        pd.set_option("max_colwidth", 100)
+        self.window_size = window_size
+        self._sites: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self._nsites = 0
+
+        # The style is sent to the browser only once, not with every window
+        self.style = ipw.HTML(self._style)
+        self.table = ipw.HTML("", layout=ipw.Layout(width="auto", height="auto"))
+
+        button_layout = {
+            "style": ipw.ButtonStyle(button_color="white"),
+            "layout": ipw.Layout(width="auto"),
+        }
+        self.button_first = ipw.Button(
+            icon="angle-double-left", tooltip="First sites", **button_layout
+        )
+        self.button_prev = ipw.Button(
+            icon="angle-left", tooltip=f"Previous {window_size} sites", **button_layout
+        )
+        self.text = ipw.HTML("")
+        self.button_next = ipw.Button(
+            icon="angle-right", tooltip=f"Next {window_size} sites", **button_layout
+        )
+        self.button_last = ipw.Button(
+            icon="angle-double-right", tooltip="Last sites", **button_layout
+        )
+        self.button_first.on_click(lambda _: self._goto(0))
+        self.button_prev.on_click(
+            lambda _: self._goto(self.window_offset - self.window_size)
+        )
+        self.button_next.on_click(
+            lambda _: self._goto(self.window_offset + self.window_size)
+        )
+        self.button_last.on_click(
+            lambda _: self._goto(
+                (self._nsites - 1) // self.window_size * self.window_size
+            )
+        )
+        self.window_chooser = ipw.HBox(
+            children=(
+                self.button_first,
+                self.button_prev,
+                self.text,
+                self.button_next,
+                self.button_last,
+            ),
+            layout=ipw.Layout(width="auto", display="none"),
+        )
 
-        super().__init__(layout=ipw.Layout(width="auto", height="auto"), **kwargs)
+        super().__init__(
+            children=(self.style, self.window_chooser, self.table),
+            layout=ipw.Layout(width="auto", height="auto"),
+            **kwargs,
+        )
         self.observe(self._on_change_structure, names="structure")
+        self.observe(self._on_change_window, names="window_offset")
         self.structure = structure
 
     def _on_change_structure(self, change: dict):
         """When traitlet 'structure' is updated"""
         if change["new"] is None:
             self.reset()
-        else:
-            self.value = self._style
-            if all(
-                getattr(self.structure.attributes, field, None)
-                for field in [
-                    "species",
-                    "nsites",
-                    "species_at_sites",
-                    "cartesian_site_positions",
-                ]
-            ):
-                dataf = pd.DataFrame(
-                    self._format_sites(),
-                    columns=["Elements", "Occupancy", "x (Å)", "y (Å)", "z (Å)"],
-                )
-                self.value += dataf.to_html(
-                    classes="df", index=False, table_id="sites", notebook=False
-                )
+        elif all(
+            getattr(self.structure.attributes, field, None)
+            for field in [
+                "species",
+                "nsites",
+                "species_at_sites",
+                "cartesian_site_positions",
+            ]
+        ):
+            self._sites = self._prepare_sites()
+            self._nsites = len(self._sites[0])
+            self.window_chooser.layout.display = (
+                None if self._nsites > self.window_size else "none"
+            )
+            if self.window_offset:
+                self.window_offset = 0
             else:
-                self.value += NOT_AVAILABLE_MSG
+                self._on_change_window({})
+        else:
+            self.reset()
+            self.table.value = NOT_AVAILABLE_MSG
+
+    def _on_change_window(self, _: dict):
+        """Render the current window of sites"""
+        if self._sites is None:
+            return
+        start = self.window_offset
+        stop = min(start + self.window_size, self._nsites)
+        self.table.value = self._sites_table(self._format_sites(start, stop))
+        self.text.value = f"Showing sites {start + 1}-{stop} of {self._nsites}"
+        self.button_first.disabled = self.button_prev.disabled = start == 0
+        self.button_next.disabled = self.button_last.disabled = stop >= self._nsites
+
+    def _goto(self, offset: int):
+        """Show the window of sites starting at `offset`"""
+        self.window_offset = max(
+            0,
+            min(
+                offset,
+                (max(self._nsites, 1) - 1) // self.window_size * self.window_size,
+            ),
+        )
 
     def freeze(self):
         """Disable widget"""
@@ -331,41 +355,85 @@ document.addEventListener('DOMContentLoaded', function() {
 
     def reset(self):
         """Reset widget"""
-        self.value = ""
+        self._sites = None
+        self._nsites = 0
+        self.table.value = ""
+        self.text.value = ""
+        self.window_chooser.layout.display = "none"
+        with self.hold_trait_notifications():
+            self.window_offset = 0
+
+    def _prepare_sites(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Index of each site's species, species labels and positions
+
+        The labels are computed once per species, not once per site.
+        """
+        labels: Dict[str, Tuple[str, str]] = {
+            _.name: tuple(map(html.escape, self._species_labels(_)))
+            for _ in self.structure.species
+        }
+        names, species_index = np.unique(
+            np.asarray(self.structure.species_at_sites, dtype=str), return_inverse=True
+        )
+        species_labels = np.asarray([labels[_] for _ in names], dtype=object).reshape(
+            -1, 2
+        )
+        positions = np.asarray(
+            self.structure.cartesian_site_positions, dtype=float
+        ).reshape(-1, 3)
+        return species_index.reshape(-1), species_labels, positions
 
-    def _format_sites(self) -> List[str]:
-        """Format OPTIMADE Structure into list of formatted HTML strings
+    def _format_sites(self, start: int = 0, stop: int = None) -> Dict[str, np.ndarray]:
+        """Format sites `start` to `stop` into columns of formatted strings
         Columns:
         - Elements
         - Occupancy
         - Position (x)
         - Position (y)
         - Position (z)
+
+        Each column is built for all sites in the range at once.
         """
-        species: Dict[str, Species] = {_.name: _ for _ in self.structure.species.copy()}
+        if self._sites is None:
+            self._sites = self._prepare_sites()
+        species_index, species_labels, positions = self._sites
+        species_index = species_index[start:stop]
+        positions = positions[start:stop]
+
+        columns = {
+            "Elements": species_labels[species_index, 0],
+            "Occupancy": species_labels[species_index, 1],
+        }
+        for axis, name in enumerate(("x (Å)", "y (Å)", "z (Å)")):
+            columns[name] = np.char.mod("%.5f", positions[:, axis])
+        return columns
 
-        res = []
-        for site_number in range(self.structure.nsites):
-            symbol_name = self.structure.species_at_sites[site_number]
+    @staticmethod
+    def _sites_table(columns: Dict[str, np.ndarray]) -> str:
+        """HTML table of the sites (as `pandas.DataFrame.to_html()` would render it)
 
-            for index, symbol in enumerate(species[symbol_name].chemical_symbols):
-                if symbol == "vacancy":
-                    species[symbol_name].chemical_symbols.pop(index)
-                    species[symbol_name].concentration.pop(index)
-                    break
+        The cells must already be HTML-escaped.
+        """
+        header = "".join(f"<th>{_}</th>" for _ in columns)
+        rows = "".join(
+            f"<tr><td>{'</td><td>'.join(row)}</td></tr>"
+            for row in zip(*columns.values())
+        )
+        return (
+            '<table border="1" class="dataframe df" id="sites">'
+            f'<thead><tr style="text-align: right;">{header}</tr></thead>'
+            f"<tbody>{rows}</tbody></table>"
+        )
 
-            res.append(
-                (
-                    ", ".join(species[symbol_name].chemical_symbols),
-                    ", ".join(
-                        [
-                            f"{occupation:.2f}"
-                            for occupation in species[symbol_name].concentration
-                        ]
-                    ),
-                    f"{self.structure.cartesian_site_positions[site_number][0]:.5f}",
-                    f"{self.structure.cartesian_site_positions[site_number][1]:.5f}",
-                    f"{self.structure.cartesian_site_positions[site_number][2]:.5f}",
-                )
-            )
-        return res
+    @staticmethod
+    def _species_labels(species: Species) -> Tuple[str, str]:
+        """Chemical symbols and concentrations of a species, leaving out vacancies"""
+        symbols, concentrations = [], []
+        for symbol, concentration in zip(
+            species.chemical_symbols, species.concentration
+        ):
+            if symbol == "vacancy":
+                continue
+            symbols.append(symbol)
+            concentrations.append(f"{concentration:.2f}")
+        return ", ".join(symbols), ", ".join(concentrations)
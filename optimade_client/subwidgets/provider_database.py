@@ -1,16 +1,11 @@
 # pylint: disable=protected-access
 from copy import deepcopy
 import os
-from typing import Dict, List, Tuple, Union
+import time
+from typing import Dict, List, Optional, Tuple, Union
 import urllib.parse
 
-try:
-    import simplejson as json
-except ImportError:
-    import json
-
 import ipywidgets as ipw
-import requests
 import traitlets
 
 from ipywidgets_extended.dropdown import DropdownExtended
@@ -18,17 +13,18 @@ from ipywidgets_extended.dropdown import DropdownExtended
 from optimade.models import LinksResourceAttributes
 from optimade.models.links import LinkType
 
-from optimade_client.exceptions import OptimadeClientError, QueryError
+from optimade_client.exceptions import OptimadeClientError, QueryCancelled, QueryError
+from optimade_client.executor import QueryExecutor, QueryToken, kernel_loop
+from optimade_client.health import HEALTH_MONITOR
 from optimade_client.logger import LOGGER
+from optimade_client.paging import PAGE_LIMIT_TUNER
 from optimade_client.subwidgets.results import ResultsPageChooser
 from optimade_client.utils import (
     get_list_of_valid_providers,
     get_versioned_base_url,
     handle_errors,
-    ordered_query_url,
+    perform_optimade_link_query,
     perform_optimade_query,
-    SESSION,
-    TIMEOUT_SECONDS,
     update_old_links_resources,
     validate_api_version,
 )
@@ -40,7 +36,21 @@ __all__ = ("ProviderImplementationChooser", "ProviderImplementationSummary")
 class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attributes
     ipw.VBox
 ):
-    """List all OPTIMADE providers and their implementations"""
+    """List all OPTIMADE providers and their implementations
+
+    If `adaptive_page_limit` is `True`, the number of child databases requested per page is
+    tuned for each provider (see `optimade_client.paging.PageLimitTuner`), using
+    `child_db_limit` as a minimum.
+
+    If `multiple_databases` is `True`, several databases (possibly from different providers)
+    can be added to `databases`, to search them all at once.
+
+    If `monitor_health` is `True`, providers found to be unhealthy by the provider health
+    monitor (see `optimade_client.health`) are disabled as well.
+    When running in an IPython kernel, the monitor keeps probing the providers in the
+    background, disabling and enabling providers as their health changes, until the widget
+    is closed.
+    """
 
     provider = traitlets.Instance(LinksResourceAttributes, allow_none=True)
     database = traitlets.Tuple(
@@ -48,6 +58,18 @@ class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attrib
         traitlets.Instance(LinksResourceAttributes, allow_none=True),
         default_value=("", None),
     )
+    databases = traitlets.List(
+        traitlets.Tuple(
+            traitlets.Unicode(), traitlets.Instance(LinksResourceAttributes)
+        ),
+        default_value=[],
+    )
+    child_databases = traitlets.List(
+        traitlets.Tuple(
+            traitlets.Unicode(), traitlets.Instance(LinksResourceAttributes)
+        ),
+        default_value=[],
+    )
 
     HINT = {"provider": "Select a provider", "child_dbs": "Select a database"}
     INITIAL_CHILD_DBS = [("", (("No provider chosen", None),))]
@@ -59,24 +81,48 @@ class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attrib
         skip_providers: List[str] = None,
         skip_databases: Dict[str, List[str]] = None,
         provider_database_groupings: Dict[str, Dict[str, List[str]]] = None,
+        adaptive_page_limit: bool = False,
+        multiple_databases: bool = False,
+        monitor_health: bool = False,
         **kwargs,
     ):
         self.child_db_limit = (
             child_db_limit if child_db_limit and child_db_limit > 0 else 10
         )
+        self._minimum_child_db_limit = self.child_db_limit
+        self._page_limit_tuner = PAGE_LIMIT_TUNER if adaptive_page_limit else None
         self.skip_child_dbs = skip_databases or {}
         self.child_db_groupings = provider_database_groupings or {}
         self.offset = 0
         self.number = 1
         self.__perform_query = True
         self.__cached_child_dbs = {}
+        self._executor = QueryExecutor()
 
         self.debug = bool(os.environ.get("OPTIMADE_CLIENT_DEBUG", None))
 
+        self._disable_providers = disable_providers or []
+        self._health_monitor = HEALTH_MONITOR if monitor_health else None
+        self._unhealthy_providers = set()
+        if self._health_monitor is not None:
+            health = self._health_monitor.snapshot()
+            unhealthy = [
+                _
+                for _ in self._health_monitor.unhealthy()
+                if _ not in self._disable_providers
+            ]
+            self._unhealthy_providers = {health[_].name for _ in unhealthy}
+        else:
+            unhealthy = []
+
         providers = []
         providers, invalid_providers = get_list_of_valid_providers(
-            disable_providers=disable_providers, skip_providers=skip_providers
+            disable_providers=self._disable_providers + unhealthy,
+            skip_providers=skip_providers,
         )
+        self._invalid_providers = [
+            _ for _ in invalid_providers if _ not in self._unhealthy_providers
+        ]
         providers.insert(0, (self.HINT["provider"], {}))
         if self.debug:
             from optimade_client.utils import VERSION_PARTS
@@ -108,33 +154,82 @@ class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attrib
 
         self.providers.observe(self._observe_providers, names="value")
         self.child_dbs.observe(self._observe_child_dbs, names="value")
+        self.child_dbs.observe(self._observe_child_dbs_grouping, names="grouping")
         self.page_chooser.observe(
             self._get_more_child_dbs, names=["page_link", "page_offset", "page_number"]
         )
         self.error_or_status_messages = ipw.HTML("")
 
+        self.add_database = ipw.Button(
+            description="Add database",
+            tooltip="Add the chosen database to the databases to search",
+            icon="plus",
+            disabled=True,
+            layout=ipw.Layout(width="auto"),
+        )
+        self.chosen_databases = ipw.SelectMultiple(
+            options=[], rows=4, layout=ipw.Layout(width="auto")
+        )
+        self.remove_databases = ipw.Button(
+            description="Remove databases",
+            tooltip="Remove the selected databases from the databases to search",
+            icon="minus",
+            disabled=True,
+            layout=ipw.Layout(width="auto"),
+        )
+        self.add_database.on_click(self._add_database)
+        self.remove_databases.on_click(self._remove_databases)
+        self.chosen_databases.observe(self._observe_chosen_databases, names="value")
+        self.observe(self._update_add_database, names=["database", "databases"])
+
+        children = [
+            self.providers,
+            self.child_dbs,
+            self.page_chooser,
+            self.error_or_status_messages,
+        ]
+        if multiple_databases:
+            children.extend(
+                [self.add_database, self.chosen_databases, self.remove_databases]
+            )
+
         super().__init__(
-            children=(
-                self.providers,
-                self.child_dbs,
-                self.page_chooser,
-                self.error_or_status_messages,
-            ),
+            children=tuple(children),
             layout=ipw.Layout(width="auto"),
             **kwargs,
         )
 
+        self._kernel_loop = kernel_loop()
+        self._follow_health = (
+            self._health_monitor is not None and self._kernel_loop is not None
+        )
+        if self._follow_health:
+            self._health_monitor.subscribe(self._on_provider_health)
+
+    def close(self):
+        """Stop following the provider health monitor and close the widget"""
+        if self._follow_health:
+            self._health_monitor.unsubscribe(self._on_provider_health)
+            self._follow_health = False
+        super().close()
+
     def freeze(self):
         """Disable widget"""
         self.providers.disabled = True
         self.show_child_dbs.display = "none"
         self.page_chooser.freeze()
+        self.add_database.disabled = True
+        self.chosen_databases.disabled = True
+        self.remove_databases.disabled = True
 
     def unfreeze(self):
         """Activate widget (in its current state)"""
         self.providers.disabled = False
         self.show_child_dbs.display = None
         self.page_chooser.unfreeze()
+        self.chosen_databases.disabled = False
+        self._update_add_database()
+        self._observe_chosen_databases()
 
     def reset(self):
         """Reset widget"""
@@ -148,33 +243,40 @@ class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attrib
         self.show_child_dbs.display = "none"
         self.child_dbs.grouping = self.INITIAL_CHILD_DBS
 
+        self.databases = []
+        self.chosen_databases.disabled = False
+
     def _observe_providers(self, change: dict):
         """Update child database dropdown upon changing provider"""
         value = change["new"]
         self.show_child_dbs.display = "none"
         self.provider = value
         if value is None or not value:
+            self._executor.cancel("child_dbs")
             self.show_child_dbs.display = "none"
             self.child_dbs.grouping = self.INITIAL_CHILD_DBS
             self.providers.index = 0
             self.child_dbs.index = 0
         else:
             self._initialize_child_dbs()
-            if sum([len(_[1]) for _ in self.child_dbs.grouping]) <= 2:
-                # The provider either has 0 or 1 implementations
-                # or we have failed to retrieve any implementations.
-                # Automatically choose the 1 implementation (if there),
-                # while otherwise keeping the dropdown disabled.
-                self.show_child_dbs.display = "none"
-                try:
-                    self.child_dbs.index = 1
-                    LOGGER.debug(
-                        "Changed child_dbs index. New child_dbs: %s", self.child_dbs
-                    )
-                except IndexError:
-                    pass
-            else:
-                self.show_child_dbs.display = None
+
+    def _show_child_dbs(self):
+        """Show child database dropdown, automatically choosing a single implementation"""
+        if sum([len(_[1]) for _ in self.child_dbs.grouping]) <= 2:
+            # The provider either has 0 or 1 implementations
+            # or we have failed to retrieve any implementations.
+            # Automatically choose the 1 implementation (if there),
+            # while otherwise keeping the dropdown disabled.
+            self.show_child_dbs.display = "none"
+            try:
+                self.child_dbs.index = 1
+                LOGGER.debug(
+                    "Changed child_dbs index. New child_dbs: %s", self.child_dbs
+                )
+            except IndexError:
+                pass
+        else:
+            self.show_child_dbs.display = None
 
     def _observe_child_dbs(self, change: dict):
         """Update database traitlet with base URL for chosen child database"""
@@ -184,6 +286,92 @@ class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attrib
         else:
             self.database = self.child_dbs.label.strip(), self.child_dbs.value
 
+    def _observe_child_dbs_grouping(self, change: dict):
+        """Update child_databases traitlet with the valid child databases"""
+        disabled = set(self.child_dbs.disabled_options)
+        self.child_databases = [
+            (label.strip(), value)
+            for _, options in change["new"]
+            for label, value in options
+            if isinstance(value, LinksResourceAttributes) and label not in disabled
+        ]
+
+    def _on_provider_health(self, unhealthy: List[str]) -> None:
+        """Provider health has been updated (called in the health monitor's thread)"""
+        self._kernel_loop.add_callback(self._update_provider_health, unhealthy)
+
+    def _update_provider_health(self, unhealthy: List[str]) -> None:
+        """Disable unhealthy providers and enable recovered providers"""
+        health = self._health_monitor.snapshot()
+        unhealthy_providers = {
+            health[_].name
+            for _ in unhealthy
+            if _ not in self._disable_providers and _ in health
+        }
+
+        for label, attributes in self.providers.options:
+            if (
+                label in self._unhealthy_providers
+                and label not in unhealthy_providers
+                and attributes
+            ):
+                # Disabled providers have not had their versioned base URL determined
+                base_url = next(
+                    (_.base_url for _ in health.values() if _.name == label), None
+                )
+                if base_url:
+                    attributes.base_url = base_url
+                else:
+                    unhealthy_providers.add(label)
+
+        # Never disable the chosen provider under the user's feet
+        unhealthy_providers.discard(self.providers.label)
+        self._unhealthy_providers = unhealthy_providers
+
+        labels = [label for label, _ in self.providers.options]
+        disabled_options = [
+            label
+            for label in labels
+            if label in self._invalid_providers or label in unhealthy_providers
+        ]
+        if disabled_options != list(self.providers.disabled_options):
+            LOGGER.debug("Updating disabled providers: %s", disabled_options)
+            self.providers.disabled_options = disabled_options
+
+    def _update_add_database(self, _: dict = None) -> None:
+        """Only allow adding a chosen database once"""
+        self.add_database.disabled = self.database[1] is None or any(
+            database.base_url == self.database[1].base_url
+            for _, database in self.databases
+        )
+
+    def _observe_chosen_databases(self, _: dict = None) -> None:
+        """Only allow removing databases if some are selected"""
+        self.remove_databases.disabled = not self.chosen_databases.value
+
+    def _add_database(self, _) -> None:
+        """Add the chosen database to `databases`"""
+        if self.database[1] is None:
+            return
+        provider = getattr(self.provider, "name", "") or self.providers.label
+        name = f"{provider}: {self.database[0]}" if provider else self.database[0]
+        self.databases = self.databases + [(name, self.database[1])]
+        self.chosen_databases.options = [
+            (name, database.base_url) for name, database in self.databases
+        ]
+
+    def _remove_databases(self, _) -> None:
+        """Remove the selected databases from `databases`"""
+        remove = set(self.chosen_databases.value)
+        self.databases = [
+            (name, database)
+            for name, database in self.databases
+            if database.base_url not in remove
+        ]
+        self.chosen_databases.options = [
+            (name, database.base_url) for name, database in self.databases
+        ]
+
     @staticmethod
     def _remove_current_dropdown_option(dropdown: ipw.Dropdown) -> tuple:
         """Remove the current option from a Dropdown widget and return updated options
@@ -194,102 +382,177 @@ class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attrib
         list_of_options.pop(dropdown.index)
         return tuple(list_of_options)
 
-    def _initialize_child_dbs(self):
+    def _initialize_child_dbs(self) -> None:
         """New provider chosen; initialize child DB dropdown"""
         self.offset = 0
         self.number = 1
-        try:
-            # Freeze and disable list of structures in dropdown widget
-            # We don't want changes leading to weird things happening prior to the query ending
-            self.freeze()
+        query = self._query_snapshot()
 
-            # Reset the error or status message
-            if self.error_or_status_messages.value:
-                self.error_or_status_messages.value = ""
+        # Freeze and disable list of structures in dropdown widget
+        # We don't want changes leading to weird things happening prior to the query ending
+        self.freeze()
 
-            if self.provider.base_url in self.__cached_child_dbs:
-                cache = self.__cached_child_dbs[self.provider.base_url]
+        # Reset the error or status message
+        if self.error_or_status_messages.value:
+            self.error_or_status_messages.value = ""
 
-                LOGGER.debug(
-                    "Initializing child DBs for %s. Using cached info:\n%r",
-                    self.provider.name,
-                    cache,
-                )
+        self._executor.run(
+            "child_dbs",
+            lambda token: self._retrieve_child_dbs(query, token),
+            self._on_child_dbs_retrieved,
+        )
 
-                self._set_child_dbs(cache["child_dbs"])
-                data_returned = cache["data_returned"]
-                data_available = cache["data_available"]
-                links = cache["links"]
-            else:
-                LOGGER.debug("Initializing child DBs for %s.", self.provider.name)
+    def _query_snapshot(self) -> dict:
+        """Snapshot of the widget state defining the current query of child DBs
+
+        It is taken on the kernel's event loop when starting an action, since the `work` of
+        the action runs in a thread and must not read the widgets.
+        """
+        return {
+            "provider": self.provider,
+            "label": self.providers.label,
+            "page_limit": self.child_db_limit,
+            "page_offset": self.offset,
+            "page_number": self.number,
+            "data_returned": self.page_chooser.data_returned,
+        }
 
-                # Query database and get child_dbs
-                child_dbs, links, data_returned, data_available = self._query()
+    def _retrieve_child_dbs(self, query: dict, token: QueryToken) -> dict:
+        """Retrieve initial child DBs for the provider (`work` of `_initialize_child_dbs()`)
 
-                while True:
-                    # Update list of structures in dropdown widget
-                    exclude_child_dbs, final_child_dbs = self._update_child_dbs(
-                        data=child_dbs,
-                        skip_dbs=self.skip_child_dbs.get(self.provider.name, []),
-                    )
+        The result is cached by `_on_child_dbs_retrieved()`.
+        """
+        provider = query["provider"]
+        if self._page_limit_tuner is not None:
+            query["page_limit"] = max(
+                self._minimum_child_db_limit,
+                self._page_limit_tuner.page_limit(provider.base_url, token=token),
+            )
+            LOGGER.debug(
+                "Using page limit %d for child DBs of %s.",
+                query["page_limit"],
+                provider.name,
+            )
 
-                    LOGGER.debug("Exclude child DBs: %r", exclude_child_dbs)
-                    data_returned -= len(exclude_child_dbs)
-                    data_available -= len(exclude_child_dbs)
-                    if exclude_child_dbs and data_returned:
-                        child_dbs, links, data_returned, _ = self._query(
-                            exclude_ids=exclude_child_dbs
-                        )
-                    else:
-                        break
-                self._set_child_dbs(final_child_dbs)
-
-                # Cache initial child_dbs and related information
-                self.__cached_child_dbs[self.provider.base_url] = {
-                    "child_dbs": final_child_dbs,
-                    "data_returned": data_returned,
-                    "data_available": data_available,
-                    "links": links,
-                }
+        cached = self.__cached_child_dbs.get(provider.base_url)
+        if cached is not None:
+            LOGGER.debug(
+                "Initializing child DBs for %s. Using cached info:\n%r",
+                provider.name,
+                cached,
+            )
+            return dict(cached, page_limit=query["page_limit"])
 
-                LOGGER.debug(
-                    "Found the following, which has now been cached:\n%r",
-                    self.__cached_child_dbs[self.provider.base_url],
+        LOGGER.debug("Initializing child DBs for %s.", provider.name)
+
+        # Query database and get child_dbs
+        child_dbs, links, data_returned, data_available = self._query(
+            query, token=token
+        )
+
+        while True:
+            # Update list of structures in dropdown widget
+            exclude_child_dbs, final_child_dbs = self._update_child_dbs(
+                data=child_dbs,
+                provider_label=query["label"],
+                skip_dbs=self.skip_child_dbs.get(provider.name, []),
+                token=token,
+            )
+
+            LOGGER.debug("Exclude child DBs: %r", exclude_child_dbs)
+            data_returned -= len(exclude_child_dbs)
+            data_available -= len(exclude_child_dbs)
+            if exclude_child_dbs and data_returned:
+                child_dbs, links, data_returned, _ = self._query(
+                    query, exclude_ids=exclude_child_dbs, token=token
                 )
+            else:
+                break
+        token.check()
+
+        result = {
+            "base_url": provider.base_url,
+            "child_dbs": final_child_dbs,
+            "data_returned": data_returned,
+            "data_available": data_available,
+            "links": links,
+        }
+        LOGGER.debug("Found the following:\n%r", result)
+        return dict(result, page_limit=query["page_limit"])
+
+    def _on_child_dbs_retrieved(
+        self,
+        token: QueryToken,
+        result: Optional[dict],
+        exception: Optional[Exception],
+    ) -> None:
+        """Update child DB dropdown (`done` of `_initialize_child_dbs()`)"""
+        try:
+            if exception is not None:
+                raise exception
+            token.check()
+
+            # Cache initial child_dbs and related information
+            page_limit = result.pop("page_limit")
+            self.__cached_child_dbs[result["base_url"]] = result
+            self.child_db_limit = page_limit
+
+            self._set_child_dbs(result["child_dbs"])
 
             # Update pageing
+            self.page_chooser.page_limit = self.child_db_limit
             self.page_chooser.set_pagination_data(
-                data_returned=data_returned,
-                data_available=data_available,
-                links_to_page=links,
+                data_returned=result["data_returned"],
+                data_available=result["data_available"],
+                links_to_page=result["links"],
                 reset_cache=True,
             )
 
+        except QueryCancelled:
+            LOGGER.debug("Obsolete initialization of child DBs: %r", token)
+
         except QueryError as exc:
             LOGGER.debug("Trying to initalize child DBs. QueryError caught: %r", exc)
-            if exc.remove_target:
-                LOGGER.debug(
-                    "Remove target: %r. Will remove target at %r: %r",
-                    exc.remove_target,
-                    self.providers.index,
-                    self.providers.value,
-                )
-                self.providers.options = self._remove_current_dropdown_option(
-                    self.providers
-                )
-                self.reset()
-            else:
-                LOGGER.debug(
-                    "Remove target: %r. Will NOT remove target at %r: %r",
-                    exc.remove_target,
-                    self.providers.index,
-                    self.providers.value,
-                )
-                self.show_child_dbs.display = "none"
-                self.child_dbs.grouping = self.INITIAL_CHILD_DBS
+            self._handle_query_error(token, exc)
 
         else:
-            self.unfreeze()
+            if self._executor.is_current(token):
+                self.unfreeze()
+
+        finally:
+            is_current = self._executor.finish(token)
+
+        if is_current:
+            self._show_child_dbs()
+
+    def _handle_query_error(self, token: QueryToken, exc: QueryError) -> None:
+        """Remove the provider or hide its child DBs after a failed query"""
+        if not self._executor.is_current(token):
+            LOGGER.debug("Ignoring error for obsolete action: %r", token)
+        elif exc.remove_target:
+            LOGGER.debug(
+                "Remove target: %r. Will remove target at %r: %r",
+                exc.remove_target,
+                self.providers.index,
+                self.providers.value,
+            )
+            self.providers.options = self._remove_current_dropdown_option(
+                self.providers
+            )
+            self.reset()
+        else:
+            LOGGER.debug(
+                "Remove target: %r. Will NOT remove target at %r: %r",
+                exc.remove_target,
+                self.providers.index,
+                self.providers.value,
+            )
+            self.show_child_dbs.display = "none"
+            self.child_dbs.grouping = self.INITIAL_CHILD_DBS
+
+    def _show_message(self, msg: str) -> None:
+        """Show an error or status message"""
+        self.error_or_status_messages.value = msg
 
     def _set_child_dbs(
         self,
@@ -304,21 +567,32 @@ class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attrib
         self.child_dbs.grouping = new_data
 
     def _update_child_dbs(
-        self, data: List[dict], skip_dbs: List[str] = None
+        self,
+        data: List[dict],
+        provider_label: str,
+        skip_dbs: List[str] = None,
+        token: QueryToken = None,
     ) -> Tuple[
         List[str],
         List[List[Union[str, List[Tuple[str, LinksResourceAttributes]]]]],
     ]:
-        """Update child DB dropdown from response data"""
+        """Update child DB dropdown from response data
+
+        :param provider_label: The label of the provider in the providers dropdown.
+        """
         child_dbs = (
             {"": []}
-            if self.providers.label not in self.child_db_groupings
-            else deepcopy(self.child_db_groupings[self.providers.label])
+            if provider_label not in self.child_db_groupings
+            else deepcopy(self.child_db_groupings[provider_label])
         )
         exclude_dbs = []
         skip_dbs = skip_dbs or []
 
         for entry in data:
+            if token is not None:
+                # Determining the versioned base URL may be costly, stop if obsolete
+                token.check()
+
             child_db = update_old_links_resources(entry)
             if child_db is None:
                 continue
@@ -363,8 +637,8 @@ class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attrib
                 exclude_dbs.append(child_db.id)
                 continue
 
-            if self.providers.label in self.child_db_groupings:
-                for group, ids in self.child_db_groupings[self.providers.label].items():
+            if provider_label in self.child_db_groupings:
+                for group, ids in self.child_db_groupings[provider_label].items():
                     if child_db.id in ids:
                         index = child_dbs[group].index(child_db.id)
                         child_dbs[group][index] = (attributes.name, attributes)
@@ -377,7 +651,7 @@ class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attrib
             else:
                 child_dbs[""].append((attributes.name, attributes))
 
-        if self.providers.label in self.child_db_groupings:
+        if provider_label in self.child_db_groupings:
             for group, ids in tuple(child_dbs.items()):
                 child_dbs[group] = [_ for _ in ids if isinstance(_, tuple)]
         child_dbs = list(child_dbs.items())
@@ -434,27 +708,58 @@ class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attrib
                 self.__perform_query = False
                 self.page_chooser.update_offset()
 
+        # Freeze and disable both dropdown widgets
+        # We don't want changes leading to weird things happening prior to the query ending
+        self.freeze()
+
+        query = self._query_snapshot()
+        self._executor.run(
+            "child_dbs",
+            lambda token: self._retrieve_more_child_dbs(query, pageing, token),
+            self._on_more_child_dbs_retrieved,
+        )
+
+    def _retrieve_more_child_dbs(
+        self, query: dict, pageing: Optional[str], token: QueryToken
+    ) -> Tuple[list, int, dict]:
+        """Query index meta-database for more child DBs
+
+        The `work` of `_get_more_child_dbs()`.
+        """
+        LOGGER.debug("Querying for more child DBs using pageing: %r", pageing)
+        child_dbs, links, _, _ = self._query(query, link=pageing, token=token)
+
+        data_returned = query["data_returned"]
+        while True:
+            # Update list of child DBs in dropdown widget
+            exclude_child_dbs, final_child_dbs = self._update_child_dbs(
+                child_dbs, provider_label=query["label"], token=token
+            )
+
+            data_returned -= len(exclude_child_dbs)
+            if exclude_child_dbs and data_returned:
+                child_dbs, links, data_returned, _ = self._query(
+                    query, link=pageing, exclude_ids=exclude_child_dbs, token=token
+                )
+            else:
+                break
+        token.check()
+
+        return final_child_dbs, data_returned, links
+
+    def _on_more_child_dbs_retrieved(
+        self,
+        token: QueryToken,
+        result: Optional[Tuple[list, int, dict]],
+        exception: Optional[Exception],
+    ) -> None:
+        """Update child DB dropdown (`done` of `_get_more_child_dbs()`)"""
         try:
-            # Freeze and disable both dropdown widgets
-            # We don't want changes leading to weird things happening prior to the query ending
-            self.freeze()
-
-            # Query index meta-database
-            LOGGER.debug("Querying for more child DBs using pageing: %r", pageing)
-            child_dbs, links, _, _ = self._query(pageing)
-
-            data_returned = self.page_chooser.data_returned
-            while True:
-                # Update list of child DBs in dropdown widget
-                exclude_child_dbs, final_child_dbs = self._update_child_dbs(child_dbs)
-
-                data_returned -= len(exclude_child_dbs)
-                if exclude_child_dbs and data_returned:
-                    child_dbs, links, data_returned, _ = self._query(
-                        link=pageing, exclude_ids=exclude_child_dbs
-                    )
-                else:
-                    break
+            if exception is not None:
+                raise exception
+            token.check()
+
+            final_child_dbs, data_returned, links = result
             self._set_child_dbs(final_child_dbs)
 
             # Update pageing
@@ -462,92 +767,62 @@ class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attrib
                 data_returned=data_returned, links_to_page=links
             )
 
+        except QueryCancelled:
+            LOGGER.debug("Obsolete retrieval of more child DBs: %r", token)
+
         except QueryError as exc:
             LOGGER.debug(
                 "Trying to retrieve more child DBs (new page). QueryError caught: %r",
                 exc,
             )
-            if exc.remove_target:
-                LOGGER.debug(
-                    "Remove target: %r. Will remove target at %r: %r",
-                    exc.remove_target,
-                    self.providers.index,
-                    self.providers.value,
-                )
-                self.providers.options = self._remove_current_dropdown_option(
-                    self.providers
-                )
-                self.reset()
-            else:
-                LOGGER.debug(
-                    "Remove target: %r. Will NOT remove target at %r: %r",
-                    exc.remove_target,
-                    self.providers.index,
-                    self.providers.value,
-                )
-                self.show_child_dbs.display = "none"
-                self.child_dbs.grouping = self.INITIAL_CHILD_DBS
+            self._handle_query_error(token, exc)
 
         else:
-            self.unfreeze()
+            if self._executor.is_current(token):
+                self.unfreeze()
+
+        finally:
+            self._executor.finish(token)
 
     def _query(  # pylint: disable=too-many-locals,too-many-branches,too-many-statements
-        self, link: str = None, exclude_ids: List[str] = None
+        self,
+        query: dict,
+        link: str = None,
+        exclude_ids: List[str] = None,
+        token: QueryToken = None,
     ) -> Tuple[List[dict], dict, int, int]:
-        """Query helper function"""
+        """Query helper function
+
+        :param query: Snapshot of the query (see `_query_snapshot()`).
+        """
+        provider = query["provider"]
         # If a complete link is provided, use it straight up
         if link is not None:
-            try:
-                if exclude_ids:
-                    filter_value = " AND ".join(
-                        [f'NOT id="{id_}"' for id_ in exclude_ids]
-                    )
-
-                    parsed_url = urllib.parse.urlparse(link)
-                    queries = urllib.parse.parse_qs(parsed_url.query)
-                    # Since parse_qs wraps all values in a list,
-                    # this extracts the values from the list(s).
-                    queries = {key: value[0] for key, value in queries.items()}
-
-                    if "filter" in queries:
-                        queries[
-                            "filter"
-                        ] = f"( {queries['filter']} ) AND ( {filter_value} )"
-                    else:
-                        queries["filter"] = filter_value
+            if exclude_ids:
+                filter_value = " AND ".join([f'NOT id="{id_}"' for id_ in exclude_ids])
+
+                parsed_url = urllib.parse.urlparse(link)
+                queries = urllib.parse.parse_qs(parsed_url.query)
+                # Since parse_qs wraps all values in a list,
+                # this extracts the values from the list(s).
+                queries = {key: value[0] for key, value in queries.items()}
+
+                if "filter" in queries:
+                    queries[
+                        "filter"
+                    ] = f"( {queries['filter']} ) AND ( {filter_value} )"
+                else:
+                    queries["filter"] = filter_value
 
-                    parsed_query = urllib.parse.urlencode(queries)
+                parsed_query = urllib.parse.urlencode(queries)
 
-                    link = (
-                        f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
-                        f"?{parsed_query}"
-                    )
+                link = (
+                    f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
+                    f"?{parsed_query}"
+                )
 
-                link = ordered_query_url(link)
-                response = SESSION.get(link, timeout=TIMEOUT_SECONDS)
-                if response.from_cache:
-                    LOGGER.debug("Request to %s was taken from cache !", link)
-                response = response.json()
-            except (
-                requests.exceptions.ConnectTimeout,
-                requests.exceptions.ConnectionError,
-                requests.exceptions.ReadTimeout,
-            ) as exc:
-                response = {
-                    "errors": {
-                        "msg": "CLIENT: Connection error or timeout.",
-                        "url": link,
-                        "Exception": repr(exc),
-                    }
-                }
-            except json.JSONDecodeError as exc:
-                response = {
-                    "errors": {
-                        "msg": "CLIENT: Could not decode response to JSON.",
-                        "url": link,
-                        "Exception": repr(exc),
-                    }
-                }
+            start = time.monotonic()
+            response = perform_optimade_link_query(link, token=token)
         else:
             filter_ = '( link_type="child" OR type="child" )'
             if exclude_ids:
@@ -557,21 +832,30 @@ class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attrib
                     + " )"
                 )
 
+            start = time.monotonic()
             response = perform_optimade_query(
                 filter=filter_,
-                base_url=self.provider.base_url,
+                base_url=provider.base_url,
                 endpoint="/links",
-                page_limit=self.child_db_limit,
-                page_offset=self.offset,
-                page_number=self.number,
+                page_limit=query["page_limit"],
+                page_offset=query["page_offset"],
+                page_number=query["page_number"],
+                token=token,
             )
+        elapsed = time.monotonic() - start
         msg, http_errors = handle_errors(response)
+        if token is not None:
+            token.check()
+        if not msg and self._page_limit_tuner is not None:
+            self._page_limit_tuner.record(
+                provider.base_url, response.get("data", []), elapsed
+            )
         if msg:
             if 404 in http_errors:
                 # If /links not found move on
                 pass
             else:
-                self.error_or_status_messages.value = msg
+                self._executor.call_soon(token, self._show_message, msg)
                 raise QueryError(msg=msg, remove_target=True)
 
         # Check implementation API version
@@ -579,8 +863,8 @@ class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attrib
             response.get("meta", {}).get("api_version", ""), raise_on_fail=False
         )
         if msg:
-            self.error_or_status_messages.value = (
-                f"{msg}<br>The provider has been removed."
+            self._executor.call_soon(
+                token, self._show_message, f"{msg}<br>The provider has been removed."
             )
             raise QueryError(msg=msg, remove_target=True)
 
@@ -609,7 +893,7 @@ class ProviderImplementationChooser(  # pylint: disable=too-many-instance-attrib
 
         LOGGER.debug(
             "Attempt for %r (in /links): Found implementations (names+base_url only):\n%s",
-            self.provider.name,
+            provider.name,
             [
                 f"(id: {name}; base_url: {base_url}) "
                 for name, base_url in [
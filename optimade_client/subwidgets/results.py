@@ -17,6 +17,7 @@ class StructureDropdown(ipw.Dropdown):
     NO_OPTIONS = "Search for structures ..."
     HINT = "Select a structure"
     NO_RESULTS = "No structures found!"
+    LOADING = "Retrieving {} structures ..."
 
     def __init__(self, options=None, **kwargs):
         if options is None:
@@ -39,6 +40,28 @@ class StructureDropdown(ipw.Dropdown):
         with self.hold_trait_notifications():
             self.index = index
 
+    def add_options(self, options: list):
+        """Append options, keeping the current choice"""
+        index = self.index
+        with self.hold_trait_notifications():
+            self.options = tuple(self.options) + tuple(options)
+            self.index = index
+
+    def relabel_options(self, labels: typing.Dict[str, str]):
+        """Change the labels of options, keeping the current choice"""
+        index = self.index
+        with self.hold_trait_notifications():
+            self.options = [
+                (labels.get(label, label), value) for label, value in self.options
+            ]
+            self.index = index
+
+    def set_loading(self, data_returned: int):
+        """Show the number of structures being retrieved"""
+        with self.hold_trait_notifications():
+            self.options = [(self.LOADING.format(data_returned), None)]
+            self.index = 0
+
     def reset(self):
         """Reset widget"""
         with self.hold_trait_notifications():
@@ -58,23 +81,37 @@ class StructureDropdown(ipw.Dropdown):
 class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attributes
     """Flip through the OPTIMADE 'pages'
 
-    NOTE: Only supports offset-pagination at the moment.
+    Pagination links are followed if provided, including cursor-based links
+    (using `page_above`/`page_below`), otherwise `page_offset` and `page_number` are set.
+    The position shown is tracked independently of the pagination method.
+
+    If `load_more_pages` is given, a button is added to request extending the current
+    view with this number of pages, by setting `load_more_offset` to the offset of the
+    first entry to load. The view is extended by calling `extend_view()`.
     """
 
     page_offset = traitlets.Int(None, allow_none=True)
     page_number = traitlets.Int(None, allow_none=True)
     page_link = traitlets.Unicode(allow_none=True)
+    load_more_offset = traitlets.Int(None, allow_none=True)
 
     # {name: default value}
-    SUPPORTED_PAGEING = {"page_offset": 0, "page_number": 1}
-
-    def __init__(self, page_limit: int, **kwargs):
+    SUPPORTED_PAGEING = {
+        "page_offset": 0,
+        "page_number": 1,
+        "page_above": None,
+        "page_below": None,
+    }
+
+    def __init__(self, page_limit: int, load_more_pages: int = 0, **kwargs):
         self._cache = {}
         self.__last_page_offset: typing.Union[None, int] = None
         self.__last_page_number: typing.Union[None, int] = None
         self._layout = kwargs.pop("layout", ipw.Layout(width="auto"))
 
         self._page_limit = page_limit
+        self._load_more_pages = load_more_pages
+        self._view_pages = 1
         self._data_returned = 0
         self._data_available = 0
         self.pages_links = {}
@@ -96,22 +133,30 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
         self.button_last = self._create_arrow_button(
             "angle-double-right", "Last results"
         )
+        self.button_more = self._create_arrow_button(
+            "plus", f"Load next {self._load_more_pages * self._page_limit} results"
+        )
 
         self.button_first.on_click(self._goto_first)
         self.button_prev.on_click(self._goto_prev)
         self.button_next.on_click(self._goto_next)
         self.button_last.on_click(self._goto_last)
+        self.button_more.on_click(self._load_more)
 
         self._update_cache()
 
+        children = [
+            self.button_first,
+            self.button_prev,
+            self.text,
+            self.button_next,
+            self.button_last,
+        ]
+        if self._load_more_pages:
+            children.append(self.button_more)
+
         super().__init__(
-            children=[
-                self.button_first,
-                self.button_prev,
-                self.text,
-                self.button_next,
-                self.button_last,
-            ],
+            children=children,
             layout=self._layout,
             **kwargs,
         )
@@ -139,10 +184,13 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
         self.text.value = "Showing 0 of 0 results"
         self.button_next.disabled = True
         self.button_last.disabled = True
+        self.button_more.disabled = True
+        self._view_pages = 1
         with self.hold_trait_notifications():
             self.page_offset = self.SUPPORTED_PAGEING["page_offset"]
             self.page_number = self.SUPPORTED_PAGEING["page_number"]
             self.page_link = None
+            self.load_more_offset = None
         self._update_cache()
 
     def freeze(self):
@@ -151,6 +199,7 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
         self.button_prev.disabled = True
         self.button_next.disabled = True
         self.button_last.disabled = True
+        self.button_more.disabled = True
 
     def unfreeze(self):
         """Activate widget (in its current state)"""
@@ -158,6 +207,30 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
         self.button_prev.disabled = self._cache["buttons"]["prev"]
         self.button_next.disabled = self._cache["buttons"]["next"]
         self.button_last.disabled = self._cache["buttons"]["last"]
+        self.button_more.disabled = self._cache["buttons"]["more"]
+
+    @property
+    def page_limit(self) -> int:
+        """Number of results per page"""
+        return self._page_limit
+
+    @page_limit.setter
+    def page_limit(self, value: int):
+        """Set number of results per page"""
+        try:
+            value = int(value)
+        except (TypeError, ValueError) as exc:
+            raise InputError("page_limit must be an integer") from exc
+        if value < 1:
+            raise InputError("page_limit must be a positive integer")
+        self._page_limit = value
+        self.__last_page_offset = None
+        self.__last_page_number = None
+        self.button_prev.tooltip = f"Previous {self._page_limit} results"
+        self.button_next.tooltip = f"Next {self._page_limit} results"
+        self.button_more.tooltip = (
+            f"Load next {self._load_more_pages * self._page_limit} results"
+        )
 
     @property
     def data_returned(self) -> int:
@@ -226,6 +299,7 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
                 "prev": self.button_prev.disabled,
                 "next": self.button_next.disabled,
                 "last": self.button_last.disabled,
+                "more": self.button_more.disabled,
             },
             "page_offset": offset,
             "page_number": number,
@@ -238,19 +312,53 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
             disabled=True, icon=icon, tooltip=tooltip, **self._button_layout
         )
 
-    def _parse_pageing(self, url: str, pageing: str = "page_offset") -> int:
-        """Retrieve and parse `pageing` value from request URL"""
+    def _parse_pageing(
+        self, url: str, pageing: str = "page_offset"
+    ) -> typing.Union[None, int, str]:
+        """Retrieve and parse `pageing` value from request URL
+
+        `page_offset` and `page_number` are integers, while the cursors `page_above` and
+        `page_below` are values of the sort key (kept as strings).
+        """
         parsed_url = urlparse(url)
         query = parse_qs(parsed_url.query)
-        return int(query.get(pageing, [str(self.SUPPORTED_PAGEING[pageing])])[0])
+        if pageing not in query:
+            return self.SUPPORTED_PAGEING[pageing]
+        value = query[pageing][0]
+        return int(value) if pageing in ("page_offset", "page_number") else value
+
+    def _cache_from_link(self, link: str, page_offset: int, page_number: int) -> None:
+        """Update cached pageing from a pagination link
+
+        If the link states only one of `page_offset` and `page_number`, the other is
+        derived from it. Links stating neither (e.g., cursor-based links) keep track of the
+        position through the expected `page_offset` and `page_number`.
+        """
+        query = parse_qs(urlparse(link).query)
+        for pageing in self.SUPPORTED_PAGEING:
+            self._cache[pageing] = self._parse_pageing(link, pageing)
+
+        if "page_offset" in query and "page_number" not in query:
+            self._cache["page_number"] = (
+                self._cache["page_offset"] // self._page_limit + 1
+            )
+        elif "page_number" in query and "page_offset" not in query:
+            self._cache["page_offset"] = (
+                self._cache["page_number"] - 1
+            ) * self._page_limit
+        elif "page_offset" not in query:
+            self._cache["page_offset"] = page_offset
+            self._cache["page_number"] = page_number
 
     def _goto_first(self, _):
         """Go to first page of results"""
         if self.pages_links.get("first", False):
-            for pageing in self.SUPPORTED_PAGEING:
-                self._cache[pageing] = self._parse_pageing(
-                    self.pages_links["first"], pageing
-                )
+            self._view_pages = 1
+            self._cache_from_link(
+                self.pages_links["first"],
+                page_offset=0,
+                page_number=1,
+            )
 
             LOGGER.debug(
                 "Go to first page of results - using link: %s",
@@ -258,6 +366,7 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
             )
             self.page_link = self.pages_links["first"]
         else:
+            self._view_pages = 1
             self._cache["page_offset"] = 0
             self._cache["page_number"] = 1
 
@@ -272,10 +381,12 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
     def _goto_prev(self, _):
         """Go to previous page of results"""
         if self.pages_links.get("prev", False):
-            for pageing in self.SUPPORTED_PAGEING:
-                self._cache[pageing] = self._parse_pageing(
-                    self.pages_links["prev"], pageing
-                )
+            self._view_pages = 1
+            self._cache_from_link(
+                self.pages_links["prev"],
+                page_offset=self._cache["page_offset"] - self._page_limit,
+                page_number=self._cache["page_number"] - 1,
+            )
 
             LOGGER.debug(
                 "Go to previous page of results - using link: %s",
@@ -283,6 +394,7 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
             )
             self.page_link = self.pages_links["prev"]
         else:
+            self._view_pages = 1
             self._cache["page_offset"] -= self._page_limit
             self._cache["page_number"] -= 1
 
@@ -297,19 +409,22 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
 
     def _goto_next(self, _):
         """Go to next page of results"""
-        if self.pages_links.get("next", False):
-            for pageing in self.SUPPORTED_PAGEING:
-                self._cache[pageing] = self._parse_pageing(
-                    self.pages_links["next"], pageing
-                )
+        if self.pages_links.get("next", False) and self._view_pages == 1:
+            # The "next" link does not account for an extended view
+            self._cache_from_link(
+                self.pages_links["next"],
+                page_offset=self._cache["page_offset"] + self._page_limit,
+                page_number=self._cache["page_number"] + 1,
+            )
 
             LOGGER.debug(
                 "Go to next page of results - using link: %s", self.pages_links["next"]
             )
             self.page_link = self.pages_links["next"]
         else:
-            self._cache["page_offset"] += self._page_limit
-            self._cache["page_number"] += 1
+            self._cache["page_offset"] += self._view_pages * self._page_limit
+            self._cache["page_number"] += self._view_pages
+            self._view_pages = 1
 
             LOGGER.debug(
                 "Go to next page of results - using pageing:\n  page_offset=%d\n  page_number=%d",
@@ -322,16 +437,19 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
     def _goto_last(self, _):
         """Go to last page of results"""
         if self.pages_links.get("last", False):
-            for pageing in self.SUPPORTED_PAGEING:
-                self._cache[pageing] = self._parse_pageing(
-                    self.pages_links["last"], pageing
-                )
+            self._view_pages = 1
+            self._cache_from_link(
+                self.pages_links["last"],
+                page_offset=self._last_page_offset,
+                page_number=self._last_page_number,
+            )
 
             LOGGER.debug(
                 "Go to last page of results - using link: %s", self.pages_links["last"]
             )
             self.page_link = self.pages_links["last"]
         else:
+            self._view_pages = 1
             self._cache["page_offset"] = self._last_page_offset
             self._cache["page_number"] = self._last_page_number
 
@@ -341,10 +459,32 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
             )
             self.page_offset = self._cache["page_offset"]
 
+    def _load_more(self, _):
+        """Request loading the next results into the current view"""
+        offset = self._cache["page_offset"] + self._view_pages * self._page_limit
+        LOGGER.debug(
+            "Load %d more results from offset %d",
+            self._load_more_pages * self._page_limit,
+            offset,
+        )
+        self.load_more_offset = offset
+
+    def extend_view(self, number_of_pages: int):
+        """Extend the current view with `number_of_pages` loaded pages"""
+        self._view_pages += number_of_pages
+        self.load_more_offset = None
+        self._update()
+
     def _update(self):
         """Update widget according to chosen results using pageing"""
         offset = self._cache["page_offset"]
         number = self._cache["page_number"]
+        view_end = offset + self._view_pages * self._page_limit
+        last_page = (
+            offset == self._last_page_offset
+            or number == self._last_page_number
+            or view_end >= self.data_returned
+        )
 
         if offset >= self._page_limit or number > self.SUPPORTED_PAGEING["page_number"]:
             self.button_first.disabled = False
@@ -354,10 +494,10 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
             self.button_prev.disabled = True
 
         if self.data_returned > self._page_limit:
-            if offset == self._last_page_offset or number == self._last_page_number:
+            if last_page:
                 result_range = f"{offset + 1}-{self.data_returned}"
             else:
-                result_range = f"{offset + 1}-{offset + self._page_limit}"
+                result_range = f"{offset + 1}-{view_end}"
         elif self.data_returned == 0:
             result_range = "0"
         elif self.data_returned == 1:
@@ -366,12 +506,14 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
             result_range = f"{offset + 1}-{self.data_returned}"
         self.text.value = f"Showing {result_range} of {self.data_returned} results"
 
-        if offset == self._last_page_offset or number == self._last_page_number:
+        if last_page:
             self.button_next.disabled = True
             self.button_last.disabled = True
+            self.button_more.disabled = True
         else:
             self.button_next.disabled = False
             self.button_last.disabled = False
+            self.button_more.disabled = False
 
         self._update_cache(page_offset=offset, page_number=number)
 
@@ -390,7 +532,11 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
         if links_to_page is not None:
             self.pages_links = links_to_page
         if reset_cache:
-            self._update_cache(**self.SUPPORTED_PAGEING)
+            self._view_pages = 1
+            self._update_cache(
+                page_offset=self.SUPPORTED_PAGEING["page_offset"],
+                page_number=self.SUPPORTED_PAGEING["page_number"],
+            )
             self.__last_page_offset = None
 
         self._update()
@@ -399,6 +545,7 @@ class ResultsPageChooser(ipw.HBox):  # pylint: disable=too-many-instance-attribu
         """Update offset from cache"""
         with self.hold_trait_notifications():
             self.page_offset = self._cache["page_offset"]
+        return self.page_offset
 
     def silent_reset(self):
         """Reset, but avoid updating page_offset or page_link"""
@@ -0,0 +1,177 @@
+import html
+from pathlib import Path
+from typing import Callable, Optional
+
+import ipywidgets as ipw
+
+from optimade_client.exceptions import OptimadeClientError, QueryCancelled
+from optimade_client.executor import QueryExecutor, QueryToken
+from optimade_client.export import (
+    EXPORT_DIR,
+    ExportFormat,
+    export_query_results,
+    query_digest,
+)
+from optimade_client.logger import LOGGER
+
+
+__all__ = ("ResultsExporter",)
+
+
+class ResultsExporter(ipw.VBox):
+    """Export all results of the current query to a file on the server
+
+    The query is retrieved through `get_query`, which should return the keyword arguments
+    for `perform_optimade_query()` for the first page of results, or `None` if there is
+    nothing to export.
+    The file is named by `filename` and a digest of the query, so exporting the same query
+    again resumes an interrupted export, while other queries are exported to other files.
+    The export runs in the background (see `optimade_client.executor`).
+    """
+
+    NO_FORMAT = "Select an export format"
+
+    def __init__(
+        self,
+        get_query: Callable[[], Optional[dict]] = None,
+        filename: Callable[[ExportFormat], str] = None,
+        **kwargs,
+    ):
+        self._get_query = get_query or (lambda: None)
+        self._filename = filename or (lambda export_format: "optimade_export")
+        self._executor = QueryExecutor()
+
+        options = [(self.NO_FORMAT, None)]
+        options.extend(
+            (export_format.description, export_format)
+            for export_format in ExportFormat.available()
+        )
+        self.format_drop = ipw.Dropdown(
+            options=options, disabled=True, layout={"width": "auto"}
+        )
+        self.format_drop.observe(self._on_format_change, names="value")
+
+        self.export_button = ipw.Button(
+            description="Export all",
+            disabled=True,
+            icon="download",
+            tooltip="Export all results to a file on the server",
+            layout={"width": "auto"},
+        )
+        self.export_button.on_click(self._export)
+
+        self.progress = ipw.IntProgress(
+            value=0, min=0, max=1, layout={"width": "auto", "visibility": "hidden"}
+        )
+        self.status = ipw.HTML("")
+
+        super().__init__(
+            children=(
+                ipw.HBox(
+                    children=(self.format_drop, self.export_button, self.progress),
+                    layout={"width": "auto"},
+                ),
+                self.status,
+            ),
+            layout=kwargs.pop("layout", {"width": "auto"}),
+            **kwargs,
+        )
+
+    def _on_format_change(self, change: dict) -> None:
+        """Only allow exporting when a format has been chosen"""
+        self.export_button.disabled = change["new"] is None or self.format_drop.disabled
+
+    def _update_progress(self, handled: int, total: Optional[int]) -> None:
+        """Update progress bar and status text"""
+        self.progress.max = max(total or handled, 1)
+        self.progress.value = min(handled, self.progress.max)
+        self.status.value = (
+            f"Exported {handled} of {total if total is not None else '?'} results ..."
+        )
+
+    def _export(self, _) -> None:
+        """Export all results of the current query"""
+        export_format: ExportFormat = self.format_drop.value
+        query = self._get_query()
+        if export_format is None or query is None:
+            return
+
+        target = EXPORT_DIR / (
+            f"{self._filename(export_format)}_{query_digest(query)}"
+            f"{export_format.value}"
+        )
+        LOGGER.debug("Exporting results of query %r to %s.", query, target)
+
+        self.freeze()
+        self.progress.layout.visibility = "visible"
+        self.progress.bar_style = ""
+        self._executor.run(
+            "export",
+            lambda token: self._export_results(query, target, export_format, token),
+            self._on_exported,
+        )
+
+    def _export_results(
+        self, query: dict, target: Path, export_format: ExportFormat, token: QueryToken
+    ) -> Path:
+        """Export all results to `target` (`work` of `_export()`)"""
+        return export_query_results(
+            query=query,
+            target=target,
+            export_format=export_format,
+            progress=lambda handled, total: self._executor.call_soon(
+                token, self._update_progress, handled, total
+            ),
+            token=token,
+        )
+
+    def _on_exported(
+        self,
+        token: QueryToken,
+        result: Optional[Path],
+        exception: Optional[Exception],
+    ) -> None:
+        """Show the outcome of the export (`done` of `_export()`)"""
+        try:
+            if exception is not None:
+                raise exception
+            token.check()
+        except QueryCancelled:
+            LOGGER.debug("Export cancelled: %r", token)
+        except OptimadeClientError as exc:
+            self.progress.bar_style = "danger"
+            self.status.value = (
+                '<font color="red">Export was interrupted. '
+                "Press the button again to resume it.</font>"
+            )
+            LOGGER.debug("Export interrupted: %r", exc)
+        except OSError as exc:
+            self.progress.bar_style = "danger"
+            self.status.value = f'<font color="red">Could not write the exported file: {html.escape(str(exc))}</font>'
+            LOGGER.error("Export could not be written: %r", exc)
+        else:
+            self.progress.bar_style = "success"
+            self.status.value = f"Exported results to <code>{result}</code>"
+        finally:
+            if self._executor.finish(token):
+                # Otherwise the export was cancelled by a reset
+                self.unfreeze()
+
+    def freeze(self):
+        """Disable widget"""
+        self.format_drop.disabled = True
+        self.export_button.disabled = True
+
+    def unfreeze(self):
+        """Activate widget (in its current state)"""
+        self.format_drop.disabled = False
+        self.export_button.disabled = self.format_drop.value is None
+
+    def reset(self):
+        """Reset widget"""
+        self._executor.cancel("export")
+        self.format_drop.index = 0
+        self.progress.value = 0
+        self.progress.layout.visibility = "hidden"
+        self.status.value = ""
+        self.freeze()
@@ -0,0 +1,178 @@
+import math
+from typing import Any, Callable, List, Optional, Tuple
+
+import ipywidgets as ipw
+import traitlets
+
+
+__all__ = ("ResultsGrid",)
+
+
+def _source(value: dict) -> str:
+    sources = value.get("sources") or []
+    return ", ".join(dict.fromkeys(source for source, _ in sources))
+
+
+class ResultsGrid(ipw.VBox):
+    """Table of the loaded results, which can be sorted and filtered locally
+
+    The rows are the options of a `StructureDropdown`, i.e., `(label, value)` pairs, where
+    `value` holds the `id`, formula, derived `properties` and raw `entry` of a structure.
+    `index` is the index of the chosen option in the list given to `set_options()`.
+    """
+
+    # (header, format, value from option value)
+    COLUMNS: List[Tuple[str, str, Callable[[dict], Any]]] = [
+        ("Formula", "{:<20.20}", lambda value: value["formula"]),
+        (
+            "Sites",
+            "{:>6}",
+            lambda value: value["entry"]["attributes"].get("nsites"),
+        ),
+        (
+            "Elements",
+            "{:>8}",
+            lambda value: value["entry"]["attributes"].get("nelements"),
+        ),
+        (
+            "Volume (Å³)",
+            "{:>11.2f}",
+            lambda value: value.get("properties", {}).get("volume"),
+        ),
+        (
+            "Density (g/cm³)",
+            "{:>15.3f}",
+            lambda value: value.get("properties", {}).get("density"),
+        ),
+        ("ID", "{:<24.24}", lambda value: str(value["id"])),
+        ("Database", "{:<20.20}", _source),
+    ]
+
+    index = traitlets.Int(None, allow_none=True)
+
+    def __init__(self, rows: int = 8, **kwargs):
+        self._options: List[Tuple[str, Optional[dict]]] = []
+        self._order: List[int] = []
+
+        self.sort_by = ipw.Dropdown(
+            options=[header for header, _, _ in self.COLUMNS],
+            value="Formula",
+            description="Sort by:",
+            layout={"width": "auto"},
+        )
+        self.descending = ipw.ToggleButton(
+            value=False,
+            description="Descending",
+            icon="sort-down",
+            tooltip="Sort in descending order",
+            layout={"width": "auto"},
+        )
+        self.filter = ipw.Text(
+            placeholder="Filter by formula, ID or database",
+            continuous_update=False,
+            layout={"width": "auto"},
+        )
+        for widget in (self.sort_by, self.descending, self.filter):
+            widget.observe(self._update_rows, names="value")
+
+        self.header = ipw.HTML(
+            "<style>.optimade-results-grid select, .optimade-results-grid pre "
+            '{ font-family: "Courier New", Courier, monospace; font-size: 12px; }</style>'
+            f"<pre style='margin:0px;'>{self._format_row(None)}</pre>"
+        )
+        self.table = ipw.Select(options=[], rows=rows, layout={"width": "auto"})
+        self.table.observe(self._on_select, names="value")
+        self.status = ipw.HTML("")
+
+        super().__init__(
+            children=(
+                ipw.HBox(children=(self.sort_by, self.descending, self.filter)),
+                self.header,
+                self.table,
+                self.status,
+            ),
+            layout=kwargs.pop("layout", {"width": "auto"}),
+            **kwargs,
+        )
+        self.add_class("optimade-results-grid")
+
+    def set_options(self, options: List[Tuple[str, Optional[dict]]]) -> None:
+        """Show the options of a `StructureDropdown` (options without value are skipped)"""
+        self._options = list(options)
+        self._update_rows()
+
+    def _format_row(self, value: Optional[dict]) -> str:
+        """Format an option value as a row, or the header for `None`"""
+        cells = []
+        for header, cell_format, getter in self.COLUMNS:
+            width = int("".join(_ for _ in cell_format.split(".")[0] if _.isdigit()))
+            if value is None:
+                cells.append(f"{header:<{width}.{width}}")
+                continue
+            cell = getter(value)
+            if cell is None or (isinstance(cell, float) and math.isnan(cell)):
+                cells.append(" " * (width - 1) + "-")
+            else:
+                cells.append(cell_format.format(cell))
+        return " ".join(cells).rstrip()
+
+    def _sort_key(self, index: int) -> Tuple[bool, Any]:
+        """Sort by the chosen column, placing rows without value last"""
+        getter = {header: getter for header, _, getter in self.COLUMNS}[
+            self.sort_by.value
+        ]
+        cell = getter(self._options[index][1])
+        missing = cell is None or (isinstance(cell, float) and math.isnan(cell))
+        return missing != self.descending.value, cell if not missing else 0
+
+    def _update_rows(self, _: dict = None) -> None:
+        """Sort and filter the rows locally"""
+        text = self.filter.value.strip().lower()
+        order = [
+            index
+            for index, (_, value) in enumerate(self._options)
+            if value is not None
+            and (
+                not text
+                or text in str(value["formula"]).lower()
+                or text in str(value["id"]).lower()
+                or text in _source(value).lower()
+            )
+        ]
+        order.sort(key=self._sort_key, reverse=self.descending.value)
+        self._order = order
+
+        chosen = self.index
+        with self.hold_trait_notifications():
+            self.table.options = [
+                (self._format_row(self._options[index][1]), index) for index in order
+            ]
+            self.table.value = chosen if chosen in order else None
+        shown = sum(1 for _, value in self._options if value is not None)
+        self.status.value = (
+            f"Showing {len(order)} of {shown} loaded results" if text else ""
+        )
+
+    def _on_select(self, change: dict) -> None:
+        """Set `index` to the chosen row"""
+        self.index = change["new"]
+
+    def select(self, index: Optional[int]) -> None:
+        """Choose the row of the option with `index` (if shown)"""
+        self.table.value = index if index in self._order else None
+
+    def freeze(self):
+        """Disable widget"""
+        for widget in (self.sort_by, self.descending, self.filter, self.table):
+            widget.disabled = True
+
+    def unfreeze(self):
+        """Activate widget (in its current state)"""
+        for widget in (self.sort_by, self.descending, self.filter, self.table):
+            widget.disabled = False
+
+    def reset(self):
+        """Reset widget"""
+        self.filter.value = ""
+        self.set_options([])
+        self.freeze()
@@ -1,6 +1,8 @@
 import base64
+import html
+import io
 import tempfile
-from typing import Union
+from typing import Optional, Tuple, Union
 import warnings
 
 import ipywidgets as ipw
@@ -24,6 +26,8 @@ from optimade.adapters import Structure
 from optimade.models import StructureFeatures
 
 from optimade_client import exceptions
+from optimade_client.conversions import CONVERSION_CACHE
+from optimade_client.executor import kernel_loop
 from optimade_client.logger import LOGGER
 from optimade_client.subwidgets import (
     StructureSummary,
@@ -138,11 +142,17 @@ class OptimadeSummaryWidget(ipw.Box):
 class DownloadChooser(ipw.HBox):
     """Download chooser for structure download
 
-    To be able to have the download button work no matter the widget's final environment,
-    (as long as it supports JavaScript), the very helpful insight from the following page is used:
-    https://stackoverflow.com/questions/2906582/how-to-create-an-html-button-that-acts-like-a-link
+    The structure is only converted when the download button is clicked.
+    To be able to have the download work no matter the widget's final environment
+    (including Voila, which does not run scripts), the file is then offered as a plain link
+    to save it. Since the file is part of the link, it is kept in the widget state while it
+    is offered. Whether the link has been used cannot be observed, hence it is removed after
+    `LINK_SECONDS` (when running in a kernel), as well as when another format or structure
+    is chosen.
     """
 
+    LINK_SECONDS = 60.0
+
     chosen_format = traitlets.Tuple(traitlets.Unicode(), traitlets.Dict())
     structure = traitlets.Instance(Structure, allow_none=True)
 
@@ -182,15 +192,10 @@ class DownloadChooser(ipw.HBox):
         #     {"ext": "cif", "adapter_format": "pdbx_mmcif"},
         # ),
     ]
-    _download_button_format = """
-<input type="button" class="p-Widget jupyter-widgets jupyter-button widget-button mod-{button_style}" value="Download" title="Download structure" style="width:auto;" {disabled}
-onclick="var link = document.createElement('a');
-link.href = 'data:charset={encoding};base64,{data}';
-link.download = '{filename}';
-document.body.appendChild(link);
-link.click();
-document.body.removeChild(link);" />
-"""
+    _download_link_format = (
+        '<a href="{href}" download="{filename}" title="Save {filename}">'
+        '<i class="fa fa-save"></i> {filename}</a>'
+    )
 
     def __init__(self, button_style: Union[ButtonStyle, str] = None, **kwargs):
         if button_style:
@@ -210,17 +215,20 @@ document.body.removeChild(link);" />
         options = self._formats
         options.insert(0, ("Select a format", {}))
         self.dropdown = DropdownExtended(options=options, layout={"width": "auto"})
-        self.download_button = ipw.HTML(
-            self._download_button_format.format(
-                button_style=self._button_style.value,
-                disabled="disabled",
-                encoding="",
-                data="",
-                filename="",
-            )
+        self.download_button = ipw.Button(
+            description="Download",
+            icon="download",
+            tooltip="Download structure",
+            button_style=""
+            if self._button_style == ButtonStyle.DEFAULT
+            else self._button_style.value,
+            disabled=True,
+            layout={"width": "auto"},
         )
+        self.download_button.on_click(self._download)
+        self.download_link = ipw.HTML("", layout={"width": "auto"})
 
-        self.children = (self.dropdown, self.download_button)
+        self.children = (self.dropdown, self.download_button, self.download_link)
         super().__init__(children=self.children, layout={"width": "auto"})
         self.reset()
 
@@ -229,6 +237,7 @@ document.body.removeChild(link);" />
     @traitlets.observe("structure")
     def _on_change_structure(self, change: dict):
         """Update widget when a new structure is chosen"""
+        self.download_link.value = ""
         if change["new"] is None:
             LOGGER.debug(
                 "Got no new structure for DownloadChooser (change['new']=%s).",
@@ -306,34 +315,83 @@ document.body.removeChild(link);" />
         self.dropdown.disabled_options = list(disabled_options)
 
     def _update_download_button(self, change: dict):
-        """Update Download button with correct onclick value
-
-        The whole parsing process from `Structure` to desired format, is wrapped in a try/except,
-        which is further wrapped in a `warnings.catch_warnings()`.
-        This is in order to be able to log any warnings that might be thrown by the adapter in
-        `optimade-python-tools` and/or any related exceptions.
-        """
+        """Only allow downloading when a format has been chosen"""
         desired_format = change["new"]
         LOGGER.debug(
             "Updating the download button with desired format: %s", desired_format
         )
-        if not desired_format or desired_format is None:
-            self.download_button.value = self._download_button_format.format(
-                button_style=self._button_style.value,
-                disabled="disabled",
-                encoding="",
-                data="",
-                filename="",
-            )
+        self.download_link.value = ""
+        self.download_button.disabled = (
+            not desired_format or self.structure is None or self.dropdown.disabled
+        )
+
+    def _download(self, _) -> None:
+        """Convert the structure to the chosen format and offer the file as a link"""
+        desired_format = self.dropdown.value
+        if not desired_format or self.structure is None:
+            return
+
+        self.download_button.disabled = True
+        self.download_button.icon = "cog"
+        try:
+            converted = self._convert(desired_format)
+        finally:
+            self.download_button.icon = "download"
+            self.download_button.disabled = False
+        if converted is None:
             return
 
+        output, encoding, filename = converted
+        data = base64.b64encode(output).decode()
+        link = self._download_link_format.format(
+            href=f"data:charset={encoding};base64,{data}",
+            filename=html.escape(filename),
+        )
+        self.download_link.value = link
+
+        loop = kernel_loop()
+        if loop is not None:
+            loop.call_later(self.LINK_SECONDS, self._remove_link, link)
+
+    def _remove_link(self, link: str) -> None:
+        """Remove the download link, unless it has been replaced since"""
+        if self.download_link.value == link:
+            self.download_link.value = ""
+
+    def _convert(self, desired_format: dict) -> Optional[Tuple[bytes, str, str]]:
+        """Convert the structure to `desired_format`, reusing cached conversions
+
+        See `optimade_client.conversions`.
+
+        :return: The file content, its encoding and the filename, or `None` if the adapter
+            warned.
+        """
+        filename = f"optimade_structure_{self.structure.id}{desired_format['ext']}"
+        converted = CONVERSION_CACHE.file(
+            self.structure,
+            f"{desired_format['adapter_format']}:{desired_format.get('final_format', '')}",
+            lambda: self._write(desired_format),
+        )
+        if converted is None:
+            return None
+        output, encoding = converted
+        return output, encoding, filename
+
+    def _write(self, desired_format: dict) -> Optional[Tuple[bytes, str]]:
+        """Write the structure in `desired_format` (see `_convert()`)
+
+        The whole parsing process from `Structure` to desired format, is wrapped in a try/except,
+        which is further wrapped in a `warnings.catch_warnings()`.
+        This is in order to be able to log any warnings that might be thrown by the adapter in
+        `optimade-python-tools` and/or any related exceptions.
+        """
         output = None
         with warnings.catch_warnings():
             warnings.filterwarnings("error")
 
             try:
-                output = getattr(
-                    self.structure, f"as_{desired_format['adapter_format']}"
+                output = CONVERSION_CACHE.adapter(
+                    self.structure, desired_format["adapter_format"]
                 )
             except RuntimeWarning as warn:
                 if "numpy.ufunc size changed" in str(warn):
@@ -343,35 +401,16 @@ document.body.removeChild(link);" />
                     # using the currently installed numpy version.
                     # However, it shouldn't be critical, hence here the warning will be ignored.
                     warnings.filterwarnings("default")
-                    output = getattr(
-                        self.structure, f"as_{desired_format['adapter_format']}"
+                    output = CONVERSION_CACHE.adapter(
+                        self.structure, desired_format["adapter_format"]
                     )
                 else:
-                    self.download_button.value = self._download_button_format.format(
-                        button_style=self._button_style.value,
-                        disabled="disabled",
-                        encoding="",
-                        data="",
-                        filename="",
-                    )
                     warnings.warn(OptimadeClientWarning(warn))
+                    return None
             except Warning as warn:
-                self.download_button.value = self._download_button_format.format(
-                    button_style=self._button_style.value,
-                    disabled="disabled",
-                    encoding="",
-                    data="",
-                    filename="",
-                )
                 warnings.warn(OptimadeClientWarning(warn))
+                return None
             except Exception as exc:
-                self.download_button.value = self._download_button_format.format(
-                    button_style=self._button_style.value,
-                    disabled="disabled",
-                    encoding="",
-                    data="",
-                    filename="",
-                )
                 if isinstance(exc, exceptions.OptimadeClientError):
                     raise exc
                 # Else wrap the exception to make sure to log it.
@@ -391,19 +430,9 @@ document.body.removeChild(link);" />
         if desired_format["ext"] == ".cif":
             encoding = "latin-1"
 
-        filename = f"optimade_structure_{self.structure.id}{desired_format['ext']}"
-
         if isinstance(output, str):
             output = output.encode(encoding)
-        data = base64.b64encode(output).decode()
-
-        self.download_button.value = self._download_button_format.format(
-            button_style=self._button_style.value,
-            disabled="",
-            encoding=encoding,
-            data=data,
-            filename=filename,
-        )
+        return output, encoding
 
     @staticmethod
     def _get_via_pymatgen(
@@ -432,7 +461,18 @@ document.body.removeChild(link);" />
 
     @staticmethod
     def _get_via_ase(atoms: aseAtoms, desired_format: str) -> Union[str, bytes]:
-        """Use ase.Atoms.write() method"""
+        """Use ase.Atoms.write() method
+
+        The file is written to memory, unless the ASE writer needs a path.
+        """
+        from ase.io.formats import ioformats
+
+        io_format = ioformats.get(desired_format)
+        if io_format is not None and io_format.acceptsfd:
+            buffer = io.BytesIO() if io_format.isbinary else io.StringIO()
+            atoms.write(buffer, format=desired_format)
+            return buffer.getvalue()
+
         with tempfile.NamedTemporaryFile(mode="w+b") as temp_file:
             atoms.write(temp_file.name, format=desired_format)
             res = temp_file.read()
@@ -440,26 +480,35 @@ document.body.removeChild(link);" />
 
     def freeze(self):
         """Disable widget"""
-        for widget in self.children:
-            widget.disabled = True
+        self.dropdown.disabled = True
+        self.download_button.disabled = True
 
     def unfreeze(self):
         """Activate widget (in its current state)"""
         LOGGER.debug("Will unfreeze %s", self.__class__.__name__)
-        for widget in self.children:
-            widget.disabled = False
+        self.dropdown.disabled = False
+        self.download_button.disabled = not self.dropdown.value
 
     def reset(self):
         """Reset widget"""
         self.dropdown.index = 0
+        self.download_link.value = ""
         self.freeze()
 
 
 class StructureViewer(ipw.VBox):
-    """NGL structure viewer including download button"""
+    """NGL structure viewer including download button
+
+    The `ase.Atoms` shown are shared with the downloads (see `optimade_client.conversions`).
+    Very large structures are shown in less detail: without bonds above `MAX_BONDED_SITES`
+    sites, and only the first `MAX_SITES` sites above that.
+    """
 
     structure = traitlets.Instance(Structure, allow_none=True)
 
+    MAX_BONDED_SITES = 1000
+    MAX_SITES = 10000
+
     def __init__(self, **kwargs):
         self._current_view = None
 
@@ -477,6 +526,8 @@ class StructureViewer(ipw.VBox):
             },
         )
 
+        self.level_of_detail = ipw.HTML("", layout={"width": "auto"})
+
         button_style = kwargs.pop("button_style", None)
         self.download = DownloadChooser(button_style=button_style, **kwargs)
 
@@ -491,7 +542,7 @@ class StructureViewer(ipw.VBox):
         )
 
         super().__init__(
-            children=(self.viewer_box, self.download),
+            children=(self.viewer_box, self.level_of_detail, self.download),
             layout=layout,
             **kwargs,
         )
@@ -503,12 +554,21 @@ class StructureViewer(ipw.VBox):
     def _on_change_structure(self, change):
         """Update viewer for new structure"""
         self.reset()
-        if not change["new"].attributes.species:
+        if change["new"] is None or not change["new"].attributes.species:
             return
-        self._current_view = self.viewer.add_structure(
-            nglview.ASEStructure(change["new"].convert("ase"))
-        )
-        self.viewer.add_representation("ball+stick", aspectRatio=4)
+        atoms = CONVERSION_CACHE.adapter(change["new"], "ase")
+        nsites = len(atoms)
+        if nsites > self.MAX_SITES:
+            atoms = atoms[: self.MAX_SITES]
+            self.level_of_detail.value = f"<i>Showing the first {self.MAX_SITES} of {nsites} sites, without bonds</i>"
+        elif nsites > self.MAX_BONDED_SITES:
+            self.level_of_detail.value = f"<i>Showing {nsites} sites without bonds</i>"
+
+        self._current_view = self.viewer.add_structure(nglview.ASEStructure(atoms))
+        if nsites > self.MAX_BONDED_SITES:
+            self.viewer.add_representation("spacefill", radiusScale=0.3)
+        else:
+            self.viewer.add_representation("ball+stick", aspectRatio=4)
         self.viewer.add_representation("unitcell")
 
     def freeze(self):
@@ -522,6 +582,7 @@ class StructureViewer(ipw.VBox):
     def reset(self):
         """Reset widget"""
         self.download.reset()
+        self.level_of_detail.value = ""
         if self._current_view is not None:
             self.viewer.clear()
             self.viewer.remove_component(self._current_view)
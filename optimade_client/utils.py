@@ -3,7 +3,7 @@ from enum import Enum, EnumMeta
 import os
 from pathlib import Path
 import re
-from typing import Tuple, List, Union, Iterable
+from typing import TYPE_CHECKING, Tuple, List, Union, Iterable
 from urllib.parse import urlencode, urlparse, urlunparse, parse_qs
 
 import json
@@ -16,6 +16,7 @@ from cachecontrol.heuristics import ExpiresAfter
 from pydantic import ValidationError, AnyUrl  # pylint: disable=no-name-in-module
 import requests
 
+from optimade.adapters.structures.utils import species_from_species_at_sites
 from optimade.models import LinksResource, OptimadeError, Link, LinksResourceAttributes
 from optimade.models.links import LinkType
 
@@ -25,6 +26,9 @@ from optimade_client.exceptions import (
 )
 from optimade_client.logger import LOGGER
 
+if TYPE_CHECKING:  # pragma: no cover
+    from optimade_client.executor import QueryToken
+
 
 # Supported OPTIMADE spec versions
 __optimade_version__ = [
@@ -109,8 +113,15 @@ def perform_optimade_query(  # pylint: disable=too-many-arguments,too-many-branc
     page_limit: int = None,
     page_offset: int = None,
     page_number: int = None,
+    page_above: str = None,
+    page_below: str = None,
+    token: "QueryToken" = None,
 ) -> dict:
-    """Perform query of database"""
+    """Perform query of database
+
+    If a `token` is given, `QueryCancelled` is raised instead of decoding the response,
+    should the action the query is part of have been cancelled in the meantime.
+    """
     queries = OrderedDict()
 
     if endpoint is None:
@@ -176,14 +187,37 @@ def perform_optimade_query(  # pylint: disable=too-many-arguments,too-many-branc
     if page_number is not None:
         queries["page_number"] = page_number
 
+    if page_above is not None:
+        queries["page_above"] = page_above
+
+    if page_below is not None:
+        queries["page_below"] = page_below
+
     # Make query - get data
     url_query = urlencode(queries)
-    complete_url = f"{url_path}?{url_query}"
-    LOGGER.debug("Performing OPTIMADE query:\n%s", complete_url)
+    return _get_json(f"{url_path}?{url_query}", token=token)
+
+
+def perform_optimade_link_query(link: str, token: "QueryToken" = None) -> dict:
+    """Perform query of database using a complete link, e.g., a pagination link
+
+    See `perform_optimade_query()` for the usage of `token`.
+    """
+    return _get_json(ordered_query_url(link), token=token)
+
+
+def _get_json(url: str, token: "QueryToken" = None) -> dict:
+    """GET `url` and decode the JSON response
+
+    Connection and decoding errors are returned as an OPTIMADE error response.
+    """
+    LOGGER.debug("Performing OPTIMADE query:\n%s", url)
+    if token is not None:
+        token.check()
     try:
-        response = SESSION.get(complete_url, timeout=TIMEOUT_SECONDS)
+        response = SESSION.get(url, timeout=TIMEOUT_SECONDS)
         if response.from_cache:
-            LOGGER.debug("Request to %s was taken from cache !", complete_url)
+            LOGGER.debug("Request to %s was taken from cache !", url)
     except (
         requests.exceptions.ConnectTimeout,
         requests.exceptions.ConnectionError,
@@ -193,13 +227,15 @@ def perform_optimade_query(  # pylint: disable=too-many-arguments,too-many-branc
             "errors": [
                 {
                     "detail": (
-                        f"CLIENT: Connection error or timeout.\nURL: {complete_url}\n"
+                        f"CLIENT: Connection error or timeout.\nURL: {url}\n"
                         f"Exception: {exc!r}"
                     )
                 }
             ]
         }
 
+    if token is not None:
+        token.check()
     try:
         response = response.json()
     except JSONDecodeError as exc:
@@ -207,7 +243,7 @@ def perform_optimade_query(  # pylint: disable=too-many-arguments,too-many-branc
             "errors": [
                 {
                     "detail": (
-                        f"CLIENT: Cannot decode response to JSON format.\nURL: {complete_url}\n"
+                        f"CLIENT: Cannot decode response to JSON format.\nURL: {url}\n"
                         f"Exception: {exc!r}"
                     )
                 }
@@ -585,6 +621,17 @@ def handle_errors(response: dict) -> Tuple[str, set]:
     return "", set()
 
 
+def check_species_mass(structure: dict) -> dict:
+    """Ensure species.mass is using OPTIMADE API v1.0.1 type"""
+    if structure.get("attributes", {}).get("species", False):
+        for species in structure["attributes"][
+            "species"
+        ] or species_from_species_at_sites(structure["attributes"]["species_at_sites"]):
+            if not isinstance(species.get("mass", None), (list, type(None))):
+                species.pop("mass", None)
+    return structure
+
+
 def check_entry_properties(
     base_url: str,
     entry_endpoint: str,
@@ -57,6 +57,7 @@ setup(
     entry_points={
         "console_scripts": [
             "optimade-client = optimade_client.cli.run:main",
+            "optimade-client-health = optimade_client.cli.health:main",
         ],
     },
 )
@@ -0,0 +1,281 @@
+"""Shared fixtures"""
+# pylint: disable=import-error,redefined-outer-name
+import json
+from functools import reduce
+from math import gcd
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence, Union
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import pytest
+
+if TYPE_CHECKING:  # pragma: no cover
+    from optimade.adapters import Structure
+
+
+def pytest_addoption(parser):
+    """Add `--benchmark` option"""
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="Also run the benchmarks (tests marked with `benchmark`).",
+    )
+
+
+def pytest_configure(config):
+    """Register `benchmark` marker"""
+    config.addinivalue_line(
+        "markers", "benchmark: Benchmark, only run with the `--benchmark` option."
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip benchmarks, unless `--benchmark` is given"""
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="Benchmark, use the `--benchmark` option to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+def _structure_entry(
+    index: Union[int, str] = 0,
+    nsites: int = 1,
+    elements: Sequence[str] = ("Cu",),
+    **attributes,
+) -> dict:
+    """Minimal, valid OPTIMADE structure entry of a simple cubic lattice
+
+    The sites cycle through `elements` and are placed along the first lattice vector.
+    Any other given `attributes` replace the generated ones.
+    """
+    species_at_sites = [elements[site % len(elements)] for site in range(nsites)]
+    counts = {
+        element: species_at_sites.count(element)
+        for element in elements
+        if element in species_at_sites
+    }
+    divisor = reduce(gcd, counts.values())
+    reduced = {element: counts[element] // divisor for element in sorted(counts)}
+    entry = {
+        "id": f"entry-{index}",
+        "type": "structures",
+        "attributes": {
+            "last_modified": None,
+            "elements": sorted(counts),
+            "nelements": len(counts),
+            "elements_ratios": [counts[_] / nsites for _ in sorted(counts)],
+            "chemical_formula_descriptive": "".join(
+                f"{element}{count if count > 1 else ''}"
+                for element, count in counts.items()
+            ),
+            "chemical_formula_reduced": "".join(
+                f"{element}{count if count > 1 else ''}"
+                for element, count in reduced.items()
+            ),
+            "chemical_formula_anonymous": "".join(
+                f"{chr(ord('A') + rank)}{count if count > 1 else ''}"
+                for rank, count in enumerate(sorted(reduced.values(), reverse=True))
+            ),
+            "nsites": nsites,
+            "species": [
+                {"name": element, "chemical_symbols": [element], "concentration": [1.0]}
+                for element in counts
+            ],
+            "species_at_sites": species_at_sites,
+            "cartesian_site_positions": [
+                [site * 3.6 / nsites, 0.0, 0.0] for site in range(nsites)
+            ],
+            "lattice_vectors": [[3.6, 0.0, 0.0], [0.0, 3.6, 0.0], [0.0, 0.0, 3.6]],
+            "dimension_types": [1, 1, 1],
+            "nperiodic_dimensions": 3,
+            "structure_features": [],
+        },
+    }
+    entry["attributes"].update(attributes)
+    return entry
+
+
+@pytest.fixture
+def structure_entry() -> Callable[..., dict]:
+    """Factory of minimal OPTIMADE structure entries, see `_structure_entry()`"""
+    return _structure_entry
+
+
+@pytest.fixture
+def optimade_structure(structure_entry) -> Callable[..., "Structure"]:
+    """Factory of `Structure`s of minimal OPTIMADE structure entries"""
+    from optimade.adapters import Structure
+
+    return lambda *args, **kwargs: Structure(structure_entry(*args, **kwargs))
+
+
+class _Response:  # pylint: disable=too-few-public-methods
+    """The parts of `requests.Response` used by the client"""
+
+    from_cache = False
+
+    def __init__(self, payload: dict):
+        self._payload = payload
+
+    def json(self) -> dict:
+        """Decoded (copy of the) payload"""
+        return json.loads(json.dumps(self._payload))
+
+
+class FakeDatabase:
+    """OPTIMADE database answering the requests sent through `optimade_client.utils`
+
+    Filters are ignored, while sorting, offset- and number-pagination, and `response_fields`
+    are supported.
+
+    :param entries: The structure entries of the database.
+    """
+
+    base_url = "https://example.org/v1"
+
+    def __init__(self, entries: List[dict]):
+        self.entries = entries
+        self.requests: List[dict] = []
+        self.properties = {
+            field: {"sortable": True, "type": "integer"}
+            for field in ("id", "nsites", "nelements")
+        }
+        self.properties.update(
+            {
+                field: {"sortable": False, "type": "string"}
+                for field in (
+                    "elements",
+                    "chemical_formula_descriptive",
+                    "structure_features",
+                )
+            }
+        )
+        # Return an error response instead, for the structures queries it returns `True` for
+        self.fail: Callable[[dict], bool] = lambda queries: False
+        # Keys to leave out of the `meta` of structures responses
+        self.omit_meta: List[str] = []
+        # Largest number of entries served per page, whatever `page_limit` is requested
+        self.page_limit_max: Optional[int] = None
+        # Ignore `page_offset`, supporting only number-pagination
+        self.page_number_only = False
+
+    def get(self, url: str, timeout: float = None, **kwargs) -> _Response:
+        """Answer a GET request"""
+        parsed_url = urlparse(url)
+        queries = {key: value[0] for key, value in parse_qs(parsed_url.query).items()}
+        path = parsed_url.path.rstrip("/")
+        self.requests.append(dict(queries, endpoint=path.rsplit("/", 1)[-1]))
+
+        if path.endswith("/info/structures"):
+            return _Response(
+                {
+                    "data": {"properties": self.properties},
+                    "meta": {"api_version": "1.1.0"},
+                }
+            )
+        if path.endswith("/info"):
+            return _Response(
+                {
+                    "data": {"attributes": {"api_version": "1.1.0"}},
+                    "meta": {"api_version": "1.1.0"},
+                }
+            )
+        if self.fail(queries):
+            return _Response({"errors": [{"status": "500", "detail": "Server hiccup"}]})
+        return _Response(self._structures(parsed_url, queries))
+
+    def _structures(self, parsed_url, queries: dict) -> dict:
+        data = list(self.entries)
+        sort = queries.get("sort")
+        if sort:
+            field = sort.lstrip("-")
+            data.sort(
+                key=lambda entry: entry["id"]
+                if field == "id"
+                else entry["attributes"][field],
+                reverse=sort.startswith("-"),
+            )
+
+        page_limit = int(queries.get("page_limit", 20))
+        if self.page_limit_max is not None:
+            page_limit = min(page_limit, self.page_limit_max)
+        if "page_offset" in queries and not self.page_number_only:
+            page_offset = int(queries["page_offset"])
+        else:
+            page_offset = (int(queries.get("page_number", 1)) - 1) * page_limit
+        page = data[page_offset : page_offset + page_limit]
+        if "response_fields" in queries:
+            fields = queries["response_fields"].split(",")
+            page = [
+                {
+                    "id": entry["id"],
+                    "type": entry["type"],
+                    "attributes": {
+                        key: value
+                        for key, value in entry["attributes"].items()
+                        if key in fields
+                    },
+                }
+                for entry in page
+            ]
+
+        next_link: Optional[str] = None
+        if page_offset + page_limit < len(data):
+            next_queries = dict(queries, page_offset=page_offset + page_limit)
+            next_queries.pop("page_number", None)
+            next_link = (
+                f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
+                f"?{urlencode(next_queries)}"
+            )
+        meta = {
+            "api_version": "1.1.0",
+            "data_returned": len(data),
+            "data_available": len(self.entries),
+            "more_data_available": next_link is not None,
+        }
+        for key in self.omit_meta:
+            meta.pop(key, None)
+        return {"data": page, "meta": meta, "links": {"next": next_link}}
+
+    def structure_requests(self) -> List[dict]:
+        """The queries of all requests for structures"""
+        return [_ for _ in self.requests if _["endpoint"] == "structures"]
+
+
+@pytest.fixture
+def optimade_database(monkeypatch, structure_entry) -> FakeDatabase:
+    """A `FakeDatabase` of 30 structures, receiving all requests of the client"""
+    from optimade_client import utils
+    from optimade_client.capabilities import CAPABILITY_MATRIX
+
+    database = FakeDatabase(
+        [structure_entry(index, nsites=1 + index % 4) for index in range(30)]
+    )
+    monkeypatch.setattr(utils.SESSION, "get", database.get)
+    CAPABILITY_MATRIX.reset(database.base_url)
+    yield database
+    CAPABILITY_MATRIX.reset(database.base_url)
+
+
+@pytest.fixture
+def query_widget(optimade_database):
+    """An `OptimadeQueryFilterWidget` with the `optimade_database` chosen"""
+    from optimade.models import LinksResourceAttributes
+
+    from optimade_client.query_filter import OptimadeQueryFilterWidget
+
+    widget = OptimadeQueryFilterWidget()
+    widget.database = (
+        "Example",
+        LinksResourceAttributes(
+            name="Example",
+            description="",
+            base_url=optimade_database.base_url,
+            homepage=None,
+            link_type="child",
+        ),
+    )
+    optimade_database.requests.clear()
+    return widget
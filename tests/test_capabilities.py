@@ -0,0 +1,87 @@
+"""Test capabilities.py functions"""
+# pylint: disable=import-error
+
+
+def test_capabilities_from_info_and_probe(monkeypatch):
+    """Capabilities are determined once and used to adapt filters, sorts and pageing"""
+    from optimade_client import capabilities
+
+    requests = []
+
+    def _query(base_url: str, endpoint: str = None, **queries) -> dict:
+        requests.append(endpoint)
+        if endpoint == "/info":
+            return {"data": {}, "meta": {"api_version": "v0.10.1"}}
+        if endpoint == "/info/structures":
+            return {
+                "data": {
+                    "properties": {
+                        "id": {"sortable": True},
+                        "nsites": {"sortable": True},
+                        "elements": {"sortable": False},
+                        "nelements": {"x-optimade-queryable": "unsupported"},
+                    }
+                }
+            }
+        assert queries["page_limit"] == 1
+        return {
+            "data": [{"id": "1"}],
+            "links": {"next": f"{base_url}/structures?page_number=2&page_limit=1"},
+        }
+
+    monkeypatch.setattr(capabilities, "perform_optimade_query", _query)
+    matrix = capabilities.CapabilityMatrix()
+    base_url = "https://example.org/v1"
+
+    database = matrix.get(base_url)
+    assert matrix.get(base_url) is database
+    assert requests == ["/info", "/info/structures", None]
+
+    assert not database.uses_new_structure_features
+    assert database.sortable == ["id", "nsites"]
+    assert database.can_sort("-nsites") and not database.can_sort("elements")
+
+    assert database.adapt_filter(
+        'elements HAS ANY "Si" AND NOT nelements>=3 AND structure_features HAS "x"'
+    ) == ('elements HAS ANY "Si"', ["nelements", "structure_features"])
+    assert database.adapt_filter("nelements=2 OR nsites=2") == (
+        "nelements=2 OR nsites=2",
+        [],
+    )
+    assert database.adapt_filter('( nelements=2 OR nsites=2 ) AND id="AND"') == (
+        '( nelements=2 OR nsites=2 ) AND id="AND"',
+        [],
+    )
+
+    assert database.pageing == {"page_number"}
+    assert database.adapt_pageing({"page_offset": 20, "page_number": 3}) == {
+        "page_offset": None,
+        "page_number": 3,
+    }
+
+
+def test_capabilities_unknown(monkeypatch, caplog):
+    """If `/info` fails, everything is assumed to be supported, and it is tried again"""
+    import logging
+
+    from optimade_client import capabilities
+
+    requests = []
+
+    def _query(base_url: str, endpoint: str = None, **queries) -> dict:
+        requests.append(endpoint)
+        return {"errors": [{"status": "503", "detail": "Down for maintenance"}]}
+
+    monkeypatch.setattr(capabilities, "perform_optimade_query", _query)
+    matrix = capabilities.CapabilityMatrix()
+    base_url = "https://example.org/v1"
+
+    with caplog.at_level(logging.WARNING, logger="OPTIMADE_Client"):
+        database = matrix.get(base_url)
+    assert "Could not determine the capabilities" in caplog.text
+    assert database.can_query("structure_features") and database.can_sort("nsites")
+    assert database.uses_new_structure_features
+    assert matrix.cached(base_url) is None
+
+    matrix.get(base_url)
+    assert requests == ["/info", "/info"]
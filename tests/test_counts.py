@@ -0,0 +1,71 @@
+"""Test counts.py functions"""
+# pylint: disable=import-error
+
+
+def test_canonical_filter():
+    """The order of top-level conditions and whitespace outside strings do not matter"""
+    from optimade_client.counts import canonical_filter
+
+    assert canonical_filter('nsites>=3  AND\nelements HAS "Si  O"') == canonical_filter(
+        'elements HAS "Si  O" AND nsites>=3'
+    )
+    assert canonical_filter("nsites=1 OR nelements=2") != canonical_filter(
+        "nelements=2 OR nsites=1"
+    )
+    assert canonical_filter(None) == ""
+
+
+def test_hit_counts_cached_and_rate_limited(monkeypatch):
+    """Counts are cached per canonical filter, requests per host are spaced out"""
+    import time
+
+    from optimade.models import LinksResourceAttributes
+
+    from optimade_client import counts
+
+    requests = []
+
+    def _query(base_url: str, **queries) -> dict:
+        requests.append((base_url, time.monotonic()))
+        assert queries["page_limit"] == 1
+        if "down" in base_url:
+            return {"errors": [{"detail": "Service unavailable"}]}
+        return {"data": [{"id": "1"}], "meta": {"data_returned": len(base_url)}}
+
+    monkeypatch.setattr(counts, "perform_optimade_query", _query)
+    databases = [
+        (
+            name,
+            LinksResourceAttributes(
+                name=name,
+                description="",
+                base_url=f"https://example.org/{name}/v1",
+                homepage=None,
+                link_type="child",
+            ),
+        )
+        for name in ("a", "bb", "down")
+    ]
+    counter = counts.HitCounter(requests_per_second=20.0)
+
+    start = time.monotonic()
+    result = {
+        name: (count, error is not None, cached)
+        for name, count, error, cached in counter.iter_counts(
+            databases,
+            lambda database: {"base_url": database.base_url, "filter": "a=1 AND b=2"},
+        )
+    }
+    assert result == {
+        "a": (len("https://example.org/a/v1"), False, False),
+        "bb": (len("https://example.org/bb/v1"), False, False),
+        "down": (None, True, False),
+    }
+    # All databases are on the same host: 3 requests take at least 2 intervals
+    assert max(timestamp for _, timestamp in requests) - start >= 0.095
+
+    requests.clear()
+    assert counter.count(
+        {"base_url": "https://example.org/a/v1", "filter": "b=2 AND  a=1"}
+    ) == (len("https://example.org/a/v1"), True)
+    assert not requests
@@ -0,0 +1,78 @@
+"""Test dedup.py functions"""
+# pylint: disable=import-error
+
+
+def test_duplicates_across_sources(structure_entry):
+    """Same structure with sites in another order and periodic images are duplicates"""
+    from optimade_client.dedup import DuplicateIndex, fingerprints
+
+    lattice = [[5.64, 0.0, 0.0], [0.0, 5.64, 0.0], [0.0, 0.0, 5.64]]
+    original = structure_entry(
+        "a",
+        nsites=2,
+        elements=("Na", "Cl"),
+        lattice_vectors=lattice,
+        cartesian_site_positions=[[0.0, 0.0, 0.0], [2.82, 0.0, 0.0]],
+    )
+    duplicate = structure_entry(
+        "b",
+        nsites=2,
+        elements=("Cl", "Na"),
+        lattice_vectors=lattice,
+        cartesian_site_positions=[[2.8201, 5.64, 0.0], [5.64, 0.0, -0.0001]],
+    )
+    other = structure_entry(
+        "c",
+        nsites=2,
+        elements=("Na", "Cl"),
+        lattice_vectors=lattice,
+        cartesian_site_positions=[[0.0, 0.0, 0.0], [2.82, 2.82, 0.0]],
+    )
+    molecule = structure_entry(
+        "d", elements=("Na",), lattice_vectors=None, dimension_types=[0, 0, 0]
+    )
+
+    prints = fingerprints([original, duplicate, other, molecule])
+    assert prints[0] == prints[1]
+    assert prints[0] != prints[2]
+    assert prints[3] is None
+
+    index = DuplicateIndex()
+    new = index.add_page("A", [original, molecule])
+    assert [entry["id"] for entry, _ in new] == ["entry-a", "entry-d"]
+    assert new[1][1] is None
+
+    new = index.add_page("B", [duplicate, other])
+    assert [entry["id"] for entry, _ in new] == ["entry-c"]
+    assert len(index) == 2
+    assert index.groups[0].sources == [("A", "entry-a"), ("B", "entry-b")]
+
+
+def test_inconsistent_entries_unique(structure_entry):
+    """Entries with inconsistent sites do not break the fingerprints of a page"""
+    from optimade_client.dedup import DuplicateIndex, fingerprints
+
+    lattice = [[5.64, 0.0, 0.0], [0.0, 5.64, 0.0], [0.0, 0.0, 5.64]]
+    sites = [[0.0, 0.0, 0.0], [2.82, 0.0, 0.0]]
+    entries = [
+        structure_entry(
+            identifier,
+            elements=("Na", "Cl"),
+            lattice_vectors=lattice,
+            cartesian_site_positions=positions,
+            species_at_sites=species,
+        )
+        for identifier, lattice, positions, species in (
+            ("a", lattice, sites, ["Na", "Cl"]),
+            ("b", lattice, sites, ["Na"]),
+            ("c", lattice, sites + [[1.0, 1.0]], ["Na", "Cl", "Na"]),
+            ("d", lattice, [[0.0, None, 0.0]], ["Na"]),
+            ("e", lattice[:2], sites, ["Na", "Cl"]),
+        )
+    ]
+
+    prints = fingerprints(entries)
+    assert prints[0] is not None and prints[1:] == [None] * 4
+
+    new = DuplicateIndex().add_page("A", entries + entries[1:])
+    assert [entry["id"] for entry, _ in new] == [f"entry-{_}" for _ in "abcdebcde"]
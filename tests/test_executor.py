@@ -0,0 +1,106 @@
+"""Test executor.py"""
+# pylint: disable=import-error
+import pytest
+
+
+def test_latest_wins():
+    """Starting a new action for a key cancels the in-flight action for that key only"""
+    from optimade_client.exceptions import QueryCancelled
+    from optimade_client.executor import QueryExecutor
+
+    executor = QueryExecutor()
+    first = executor.start("results")
+    other = executor.start("database")
+    second = executor.start("results")
+
+    assert first.cancelled
+    with pytest.raises(QueryCancelled):
+        first.check()
+    assert not executor.finish(first)
+
+    assert not other.cancelled
+    assert executor.is_current(second)
+    second.check()
+    assert executor.finish(second)
+    assert not executor.is_current(second)
+
+
+def test_cancel():
+    """Actions can be cancelled explicitly, per key or all at once"""
+    from optimade_client.executor import QueryExecutor
+
+    executor = QueryExecutor()
+    results = executor.start("results")
+    database = executor.start("database")
+
+    executor.cancel("results")
+    assert results.cancelled
+    assert not database.cancelled
+
+    executor.cancel()
+    assert database.cancelled
+    assert not executor.finish(database)
+
+
+def test_run_in_background(monkeypatch):
+    """`work` runs in a worker thread, while `done` and `call_soon()` run on the event loop"""
+    import threading
+
+    from optimade_client import executor as executor_module
+
+    IOLoop = pytest.importorskip("tornado.ioloop").IOLoop
+
+    loop = IOLoop()
+    monkeypatch.setattr(executor_module, "kernel_loop", lambda: loop)
+    executor = executor_module.QueryExecutor()
+    calls = []
+
+    def work(token):
+        calls.append(("work", threading.current_thread() is threading.main_thread()))
+        executor.call_soon(
+            token,
+            lambda: calls.append(
+                ("update", threading.current_thread() is threading.main_thread())
+            ),
+        )
+        return 42
+
+    def done(token, result, exception):
+        calls.append(("done", threading.current_thread() is threading.main_thread()))
+        assert result == 42
+        assert exception is None
+        assert executor.finish(token)
+        loop.stop()
+
+    loop.add_callback(executor.run, "results", work, done)
+    loop.start()
+    loop.close()
+
+    assert calls == [("work", False), ("update", True), ("done", True)]
+    assert "results" in executor.responsiveness
+
+
+def test_kernel_loop_tornado_only(monkeypatch):
+    """Only a tornado-like kernel event loop is used, otherwise actions are run directly"""
+    import types
+
+    import IPython
+
+    from optimade_client.executor import QueryExecutor, kernel_loop
+
+    class _Loop:  # pylint: disable=too-few-public-methods
+        def add_callback(self, callback, *args):
+            raise AssertionError("The loop should not be used")
+
+    shell = types.SimpleNamespace(kernel=types.SimpleNamespace(io_loop=_Loop()))
+    monkeypatch.setattr(IPython, "get_ipython", lambda: shell)
+    assert kernel_loop() is None
+
+    results = []
+    QueryExecutor().run(
+        "results", lambda token: 42, lambda *args: results.append(args[1])
+    )
+    assert results == [42]
+
+    _Loop.call_later = _Loop.remove_timeout = lambda *args: None
+    assert kernel_loop() is shell.kernel.io_loop
@@ -0,0 +1,159 @@
+"""Test export.py functions"""
+# pylint: disable=import-error
+import json
+
+import pytest
+
+
+@pytest.fixture
+def paged_server(monkeypatch, structure_entry):
+    """Serve 7 entries in pages of 3, optionally failing when requesting a given page"""
+    from optimade_client import export
+
+    entries = [structure_entry(index) for index in range(7)]
+    settings = {"fail_at": None, "requests": []}
+
+    def _page(offset: int) -> dict:
+        settings["requests"].append(offset)
+        if settings["fail_at"] == offset:
+            return {"errors": [{"detail": "Server hiccup"}]}
+        next_offset = offset + 3
+        return {
+            "data": entries[offset:next_offset],
+            "meta": {"data_returned": len(entries)},
+            "links": {
+                "next": f"https://example.org/v1/structures?page_offset={next_offset}"
+                if next_offset < len(entries)
+                else None
+            },
+        }
+
+    monkeypatch.setattr(export, "perform_optimade_query", lambda **_: _page(0))
+    monkeypatch.setattr(
+        export,
+        "perform_optimade_link_query",
+        lambda link, token=None: _page(int(link.rsplit("=", 1)[-1])),
+    )
+    return settings
+
+
+def test_export_jsonl(tmp_path, paged_server):
+    """All pages are written and progress is reported after each page"""
+    from optimade_client.export import export_query_results
+
+    progress = []
+    target = export_query_results(
+        query={"base_url": "https://example.org/v1"},
+        target=tmp_path / "results.jsonl",
+        export_format="jsonl",
+        progress=lambda handled, total: progress.append((handled, total)),
+    )
+
+    with open(target, "r") as handle:
+        ids = [json.loads(line)["id"] for line in handle]
+    assert ids == [f"entry-{index}" for index in range(7)]
+    assert progress == [(3, 7), (6, 7), (7, 7)]
+    assert paged_server["requests"] == [0, 3, 6]
+
+
+@pytest.mark.parametrize("export_format", ["jsonl", "cif_zip"])
+def test_export_resume(tmp_path, paged_server, export_format):
+    """An interrupted export continues from the last completely written page"""
+    import zipfile
+
+    from optimade_client.exceptions import QueryError
+    from optimade_client.export import export_query_results
+
+    if export_format == "cif_zip":
+        pytest.importorskip("ase")
+
+    query = {"base_url": "https://example.org/v1"}
+    target = tmp_path / f"results.{export_format}"
+
+    paged_server["fail_at"] = 6
+    with pytest.raises(QueryError):
+        export_query_results(query=query, target=target, export_format=export_format)
+
+    paged_server["fail_at"] = None
+    paged_server["requests"].clear()
+    export_query_results(query=query, target=target, export_format=export_format)
+    assert paged_server["requests"] == [6]
+
+    if export_format == "jsonl":
+        with open(target, "r") as handle:
+            ids = [json.loads(line)["id"] for line in handle]
+    else:
+        with zipfile.ZipFile(target) as archive:
+            ids = [name[: -len(".cif")] for name in archive.namelist()]
+    assert ids == [f"entry-{index}" for index in range(7)]
+
+
+def test_exporter_file_per_query(tmp_path, monkeypatch, paged_server):
+    """Different queries are exported to different files, the same query is resumed"""
+    from optimade_client.export import ExportFormat
+    from optimade_client.subwidgets import results_export
+
+    monkeypatch.setattr(results_export, "EXPORT_DIR", tmp_path)
+    query = {"base_url": "https://example.org/v1", "filter": 'elements HAS "Cu"'}
+    widget = results_export.ResultsExporter(
+        get_query=lambda: dict(query), filename=lambda _: "optimade_export_db"
+    )
+    widget.unfreeze()
+    widget.format_drop.value = ExportFormat.JSONL
+
+    widget.export_button.click()
+    first = widget.status.value
+    assert "optimade_export_db_" in first and widget.progress.value == 7
+    assert not widget.export_button.disabled
+
+    paged_server["requests"].clear()
+    widget.export_button.click()
+    assert widget.status.value == first and paged_server["requests"] == []
+
+    query["filter"] = 'elements HAS "Ag"'
+    widget.export_button.click()
+    assert widget.status.value != first
+    assert len(list(tmp_path.glob("optimade_export_db_*.jsonl"))) == 2
+
+
+def test_export_checkpoints(tmp_path, monkeypatch, paged_server):
+    """The progress is only stored every few pages and when the export is done"""
+    from optimade_client import export
+
+    saved = []
+    save_state = export._save_state  # pylint: disable=protected-access
+    monkeypatch.setattr(
+        export,
+        "_save_state",
+        lambda target, state: saved.append(state["handled"])
+        or save_state(target, state),
+    )
+    monkeypatch.setattr(export, "CHECKPOINT_PAGES", 2)
+
+    export.export_query_results(
+        query={"base_url": "https://example.org/v1"},
+        target=tmp_path / "results.jsonl",
+    )
+    assert saved == [6, 7]
+
+
+def test_exporter_write_error(tmp_path, monkeypatch):
+    """Errors writing the exported file are shown"""
+    from optimade_client.export import ExportFormat
+    from optimade_client.subwidgets import results_export
+
+    def _full_disk(**_):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(results_export, "EXPORT_DIR", tmp_path)
+    monkeypatch.setattr(results_export, "export_query_results", _full_disk)
+    widget = results_export.ResultsExporter(
+        get_query=lambda: {"base_url": "https://example.org/v1"}
+    )
+    widget.unfreeze()
+    widget.format_drop.value = ExportFormat.JSONL
+
+    widget.export_button.click()
+    assert "No space left on device" in widget.status.value
+    assert widget.progress.bar_style == "danger"
+    assert not widget.export_button.disabled
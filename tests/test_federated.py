@@ -0,0 +1,146 @@
+"""Test federated.py functions"""
+# pylint: disable=import-error
+
+
+def test_federated_search_in_order_of_arrival(monkeypatch):
+    """Responses are handed over as they arrive, with client errors per database"""
+    import time
+
+    from optimade.models import LinksResourceAttributes
+
+    from optimade_client import federated
+    from optimade_client.exceptions import OptimadeClientError
+
+    delays = {"https://slow.example.org/v1": 0.3, "https://fast.example.org/v1": 0.0}
+
+    def _query(base_url: str, **_) -> dict:
+        if base_url not in delays:
+            raise OptimadeClientError(f"Could not connect to {base_url}")
+        time.sleep(delays[base_url])
+        return {"data": [{"id": base_url}], "meta": {"data_returned": 1}}
+
+    monkeypatch.setattr(federated, "perform_optimade_query", _query)
+    databases = [
+        (
+            name,
+            LinksResourceAttributes(
+                name=name,
+                description="",
+                base_url=f"https://{name}.example.org/v1",
+                homepage=None,
+                link_type="child",
+            ),
+        )
+        for name in ("slow", "fast", "down")
+    ]
+
+    responses = list(
+        federated.iter_federated_search(
+            databases, lambda database: {"base_url": database.base_url}
+        )
+    )
+
+    assert [name for name, _, _ in responses][-1] == "slow"
+    results = dict((name, response) for name, _, response in responses)
+    assert results["fast"]["data"] == [{"id": "https://fast.example.org/v1"}]
+    assert results["down"]["errors"][0]["detail"].startswith("CLIENT: ")
+
+
+def test_merge_sorted_entries(monkeypatch):
+    """Sorted pages are merged globally, retrieving further pages only when needed"""
+    import itertools
+
+    from optimade_client import federated, paging
+
+    values = {
+        "a": [1, 2, 2, 5, 7, 8, 9, 9],
+        "b": [3, 4, 4, 6, None, None],
+    }
+    requests = []
+
+    def _query(base_url: str, page_offset: int, page_limit: int, **_) -> dict:
+        requests.append((base_url, page_offset))
+        data = [
+            {"id": f"{base_url}-{index}", "attributes": {"nsites": value}}
+            for index, value in enumerate(values[base_url])
+        ]
+        return {
+            "data": data[page_offset : page_offset + page_limit],
+            "meta": {"data_returned": len(data)},
+        }
+
+    monkeypatch.setattr(paging, "perform_optimade_query", _query)
+    sources = {
+        name: (
+            {"base_url": name},
+            _query(base_url=name, page_offset=0, page_limit=2),
+        )
+        for name in values
+    }
+    pages = {}
+
+    merged = federated.merge_sorted_entries(sources, "nsites", 2, pages=pages)
+    first = list(itertools.islice(merged, 5))
+    assert [entry["attributes"]["nsites"] for _, entry in first] == [1, 2, 2, 3, 4]
+    # Only the second page of "a" is needed for the first 5 entries
+    assert ("a", 4) not in requests and ("b", 2) not in requests
+    assert pages == {"a": 2, "b": 1}
+
+    rest = [entry["attributes"]["nsites"] for _, entry in merged]
+    assert rest == [4, 5, 6, 7, 8, 9, 9, None, None]
+
+    descending = federated.merge_sorted_entries(
+        {name: ({"base_url": name}, {"data": [], "meta": {}}) for name in values},
+        "-nsites",
+        2,
+    )
+    assert list(descending) == []
+
+
+def test_merge_sorted_entries_capped_pages(monkeypatch):
+    """Pages capped by the server are not mistaken for the last page"""
+    from optimade_client import federated, paging
+
+    values = list(range(10))
+
+    def _query(page_offset: int, page_limit: int, **_) -> dict:
+        # The server serves at most 3 entries per page
+        data = [{"id": str(_), "attributes": {"nsites": _}} for _ in values]
+        end = page_offset + min(page_limit, 3)
+        return {
+            "data": data[page_offset:end],
+            "meta": {"more_data_available": end < len(data)},
+            "links": {
+                "next": "https://example.org/v1/structures" if end < 10 else None
+            },
+        }
+
+    monkeypatch.setattr(paging, "perform_optimade_query", _query)
+    pages = {}
+    merged = federated.merge_sorted_entries(
+        {"a": ({"base_url": "a"}, _query(page_offset=0, page_limit=5))},
+        "nsites",
+        5,
+        pages=pages,
+    )
+    assert [entry["attributes"]["nsites"] for _, entry in merged] == values
+    assert pages == {"a": 4}
+
+
+def test_merge_sorted_entries_number_pagination(optimade_database):
+    """Capped pages of a database only supporting `page_number` are not repeated"""
+    from optimade_client.federated import merge_sorted_entries
+    from optimade_client.utils import perform_optimade_query
+
+    optimade_database.page_limit_max = 3
+    optimade_database.page_number_only = True
+    queries = {"base_url": optimade_database.base_url, "sort": "nsites"}
+    first_response = perform_optimade_query(page_limit=5, page_number=1, **queries)
+
+    merged = merge_sorted_entries({"a": (queries, first_response)}, "nsites", 5)
+    assert [entry["id"] for _, entry in merged] == [
+        entry["id"]
+        for entry in sorted(
+            optimade_database.entries, key=lambda entry: entry["attributes"]["nsites"]
+        )
+    ]
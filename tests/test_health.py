@@ -0,0 +1,118 @@
+"""Test health.py functions"""
+# pylint: disable=import-error
+
+
+def test_health_monitor(tmp_path, monkeypatch):
+    """Failing and slow providers become unhealthy, the health data is stored"""
+    from optimade.models import LinksResource
+
+    from optimade_client import health
+
+    class Response:  # pylint: disable=too-few-public-methods
+        """Minimal requests.Response"""
+
+        status_code = 200
+
+        def __init__(self, url: str):
+            self.url = url
+
+        def json(self) -> dict:
+            if "broken" in self.url:
+                raise ValueError("Not JSON")
+            return {"meta": {}}
+
+    monkeypatch.setattr(health.requests, "get", lambda url, **_: Response(url))
+    monkeypatch.setattr(health, "get_versioned_base_url", lambda url: f"{url}/v1")
+
+    providers = [
+        LinksResource(
+            id=name,
+            type="links",
+            attributes={
+                "name": name.capitalize(),
+                "description": "",
+                "base_url": f"https://{name}.example.org",
+                "homepage": None,
+                "link_type": "external",
+            },
+        )
+        for name in ("fine", "broken")
+    ]
+    path = tmp_path / "provider_health.json"
+    monitor = health.HealthMonitor(path=path)
+    updates = []
+    monitor.on_update(updates.append)
+
+    assert monitor.check(providers) == ["broken"]
+    assert updates == [["broken"]]
+    assert monitor.health("fine").base_url == "https://fine.example.org/v1"
+
+    # Slow responses
+    monitor.record("fine", "Fine", ok=True, seconds=monitor.max_latency * 10)
+    assert not monitor.is_healthy("fine")
+
+    # A single successful probe does not make up for an error rate of 1
+    monitor.record("broken", "Broken", ok=True, seconds=0.1)
+    assert not monitor.is_healthy("broken")
+    monitor.record("broken", "Broken", ok=True, seconds=0.1)
+    assert monitor.is_healthy("broken")
+
+    stored = health.HealthMonitor(path=path)
+    assert stored.unhealthy() == ["broken"]
+    assert stored.health("broken").checks == 1
+
+
+def test_chooser_follows_health_opt_in(tmp_path, monkeypatch):
+    """Only opted-in choosers follow the monitor, and they stop following it when closed"""
+    from optimade_client import health
+    from optimade_client.subwidgets import provider_database
+
+    monitor = health.HealthMonitor(path=tmp_path / "provider_health.json")
+    running = []
+    monkeypatch.setattr(monitor, "start", lambda: running.append(True))
+    monkeypatch.setattr(monitor, "stop", running.clear)
+    monkeypatch.setattr(provider_database, "HEALTH_MONITOR", monitor)
+    monkeypatch.setattr(provider_database, "kernel_loop", object)
+
+    chooser = provider_database.ProviderImplementationChooser()
+    assert not monitor._callbacks  # pylint: disable=protected-access
+
+    chooser = provider_database.ProviderImplementationChooser(monitor_health=True)
+    assert monitor._callbacks == [  # pylint: disable=protected-access
+        chooser._on_provider_health  # pylint: disable=protected-access
+    ]
+    other = provider_database.ProviderImplementationChooser(monitor_health=True)
+    assert running
+
+    # The monitor is stopped once the last subscriber is closed
+    chooser.close()
+    assert running
+    other.close()
+    assert not monitor._callbacks and not running  # pylint: disable=protected-access
+    chooser.close()
+
+
+def test_monitor_runs_while_subscribed(tmp_path, monkeypatch):
+    """The monitor thread only runs while there are subscribers, and can be restarted"""
+    from optimade_client import health
+
+    monitor = health.HealthMonitor(path=tmp_path / "provider_health.json")
+    monkeypatch.setattr(monitor, "check", lambda: [])
+
+    def _callback(unhealthy):
+        pass
+
+    monitor.subscribe(_callback)
+    first = monitor._thread  # pylint: disable=protected-access
+    assert monitor.running
+
+    monitor.unsubscribe(_callback)
+    monitor.subscribe(_callback)
+    assert (
+        monitor.running and monitor._thread is not first
+    )  # pylint: disable=protected-access
+
+    monitor.unsubscribe(_callback)
+    monitor._thread.join(timeout=5)  # pylint: disable=protected-access
+    first.join(timeout=5)
+    assert not monitor.running and not first.is_alive()
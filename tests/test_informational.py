@@ -0,0 +1,20 @@
+"""Test informational.py widgets"""
+# pylint: disable=import-error
+
+
+def test_report_bug_link():
+    """The bug report, including the latest logs, is offered as a plain link"""
+    from optimade_client.informational import HeaderDescription, SOURCE_URL
+    from optimade_client.logger import LOGGER
+
+    widget = HeaderDescription()
+    assert not widget.report_bug_link.value
+
+    LOGGER.info("Reported <message> & more")
+    widget.report_bug.click()
+    link = widget.report_bug_link.value
+    assert f'href="{SOURCE_URL}issues/new?title=' in link and 'target="_blank"' in link
+    assert "Reported+%3Cmessage%3E+%26+more" in link
+
+    widget.reset()
+    assert not widget.report_bug_link.value
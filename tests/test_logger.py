@@ -0,0 +1,83 @@
+"""Test logger.py widgets and handlers"""
+# pylint: disable=import-error,protected-access
+
+
+def test_report_logger_ring_buffer():
+    """The report log is bounded, and only wrapped when a report is made"""
+    from optimade_client.logger import ReportLogger
+
+    widget = ReportLogger()
+    value = widget.value
+    changes = []
+    widget.observe(changes.append, names="value")
+
+    for index in range(2000):
+        widget.log(f"\nMessage number {index}\n")
+    assert not changes and widget.value == value
+
+    truncation = widget._urlencode_string(f"  {widget._urlencode_string('...')}\n")
+    logs = widget.logs
+    assert logs[0] == truncation
+    assert logs[-1] == widget._urlencode_string("  Message number 1999\n")
+    assert sum(len(_) for _ in logs) == widget._size <= widget.MAX_BYTES
+    assert widget.report() == widget.WRAPPED_VALUE.format(logs="".join(logs))
+
+    widget.log("A" * widget.MAX_BYTES * 2)
+    logs = widget.logs
+    assert logs[0] == truncation and len(logs) == 2
+    assert sum(len(_) for _ in logs) <= widget.MAX_BYTES
+
+    widget.clear_logs()
+    assert widget.logs == []
+
+
+def test_output_logger_bounded_batches(monkeypatch):
+    """Only the latest lines are kept, and records are shown in batches"""
+    import logging
+
+    from optimade_client import executor
+    from optimade_client.logger import OutputLoggerHandler
+
+    handler = OutputLoggerHandler(max_lines=3)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger = logging.getLogger("test_output_logger")
+    logger.propagate = False
+    logger.addHandler(handler)
+    widget = handler.get_widget()
+
+    for index in range(10):
+        logger.warning("Message %d", index)
+    assert widget.outputs == (
+        {
+            "name": "log",
+            "output_type": "stream",
+            "text": "Message 9\nMessage 8\nMessage 7\n",
+        },
+    )
+
+    class _Loop:
+        def __init__(self):
+            self.callbacks = []
+
+        def add_callback(self, callback, *args):
+            self.callbacks.append(lambda: callback(*args))
+
+        def call_later(self, delay, callback, *args):
+            assert 0 <= delay <= handler.flush_interval
+            self.callbacks.append(lambda: callback(*args))
+
+    loop = _Loop()
+    monkeypatch.setattr(executor, "kernel_loop", lambda: loop)
+    updates = []
+    widget.observe(updates.append, names="outputs")
+    for index in range(10, 20):
+        logger.warning("Message %d", index)
+    assert not updates and len(loop.callbacks) == 1
+
+    while loop.callbacks:
+        loop.callbacks.pop(0)()
+    assert len(updates) == 1
+    assert widget.outputs[0]["text"] == "Message 19\nMessage 18\nMessage 17\n"
+
+    widget.reset()
+    assert widget.outputs == () and not widget.lines
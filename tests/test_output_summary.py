@@ -0,0 +1,93 @@
+"""Test subwidgets/output_summary.py widgets"""
+# pylint: disable=import-error,redefined-outer-name
+import pytest
+
+
+@pytest.fixture
+def synthetic_structure(optimade_structure):
+    """Factory of structures with `nsites` sites, including a species with vacancies"""
+    import numpy as np
+
+    def _structure(nsites: int):
+        positions = np.random.default_rng(0).random((nsites, 3)) * 50.0
+        return optimade_structure(
+            "synthetic",
+            nsites=nsites,
+            elements=("Si", "O", "Fe"),
+            species=[
+                {"name": "Si", "chemical_symbols": ["Si"], "concentration": [1.0]},
+                {"name": "O", "chemical_symbols": ["O"], "concentration": [1.0]},
+                {
+                    "name": "Fe",
+                    "chemical_symbols": ["Fe", "vacancy"],
+                    "concentration": [0.9, 0.1],
+                },
+            ],
+            cartesian_site_positions=positions.tolist(),
+            lattice_vectors=[[50.0, 0, 0], [0, 50.0, 0], [0, 0, 50.0]],
+            structure_features=["disorder"],
+        )
+
+    return _structure
+
+
+def test_sites_table(synthetic_structure):
+    """The sites table lists all sites, leaving out vacancies without changing species"""
+    from optimade_client.subwidgets import StructureSites
+
+    structure = synthetic_structure(4)
+    widget = StructureSites(structure=structure)
+
+    assert widget.table.value.count("<tr>") == 4
+    assert "<td>Fe</td><td>0.90</td>" in widget.table.value
+    position = f"<td>{structure.cartesian_site_positions[3][2]:.5f}</td>"
+    assert position in widget.table.value
+    assert structure.species[2].chemical_symbols == ["Fe", "vacancy"]
+    assert widget.window_chooser.layout.display == "none"
+
+
+def test_sites_table_window(synthetic_structure):
+    """Only the sites of the current window are rendered"""
+    from optimade_client.subwidgets import StructureSites
+
+    structure = synthetic_structure(250)
+    widget = StructureSites(structure=structure, window_size=100)
+
+    assert widget.table.value.count("<tr>") == 100
+    assert widget.text.value == "Showing sites 1-100 of 250"
+    assert widget.button_prev.disabled and not widget.button_next.disabled
+
+    widget.button_last.click()
+    assert widget.table.value.count("<tr>") == 50
+    assert widget.text.value == "Showing sites 201-250 of 250"
+    position = f"<td>{structure.cartesian_site_positions[249][0]:.5f}</td>"
+    assert position in widget.table.value
+    assert widget.button_next.disabled
+
+    widget.structure = synthetic_structure(4)
+    assert widget.window_offset == 0
+    assert widget.table.value.count("<tr>") == 4
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("nsites", [10_000, 100_000])
+def test_sites_table_benchmark(synthetic_structure, nsites: int):
+    """Benchmark: Show the sites table of large structures and flip through it"""
+    import time
+
+    from optimade_client.subwidgets import StructureSites
+
+    structure = synthetic_structure(nsites)
+    widget = StructureSites()
+
+    start = time.perf_counter()
+    widget.structure = structure
+    assert time.perf_counter() - start < 1e-4 * nsites
+
+    start = time.perf_counter()
+    for _ in range(10):
+        widget.button_next.click()
+    assert (time.perf_counter() - start) / 10 < 0.1
+
+    assert widget.table.value.count("<tr>") == widget.window_size
+    assert len(widget.table.value) < 100 * widget.window_size
@@ -0,0 +1,108 @@
+"""Test page_store.py"""
+# pylint: disable=import-error
+import pytest
+
+
+def test_page_store_entries(structure_entry):
+    """Entries are given back as stored"""
+    from optimade_client.page_store import PageStore
+
+    molecule = {
+        "id": "water",
+        "type": "structures",
+        "attributes": {"chemical_formula_reduced": "H2O", "nsites": 3},
+    }
+    entries = [
+        structure_entry(
+            0,
+            nsites=8,
+            elements=("Na", "Cl"),
+            lattice_vectors=[[5.64, 0.0, 0.0], [0.0, 5.64, 0.0], [0.0, 0.0, None]],
+        ),
+        molecule,
+        structure_entry(1, nsites=2, elements=("Na", "Cl")),
+    ]
+    entries[0]["links"] = {"self": "https://example.org/structures/entry-0"}
+    store = PageStore(entries)
+
+    assert len(store) == 3
+    assert store[0] == entries[0]
+    assert store[1] == molecule
+    assert store[-1] == entries[2]
+    assert store[1:] == entries[1:]
+    assert list(store) == entries
+    assert store.species_names == ["Cl", "Na"]
+    assert store.positions(1) is None
+    assert store.positions(2).shape == (2, 3)
+
+    # Changing a retrieved entry does not change the store
+    store[0]["attributes"]["species_at_sites"][0] = "K"
+    store[0]["attributes"]["species"][0]["mass"] = 1.0
+    assert store[0] == entries[0]
+    assert PageStore([])[:25] == []
+
+
+def test_page_store_round_trip(structure_entry):
+    """Null, missing and malformed array properties are given back unchanged"""
+    import copy
+
+    from optimade_client.page_store import PageStore
+
+    unknown = structure_entry(0, nsites=2)
+    unknown["attributes"]["cartesian_site_positions"][1] = [None, 0.5, None]
+    unknown["attributes"]["lattice_vectors"] = None
+    missing = structure_entry(1, nsites=2)
+    for key in ("lattice_vectors", "species_at_sites"):
+        del missing["attributes"][key]
+    ragged = structure_entry(2, nsites=2)
+    ragged["attributes"]["cartesian_site_positions"] = [[0.0, 0.0, 0.0], [0.5, 0.5]]
+    ragged["attributes"]["lattice_vectors"] = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]
+    malformed = structure_entry(3, nsites=2)
+    malformed["attributes"]["cartesian_site_positions"] = [[0.0, "x", 0.0], None]
+    malformed["attributes"]["lattice_vectors"] = "unknown"
+    malformed["attributes"]["species_at_sites"] = ["Cu", None]
+    empty = structure_entry(4, nsites=1)
+    empty["attributes"].update(
+        nsites=0, cartesian_site_positions=[], species_at_sites=[]
+    )
+
+    entries = [unknown, missing, ragged, malformed, empty]
+    expected = copy.deepcopy(entries)
+    store = PageStore(entries)
+
+    assert list(store) == expected
+    assert "lattice_vectors" not in store[1]["attributes"]
+    assert "species_at_sites" not in store[1]["attributes"]
+    assert store[0]["attributes"]["cartesian_site_positions"][1] == [None, 0.5, None]
+    assert store.positions(0).shape == (2, 3)
+    assert store.positions(2) is None
+    assert store.positions(4).shape == (0, 3)
+
+
+@pytest.mark.benchmark
+def test_page_store_memory(structure_entry):
+    """Benchmark: memory used per 10,000 structures, compared to the raw entries"""
+    import tracemalloc
+
+    from optimade_client.page_store import PageStore
+
+    expected = structure_entry(9_999, nsites=16, elements=("Na", "Cl"))
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        entries = [
+            structure_entry(index, nsites=16, elements=("Na", "Cl"))
+            for index in range(10_000)
+        ]
+        raw = tracemalloc.get_traced_memory()[0] - before
+
+        # The store keeps (references to) the other properties of the raw entries
+        store = PageStore(entries)
+        del entries
+        compact = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    assert compact < raw / 2
+    assert store.nbytes < compact
+    assert store[9_999] == expected
@@ -0,0 +1,206 @@
+"""Test paging.py functions"""
+# pylint: disable=import-error
+
+
+def test_page_limit_bounds_and_rejection(monkeypatch):
+    """The maximum is read from /info and lowered when the database rejects a page limit"""
+    from optimade_client import paging
+
+    requests = []
+
+    def _query(**queries) -> dict:
+        requests.append(queries)
+        if queries.get("endpoint") == "/info":
+            return {"data": {"attributes": {"_exmpl_page_limit_max": 50}}, "meta": {}}
+        if queries["page_limit"] > 20:
+            return {
+                "errors": [{"detail": "page_limit must be at most 20", "status": "403"}]
+            }
+        return {"data": [{"id": str(_)} for _ in range(queries["page_limit"])]}
+
+    monkeypatch.setattr(paging, "perform_optimade_query", _query)
+    tuner = paging.PageLimitTuner()
+    base_url = "https://example.org/v1"
+
+    assert tuner.bounds(base_url) == (1, 50)
+    assert tuner.page_limit(base_url, multiple_of=15) == 45
+
+    response, page_limit, page_offset = tuner.perform_query(
+        offset=25, multiple_of=10, base_url=base_url
+    )
+    assert tuner.bounds(base_url) == (1, 20)
+    assert page_limit == 20
+    assert page_offset == 20
+    assert requests[-1]["page_number"] == 2
+    assert len(response["data"]) == 20
+
+
+def test_page_limit_from_measurements(monkeypatch):
+    """Slow databases get smaller pages"""
+    from optimade_client import paging
+
+    monkeypatch.setattr(
+        paging, "perform_optimade_query", lambda **_: {"data": {}, "meta": {}}
+    )
+    tuner = paging.PageLimitTuner(target_seconds=2.0)
+    base_url = "https://example.org/v1"
+
+    tuner.record(base_url, [{"id": "1"}], seconds=0.5)
+    tuner.record(base_url, [{"id": str(_)} for _ in range(10)], seconds=1.5)
+    # 0.5 s latency + 0.1 s per entry
+    assert tuner.page_limit(base_url) == 15
+    assert tuner.page_limit(base_url, multiple_of=10) == 10
+
+
+def test_page_cursors():
+    """Cursors are recorded per query and dropped if the database does not support them"""
+    from optimade_client.paging import PageCursors
+
+    query = {"base_url": "https://cursors.example.org/v1", "sort": "id"}
+    cursors = PageCursors()
+
+    assert cursors.record(query, 0, {"data": [{"id": "a"}, {"id": "b"}]})
+    cursor = cursors.get(query, 2)
+    assert cursor == {"page_above": "b"}
+
+    assert cursors.record(query, 2, {"data": [{"id": "c"}]}, cursor=cursor)
+    assert cursors.get(query, 3) == {"page_above": "c"}
+
+    # The database ignores the cursor, returning the first page again
+    assert not cursors.record(
+        query, 3, {"data": [{"id": "a"}]}, cursor=cursors.get(query, 3)
+    )
+    assert cursors.get(query, 3) is None
+    assert cursors.get({**query, "sort": "nsites"}, 2) is None
+
+
+def test_page_cursors_support_from_links():
+    """Support is detected from the `next` link, regardless of the type of the `id`s"""
+    from optimade_client.paging import PageCursors
+
+    base_url = "https://numeric.example.org/v1/structures"
+    query = {"base_url": "https://numeric.example.org/v1", "sort": "id"}
+    cursors = PageCursors()
+    assert cursors.record(query, 0, {"data": [{"id": "8"}, {"id": "9"}]})
+
+    # Numeric ids: "10" is above "9", although not as a string
+    response = {
+        "data": [{"id": "10"}, {"id": "11"}],
+        "links": {"next": {"href": f"{base_url}?sort=id&page_above=11"}},
+    }
+    assert cursors.record(query, 2, response, cursor=cursors.get(query, 2))
+    assert PageCursors().get(query, 0) is None and cursors.get(query, 4)
+
+    # The database ignores the cursor, continuing using offset-pagination
+    query = {"base_url": "https://offset.example.org/v1", "sort": "-id"}
+    cursors = PageCursors()
+    assert cursors.record(query, 0, {"data": [{"id": "9"}, {"id": "8"}]})
+    response = {
+        "data": [{"id": "7"}, {"id": "6"}],
+        "links": {"next": f"{base_url}?sort=-id&page_offset=2"},
+    }
+    assert not cursors.record(query, 2, response, cursor=cursors.get(query, 2))
+
+    # Support is remembered per database by all instances
+    cursors = PageCursors()
+    assert cursors.record(query, 0, {"data": [{"id": "9"}, {"id": "8"}]})
+    assert cursors.get(query, 2) is None
+
+
+def test_fetch_pages_in_order(monkeypatch):
+    """Pages are requested concurrently within the per-host limit and reassembled in order"""
+    import threading
+    import time
+
+    from optimade_client import paging
+
+    lock = threading.Lock()
+    concurrency = {"current": 0, "max": 0}
+
+    def _query(**queries) -> dict:
+        with lock:
+            concurrency["current"] += 1
+            concurrency["max"] = max(concurrency["max"], concurrency["current"])
+        # Later pages are returned faster
+        time.sleep(0.05 * (10 - queries["page_number"]))
+        with lock:
+            concurrency["current"] -= 1
+        offset = queries["page_offset"]
+        return {
+            "data": [{"id": str(_)} for _ in range(offset, min(offset + 5, 42))],
+            "meta": {"data_returned": 42},
+        }
+
+    monkeypatch.setattr(paging, "perform_optimade_query", _query)
+    response = paging.fetch_pages(
+        {"base_url": "https://pages.example.org/v1", "page_offset": 3},
+        offset=10,
+        number_of_pages=8,
+        page_limit=5,
+    )
+
+    assert [_["id"] for _ in response["data"]] == [str(_) for _ in range(10, 42)]
+    assert response["meta"] == {"data_returned": 42}
+    assert 1 < concurrency["max"] <= paging.MAX_REQUESTS_PER_HOST
+
+
+def test_page_limit_tuned_for_child_dbs(monkeypatch):
+    """Requests for child databases are measured, and the bounds request can be cancelled"""
+    from types import SimpleNamespace
+
+    import pytest
+
+    from optimade_client import paging
+    from optimade_client.exceptions import QueryCancelled
+    from optimade_client.executor import QueryExecutor
+    from optimade_client.subwidgets import provider_database
+
+    info_requests = []
+
+    def _info(token=None, **queries) -> dict:
+        if token is not None:
+            token.check()
+        info_requests.append(queries)
+        return {"data": {}, "meta": {}}
+
+    monkeypatch.setattr(paging, "perform_optimade_query", _info)
+    tuner = paging.PageLimitTuner()
+    base_url = "https://example.org/v1"
+
+    token = QueryExecutor().start("child_dbs")
+    token.cancel()
+    with pytest.raises(QueryCancelled):
+        tuner.page_limit(base_url, token=token)
+    assert not info_requests
+
+    child = {
+        "id": "db",
+        "type": "links",
+        "attributes": {"link_type": "child", "base_url": f"{base_url}/db"},
+    }
+    monkeypatch.setattr(
+        provider_database,
+        "perform_optimade_query",
+        lambda **_: {
+            "data": [child],
+            "meta": {"api_version": "1.0.0", "data_returned": 1, "data_available": 1},
+            "links": {},
+        },
+    )
+    chooser = SimpleNamespace(_page_limit_tuner=tuner, _executor=QueryExecutor())
+    query = {
+        "provider": SimpleNamespace(name="Example", base_url=base_url),
+        "page_limit": tuner.page_limit(base_url),
+        "page_offset": 0,
+        "page_number": 1,
+    }
+    (
+        implementations,
+        _,
+        data_returned,
+        _,
+    ) = provider_database.ProviderImplementationChooser._query(chooser, query)
+    assert implementations == [child] and data_returned == 1
+    assert (
+        tuner._databases[base_url].latency is not None
+    )  # pylint: disable=protected-access
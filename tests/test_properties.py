@@ -0,0 +1,47 @@
+"""Test properties.py functions"""
+# pylint: disable=import-error
+
+
+def test_derived_properties():
+    """Properties are derived for a page of entries at once, NaN where not possible"""
+    import math
+
+    import numpy as np
+
+    from optimade_client.properties import derived_properties
+
+    rocksalt = {
+        "attributes": {
+            "chemical_formula_reduced": "ClNa",
+            "nsites": 8,
+            "lattice_vectors": [[5.64, 0.0, 0.0], [0.0, 5.64, 0.0], [0.0, 0.0, 5.64]],
+            "species_at_sites": ["Na"] * 4 + ["Cl"] * 4,
+            "species": [
+                {"name": "Na", "chemical_symbols": ["Na"], "concentration": [1.0]},
+                {
+                    "name": "Cl",
+                    "chemical_symbols": ["Cl"],
+                    "concentration": [1.0],
+                    "mass": [35.45],
+                },
+            ],
+        }
+    }
+    hexagonal = {
+        "attributes": {
+            "chemical_formula_reduced": "C",
+            "nsites": 4,
+            "lattice_vectors": [[2.46, 0.0, 0.0], [-1.23, 2.13, 0.0], [0.0, 0.0, 6.7]],
+        }
+    }
+    molecule = {"attributes": {"chemical_formula_reduced": "H2O", "nsites": 3}}
+
+    properties = derived_properties([rocksalt, hexagonal, molecule])
+
+    assert np.allclose(properties["volume"][:2], [5.64**3, 2.46 * 2.13 * 6.7])
+    assert math.isnan(properties["volume"][2])
+    assert np.allclose(properties["gamma"][:2], [90.0, 120.0], atol=0.1)
+    assert np.allclose(properties["atoms_per_formula_unit"], [2, 1, 3])
+    assert np.allclose(properties["formula_units"], [4, 4, 1])
+    assert math.isclose(properties["density"][0], 2.16, abs_tol=0.01)
+    assert np.isnan(properties["density"][1:]).all()
@@ -0,0 +1,261 @@
+"""Test query_filter.py widgets"""
+# pylint: disable=import-error,protected-access
+import pytest
+
+
+def test_set_loading():
+    """The number of structures being retrieved is shown as the only option"""
+    from optimade_client.subwidgets import StructureDropdown
+
+    dropdown = StructureDropdown(disabled=True)
+    dropdown.set_loading(42)
+    assert dropdown.options == (("Retrieving 42 structures ...", None),)
+    assert dropdown.index == 0 and dropdown.value is None
+
+    dropdown.set_options([("Cu (id=1)", {"id": "1"})])
+    assert dropdown.index == 1
+
+
+def test_count_results(query_widget, optimade_database):
+    """The results are counted with a minimal query, shown while retrieving the page"""
+    shown = []
+    query_widget.structure_drop.observe(
+        lambda change: shown.append(change["new"]), names="options"
+    )
+
+    query_widget.retrieve_data(None)
+
+    count, page = optimade_database.structure_requests()
+    assert count["page_limit"] == "1" and count["response_fields"] == "id"
+    assert "sort" not in count
+    assert page["page_limit"] == "25"
+    assert shown[0] == (("Retrieving 30 structures ...", None),)
+    assert len(query_widget.structure_drop.options) == 26
+    assert query_widget.structure_page_chooser.data_returned == 30
+
+
+def test_count_results_none_found(query_widget, optimade_database):
+    """Without results, the full page is not queried"""
+    optimade_database.entries = []
+
+    query_widget.retrieve_data(None)
+
+    assert len(optimade_database.structure_requests()) == 1
+    assert query_widget.structure_drop.options == (("No structures found!", None),)
+    assert query_widget.structure_page_chooser.data_returned == 0
+
+
+def test_count_results_unknown(query_widget, optimade_database):
+    """Without `data_returned`, the count is skipped and the full page is shown"""
+    optimade_database.omit_meta = ["data_returned"]
+
+    options = query_widget.structure_drop.options
+    assert (
+        query_widget._count_results(
+            query_widget._query_parameters(query_widget._query_snapshot())
+        )
+        is None
+    )
+    assert query_widget.structure_drop.options == options
+
+    optimade_database.requests.clear()
+    query_widget.retrieve_data(None)
+    assert len(optimade_database.structure_requests()) == 2
+    assert len(query_widget.structure_drop.options) == 26
+    assert query_widget.structure_page_chooser.data_returned == 25
+
+
+def test_count_results_error(query_widget, optimade_database):
+    """A failing count is ignored, errors are reported by the full query"""
+    from optimade_client.exceptions import QueryError
+
+    optimade_database.fail = lambda queries: queries.get("response_fields") == "id"
+    assert (
+        query_widget._count_results(
+            query_widget._query_parameters(query_widget._query_snapshot())
+        )
+        is None
+    )
+
+    optimade_database.requests.clear()
+    query_widget.retrieve_data(None)
+    assert len(optimade_database.structure_requests()) == 2
+    assert len(query_widget.structure_drop.options) == 26
+
+    optimade_database.fail = lambda queries: True
+    with pytest.raises(QueryError, match="Server hiccup"):
+        query_widget.retrieve_data(None)
+    assert "Server hiccup" in query_widget.error_or_status_messages.value
+    assert query_widget.structure_drop.options == (("Search for structures ...", None),)
+    assert not query_widget.query_button.disabled
+
+
+def test_query_snapshot(query_widget, optimade_database):
+    """The query is taken when searching, changes while it runs do not affect it"""
+
+    def _change_widget(queries: dict) -> bool:
+        if queries.get("response_fields") != "id":
+            query_widget.sorting = "nsites"
+            query_widget.offset = 10
+        return False
+
+    query_widget.sorting = "-id"
+    optimade_database.fail = _change_widget
+    query_widget.retrieve_data(None)
+
+    page = optimade_database.structure_requests()[-1]
+    assert page["sort"] == "-id" and page["page_offset"] == "0"
+    assert query_widget._latest_query["sort"] == "-id"
+    assert query_widget._latest_query["page_offset"] == 0
+    assert query_widget.structure_drop.options[1][1]["id"] == "entry-9"
+
+
+def test_load_more_pages_opt_in(optimade_database):
+    """Loading several pages at once is only offered if requested"""
+    from optimade_client.query_filter import OptimadeQueryFilterWidget
+
+    chooser = OptimadeQueryFilterWidget().structure_page_chooser
+    assert chooser.button_more not in chooser.children
+
+    chooser = OptimadeQueryFilterWidget(load_more_pages=2).structure_page_chooser
+    assert chooser.button_more in chooser.children
+
+
+def test_skipped_conditions_shown(query_widget, optimade_database, caplog):
+    """The user is told about filter conditions the database cannot serve"""
+    import logging
+
+    query_widget.filters.collect_value = lambda: "nsites>=2 AND band_gap>1"
+    with caplog.at_level(logging.WARNING, logger="OPTIMADE_Client"):
+        query_widget.retrieve_data(None)
+
+    assert {_["filter"] for _ in optimade_database.structure_requests()} == {
+        '( nsites>=2 ) AND ( NOT structure_features HAS ANY "assemblies" )'
+    }
+    assert "unsupported: band_gap" in query_widget.error_or_status_messages.value
+    assert [_.message for _ in caplog.records if "band_gap" in _.message] == [
+        f"{optimade_database.base_url} cannot serve the query fully. Skipped: band_gap"
+    ]
+
+    # The notice is kept when paging
+    query_widget.structure_page_chooser.page_offset = 25
+    assert optimade_database.structure_requests()[-1]["page_offset"] == "25"
+    assert "unsupported: band_gap" in query_widget.error_or_status_messages.value
+
+    query_widget.count_everywhere()
+    assert "(skipped unsupported: band_gap)" in query_widget.hit_counts_table.value
+
+
+def test_structure_features_guard_skipped(query_widget, optimade_database):
+    """The user is told if structures with assemblies cannot be filtered out"""
+    from optimade_client.capabilities import CAPABILITY_MATRIX
+
+    del optimade_database.properties["structure_features"]
+    CAPABILITY_MATRIX.reset(optimade_database.base_url)
+    query_widget.retrieve_data(None)
+
+    assert "structure_features" not in optimade_database.structure_requests()[-1].get(
+        "filter", ""
+    )
+    assert "unsupported: structure_features" in (
+        query_widget.error_or_status_messages.value
+    )
+
+
+def test_structure_built_once(query_widget, optimade_database, monkeypatch):
+    """The structure is built when an option is first chosen, errors are shown"""
+    from optimade_client import query_filter
+
+    built = []
+
+    class _Structure(query_filter.Structure):
+        def __init__(self, entry):
+            built.append(entry["id"])
+            super().__init__(entry)
+
+    monkeypatch.setattr(query_filter, "Structure", _Structure)
+    optimade_database.entries = optimade_database.entries[:10]
+    query_widget.retrieve_data(None)
+
+    # The first result is chosen
+    structure = query_widget.structure
+    assert built == [structure.id] == [query_widget.structure_drop.value["id"]]
+
+    # Choosing it again, e.g., after sorting locally, does not build it again
+    query_widget.structure_drop.index = 2
+    query_widget.structure_drop.index = 1
+    assert query_widget._sort_locally("-nsites")
+    assert query_widget.structure is structure
+    assert built.count(structure.id) == 1 and len(built) == len(set(built))
+
+    option = query_widget.structure_drop.options[3][1]
+    option["entry"]["attributes"]["lattice_vectors"] = "not a lattice"
+    query_widget.structure_drop.index = 3
+    assert query_widget.structure is None
+    assert f"Could not parse structure {option['id']}" in (
+        query_widget.error_or_status_messages.value
+    )
+    query_widget.structure_drop.index = 1
+    query_widget.structure_drop.index = 3
+    assert built.count(option["id"]) == 1
+
+
+def test_adaptive_page_limit_capped(monkeypatch, optimade_database, structure_entry):
+    """A database serving fewer entries per page than the view still fills the view"""
+    from optimade.models import LinksResourceAttributes
+
+    from optimade_client import query_filter
+    from optimade_client.paging import PageLimitTuner
+
+    monkeypatch.setattr(query_filter, "PAGE_LIMIT_TUNER", PageLimitTuner())
+    optimade_database.entries = [structure_entry(index) for index in range(60)]
+    optimade_database.page_limit_max = 10
+
+    widget = query_filter.OptimadeQueryFilterWidget(adaptive_page_limit=True)
+    widget.database = (
+        "Example",
+        LinksResourceAttributes(
+            name="Example",
+            description="",
+            base_url=optimade_database.base_url,
+            homepage=None,
+            link_type="child",
+        ),
+    )
+    widget.retrieve_data(None)
+
+    shown = []
+    for page_offset in (25, 50):
+        shown.append([_[1]["id"] for _ in widget.structure_drop.options[1:]])
+        widget.structure_page_chooser.page_offset = page_offset
+    shown.append([_[1]["id"] for _ in widget.structure_drop.options[1:]])
+
+    assert [len(_) for _ in shown] == [25, 25, 10]
+    assert sorted(sum(shown, [])) == sorted(_["id"] for _ in optimade_database.entries)
+    assert query_filter.PAGE_LIMIT_TUNER.bounds(optimade_database.base_url)[1] == 10
+
+
+def test_last_page_reversed(query_widget, optimade_database):
+    """The last page is retrieved from the start of the reversed order, not at an offset"""
+    query_widget.sorting = "id"
+    query_widget.retrieve_data(None)
+    last_ids = sorted(_["id"] for _ in optimade_database.entries)[25:]
+
+    # Through the "next" link
+    optimade_database.requests.clear()
+    query_widget.structure_page_chooser.button_next.click()
+    (page,) = optimade_database.structure_requests()
+    assert page["sort"] == "-id" and page["page_limit"] == "5"
+    assert "page_offset" not in page or page["page_offset"] == "0"
+    assert query_widget._view_offset == 25
+    assert [_[1]["id"] for _ in query_widget.structure_drop.options[1:]] == last_ids
+
+    query_widget.structure_page_chooser.button_first.click()
+    assert query_widget._view_offset == 0
+
+    # Through the offset of the last page
+    optimade_database.requests.clear()
+    query_widget.structure_page_chooser.button_last.click()
+    (page,) = optimade_database.structure_requests()
+    assert page["sort"] == "-id" and page["page_limit"] == "5"
+    assert [_[1]["id"] for _ in query_widget.structure_drop.options[1:]] == last_ids
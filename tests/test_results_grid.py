@@ -0,0 +1,41 @@
+"""Test subwidgets/results_grid.py widget"""
+# pylint: disable=import-error
+
+
+def _option(identifier: str, formula: str, nsites: int, volume: float) -> tuple:
+    return (
+        f"{formula} (id={identifier})",
+        {
+            "id": identifier,
+            "formula": formula,
+            "properties": {"volume": volume, "density": float("nan")},
+            "entry": {"id": identifier, "attributes": {"nsites": nsites}},
+        },
+    )
+
+
+def test_results_grid_sort_and_filter():
+    """Rows are sorted and filtered locally, and `index` refers to the given options"""
+    from optimade_client.subwidgets import ResultsGrid
+
+    options = [
+        ("Select a structure", None),
+        _option("a", "NaCl", 8, 179.4),
+        _option("b", "Si", 2, float("nan")),
+        _option("c", "Cu", 1, 11.8),
+    ]
+    grid = ResultsGrid()
+    grid.set_options(options)
+    assert [index for _, index in grid.table.options] == [3, 1, 2]
+
+    grid.sort_by.value = "Volume (Å³)"
+    assert [index for _, index in grid.table.options] == [3, 1, 2]
+    grid.descending.value = True
+    assert [index for _, index in grid.table.options] == [1, 3, 2]
+
+    grid.filter.value = "si"
+    assert [index for _, index in grid.table.options] == [2]
+    assert grid.table.options[0][0].split()[:3] == ["Si", "2", "-"]
+
+    grid.table.value = 2
+    assert grid.index == 2
@@ -0,0 +1,163 @@
+"""Test summary.py widgets"""
+# pylint: disable=import-error,redefined-outer-name
+import pytest
+
+
+@pytest.fixture
+def nacl(optimade_structure):
+    """Factory of a small periodic structure"""
+    return lambda: optimade_structure("nacl", nsites=2, elements=("Na", "Cl"))
+
+
+def test_download_on_demand(nacl):
+    """The structure is only converted on click, and the file is only kept while offered"""
+    from optimade_client.summary import DownloadChooser
+
+    widget = DownloadChooser()
+    converted = []
+    convert = widget._convert  # pylint: disable=protected-access
+    widget._convert = lambda desired_format: (  # pylint: disable=protected-access
+        converted.append(desired_format) or convert(desired_format)
+    )
+    widget.structure = nacl()
+    assert widget.dropdown.value
+    assert not widget.download_button.disabled
+    assert not converted and not widget.download_link.value
+
+    widget.download_button.click()
+    assert converted == [widget.dropdown.value]
+    assert 'download="optimade_structure_entry-nacl.cif"' in widget.download_link.value
+    assert 'href="data:charset=latin-1;base64,' in widget.download_link.value
+
+    widget.dropdown.index = 2
+    assert not widget.download_link.value
+    widget.download_button.click()
+    assert widget.download_link.value
+    widget.structure = None
+    assert not widget.download_link.value
+
+
+def test_download_link_expires(nacl, monkeypatch):
+    """The download link is removed after a while, unless replaced by a newer link"""
+    from optimade_client import summary
+
+    class _Loop:
+        def __init__(self):
+            self.timers = []
+
+        def call_later(self, delay, callback, *args):
+            self.timers.append((delay, lambda: callback(*args)))
+
+    loop = _Loop()
+    monkeypatch.setattr(summary, "kernel_loop", lambda: loop)
+    widget = summary.DownloadChooser()
+    widget.structure = nacl()
+
+    widget.download_button.click()
+    widget.dropdown.index = 2
+    widget.download_button.click()
+    assert [delay for delay, _ in loop.timers] == [widget.LINK_SECONDS] * 2
+
+    loop.timers[0][1]()
+    assert widget.download_link.value
+    loop.timers[1][1]()
+    assert not widget.download_link.value
+
+
+def test_conversion_cache(nacl):
+    """Conversions are shared between widgets, and the cache is bounded"""
+    from optimade_client.conversions import ConversionCache
+
+    cache = ConversionCache(max_bytes=10, max_adapters=1)
+    structure = nacl()
+
+    atoms = cache.adapter(structure, "ase")
+    assert cache.adapter(nacl(), "ase") is atoms
+
+    written = []
+
+    def _write(content: bytes):
+        written.append(content)
+        return content, "utf-8"
+
+    assert cache.file(structure, "a", lambda: _write(b"12345")) == (b"12345", "utf-8")
+    assert cache.file(nacl(), "a", lambda: _write(b"other")) == (
+        b"12345",
+        "utf-8",
+    )
+    cache.file(structure, "b", lambda: _write(b"123456"))
+    assert cache.size == 6
+    cache.file(structure, "a", lambda: _write(b"12345"))
+    assert written == [b"12345", b"123456", b"12345"]
+
+
+def test_conversion_cache_per_database(optimade_structure):
+    """Structures from different databases sharing an `id` do not share conversions"""
+    from optimade_client.conversions import ConversionCache
+
+    cache = ConversionCache()
+    # Same `id`, `last_modified` and formula, but another lattice
+    first = optimade_structure("shared")
+    other = optimade_structure(
+        "shared",
+        lattice_vectors=[[4.0, 0.0, 0.0], [0.0, 4.0, 0.0], [0.0, 0.0, 4.0]],
+    )
+
+    assert cache.adapter(first, "ase") is not cache.adapter(other, "ase")
+    assert cache.adapter(other, "ase").cell[0][0] == 4.0
+    assert cache.file(first, "cif", lambda: (b"first", "utf-8"))[0] == b"first"
+    assert cache.file(other, "cif", lambda: (b"other", "utf-8"))[0] == b"other"
+    assert cache.file(first, "xyz", lambda: (b"first xyz", "utf-8"))[0] == b"first xyz"
+
+
+def test_viewer_level_of_detail(monkeypatch, nacl):
+    """Large structures are shown without bonds, or only partly"""
+    from optimade_client.conversions import CONVERSION_CACHE
+    from optimade_client.summary import StructureViewer
+
+    CONVERSION_CACHE.clear()
+    widget = StructureViewer()
+    widget.structure = nacl()
+    assert widget.level_of_detail.value == ""
+
+    monkeypatch.setattr(StructureViewer, "MAX_BONDED_SITES", 1)
+    monkeypatch.setattr(StructureViewer, "MAX_SITES", 1)
+    widget.structure = None
+    widget.structure = nacl()
+    assert "first 1 of 2 sites" in widget.level_of_detail.value
+
+    # The viewer and the downloads share the conversion
+    assert CONVERSION_CACHE.adapter(nacl(), "ase") is CONVERSION_CACHE.adapter(
+        widget.structure, "ase"
+    )
+    assert len(CONVERSION_CACHE._adapters) == 1  # pylint: disable=protected-access
+
+
+def test_ase_formats_in_memory(monkeypatch, nacl):
+    """ASE writers accepting file objects write to memory, others to a temporary file"""
+    import tempfile
+
+    from optimade_client.summary import DownloadChooser
+
+    atoms = nacl().as_ase
+    written = {}
+    for desired_format in ("cif", "vasp", "struct"):
+        written[
+            desired_format
+        ] = DownloadChooser._get_via_ase(  # pylint: disable=protected-access
+            atoms, desired_format
+        )
+
+    def _no_temporary_file(*args, **kwargs):
+        raise AssertionError("A temporary file was used")
+
+    monkeypatch.setattr(tempfile, "NamedTemporaryFile", _no_temporary_file)
+    for desired_format in ("cif", "vasp"):
+        assert (
+            DownloadChooser._get_via_ase(  # pylint: disable=protected-access
+                atoms, desired_format
+            )
+            == written[desired_format]
+        )
+    assert isinstance(written["cif"], bytes) and "Na" in written["vasp"]
+    assert written["struct"]